@@ -1,5 +1,8 @@
 import os
 import time
+
+from typing import AnyStr, Optional
+
 from django.contrib.auth.models import AnonymousUser
 import jwt
 from channels.db import database_sync_to_async
@@ -12,42 +15,78 @@ from user.instructor.models import Instructor
 from user.models import ReaderUser
 from django.http import HttpResponse
 
+
+class AuthContext(object):
+    """
+    A validated JWT kept for the lifetime of a websocket connection, so each message only has to compare its expiry.
+    """
+    def __init__(self, user, exp: Optional[float] = None):
+        self.user = user
+        self.exp = exp
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.time()
+
+        return self.exp is None or self.exp <= now
+
+
+@database_sync_to_async
+def get_user_for_path(user_id: int, path: AnyStr):
+    if "student/text_read/" in path:
+        student = Student.objects.filter(user_id=user_id).select_related('user').first()
+
+        if not student:
+            # then there is no user in the QuerySet
+            raise InvalidTokenError
+
+        # TODO: there may be need to make user an object and have the student object be a member
+        return student.user
+    elif "instructor/text_read/" in path:
+        instructor = Instructor.objects.filter(user_id=user_id).select_related('user').first()
+
+        if not instructor:
+            # then there is no user in the QuerySet
+            raise InvalidTokenError
+
+        # TODO: there may be need to make user an object and have the student object be a member
+        return instructor.user
+    else:
+        # path error, same result
+        raise InvalidTokenError
+
+
+async def jwt_auth_context(scope, token: Optional[AnyStr] = None) -> AuthContext:
+    """ Validate a JWT (by default the one in the query string) against the db and its timestamp, once. """
+    token = token or scope.get('query_string')
+
+    if not token:
+        return AuthContext(AnonymousUser)
+
+    secret_key = os.getenv('DJANGO_SECRET_KEY')
+
+    try:
+        jwt_decoded = jwt.decode(token, secret_key, algorithms=['HS256'])
+
+        if jwt_decoded['exp'] <= time.time():
+            # then their token has expired
+            raise InvalidTokenError
+
+        user = await get_user_for_path(jwt_decoded['user_id'], scope['path'])
+
+        return AuthContext(user, exp=jwt_decoded['exp'])
+    except InvalidTokenError:
+        return AuthContext(AnonymousUser)
+
+
 async def jwt_validation(scope):
     """ Take JWT from query string to check the user against the db and validate its timestamp """
     if not scope and not scope['query_string']:
         return "{'errors': 'Invalid querystring'}"
     else:
-        secret_key = os.getenv('DJANGO_SECRET_KEY')
-        try:
-            jwt_decoded = jwt.decode(scope['query_string'], secret_key, algorithms=['HS256'])
-
-            if jwt_decoded['exp'] <= time.time():
-                # then their token has expired 
-                raise InvalidTokenError
-
-            if "student/text_read/" in scope['path']:
-                if not Student.objects.filter(user_id=jwt_decoded['user_id']):
-                    # then there is no user in the QuerySet
-                    raise InvalidTokenError
-                # force evaluation of the QuerySet. We already know it contains at least one element
-                student = list(Student.objects.filter(user_id=jwt_decoded['user_id']))[0]
-
-                # TODO: there may be need to make user an object and have the student object be a member
-                return student.user
-            elif "instructor/text_read/" in scope['path']:
-                if not Instructor.objects.filter(user_id=jwt_decoded['user_id']):
-                     # then there is no user in the QuerySet
-                     raise InvalidTokenError
-                # force evaluation of the QuerySet. We already know it contains at least one element
-                instructor = list(Instructor.objects.filter(user_id=jwt_decoded['user_id']))[0]
-
-                # TODO: there may be need to make user an object and have the student object be a member
-                return instructor.user
-            else:
-                # path error, same result
-                raise InvalidTokenError
-        except InvalidTokenError: 
-            return AnonymousUser
+        auth_context = await jwt_auth_context(scope)
+
+        return auth_context.user
 
 
 class ProducerAuthMiddleware:
@@ -76,7 +115,8 @@ class ProducerAuthMiddlewareInstance:
     async def __call__(self, receive, send):
         """ Look up user from query string and validate their JWT. """
         try:
-            self.scope['user'] = await jwt_validation(self.scope)
+            self.scope['auth'] = await jwt_auth_context(self.scope)
+            self.scope['user'] = self.scope['auth'].user
             
             inner = self.inner(self.scope)
             return await inner(receive, send)
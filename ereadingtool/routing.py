@@ -3,6 +3,7 @@ from channels.routing import ProtocolTypeRouter, URLRouter, ChannelNameRouter
 from channels.security.websocket import AllowedHostsOriginValidator
 from django.conf.urls import url
 
+from first_time_correct.consumers import RecordFirstTimeCorrect
 from flashcards.consumers.student import StudentFlashcardSessionConsumer
 
 from text.consumers.student import StudentTextReaderConsumer
@@ -23,6 +24,7 @@ application = ProtocolTypeRouter({
         ])
     )),
     'channel': ChannelNameRouter({
-        'text': ParseTextSectionForDefinitions
+        'text': ParseTextSectionForDefinitions,
+        'first_time_correct': RecordFirstTimeCorrect
     })
 })
@@ -26,6 +26,20 @@ CHANNEL_LAYERS = {
     },
 }
 
+# The student-independent part of text reading payloads is cached per text section.  Switch the backend to
+# 'text.cache.backends.DjangoCacheBackend' to share payloads between workers through one of the CACHES.
+TEXT_READING_PAYLOAD_CACHE = {
+    'BACKEND': 'text.cache.backends.LRUCacheBackend',
+    'OPTIONS': {
+        'max_size': 256,
+    },
+}
+
+# the grammemes of words parsed by pymorphy2 are kept in an LRU of this many surface forms per process.
+MORPHOLOGY = {
+    'MAX_SIZE': 50000,
+}
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.0/howto/deployment/checklist/
 
@@ -38,6 +52,66 @@ APPEND_SLASH = False
 YANDEX_TRANSLATION_API_KEY = os.getenv('YANDEX_TRANSLATION_API_KEY')
 YANDEX_DEFINITION_API_KEY = os.getenv('YANDEX_DEFINITION_API_KEY')
 
+# how long dictionary lookups are cached per lemma (seconds).  lemmas with no definitions are retried sooner.
+YANDEX_DEFINITION_CACHE = {
+    'TTL': 60 * 60 * 24 * 90,
+    'NEGATIVE_TTL': 60 * 60 * 24 * 7,
+}
+
+# requests to the Yandex APIs are limited per API key with a token bucket (rate is in requests per second).  the
+# file lock backend is shared by processes on one host, use 'text.yandex.ratelimit.RedisTokenBucket' to share the
+# limit through the channel layer's Redis.
+YANDEX_RATE_LIMIT = {
+    'BACKEND': 'text.yandex.ratelimit.FileLockTokenBucket',
+    'OPTIONS': {
+        'rate': 0.133,
+        'burst': 1,
+    },
+}
+
+# dictionary lookups for a text section run this many requests at once (still within YANDEX_RATE_LIMIT), retrying
+# throttled or failed requests after BACKOFF seconds, doubling up to MAX_BACKOFF.
+YANDEX_DEFINITION_LOOKUP = {
+    'MAX_CONCURRENCY': 4,
+    'MAX_RETRIES': 4,
+    'BACKOFF': 1.0,
+    'MAX_BACKOFF': 30.0,
+}
+
+# where words' definitions come from: 'online' (the Yandex dictionary API), 'offline_first' (dictionaries imported with
+# the import_dictionary command, then the API for lemmas they don't have) or 'offline' (imported dictionaries only).
+TRANSLATION_DICTIONARY = {
+    'MODE': 'online',
+}
+
+# translation jobs are leased by a worker for LEASE seconds (extended as they make progress, after each BATCH_SIZE
+# lemmas looked up) and retried up to MAX_ATTEMPTS times, BACKOFF seconds after the first failure, doubling up to
+# MAX_BACKOFF.
+TRANSLATION_JOBS = {
+    'LEASE': 60 * 10,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 60,
+    'MAX_BACKOFF': 60 * 60,
+    'BATCH_SIZE': 100,
+}
+
+# BM25 parameters of the text search (the ?q= of the text API), META_WEIGHT weights words of a text's title and
+# introduction over words of its sections.
+TEXT_SEARCH = {
+    'K1': 1.2,
+    'B': 0.75,
+    'META_WEIGHT': 2,
+}
+
+# counts of texts by difficulty, tag and reading status for the catalog's filters (the ?facets of the text API) are
+# cached until the catalog or the reader's readings change.  the backends are those of TEXT_READING_PAYLOAD_CACHE.
+TEXT_FACET_CACHE = {
+    'BACKEND': 'text.cache.backends.LRUCacheBackend',
+    'OPTIONS': {
+        'max_size': 1024,
+    },
+}
+
 # days
 INVITATION_EXPIRY = 7
 
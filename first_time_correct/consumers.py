@@ -0,0 +1,23 @@
+import logging
+
+from typing import Dict
+
+from channels.consumer import SyncConsumer
+
+from first_time_correct.models import FirstTimeCorrect
+
+logger = logging.getLogger('django.consumers')
+
+
+class RecordFirstTimeCorrect(SyncConsumer):
+    """
+    Records first-time-correct scores sent by reading consumers as they disconnect, off the websocket event loop.
+    """
+    def first_time_correct_record(self, message: Dict):
+        logger.debug(f'Recording first time correct for student pk={message["student_pk"]} '
+                     f'text pk={message["text_pk"]}')
+
+        FirstTimeCorrect.record(student_id=message['student_pk'],
+                                text_id=message['text_pk'],
+                                correct_answers=message['correct_answers'],
+                                total_answers=message['total_answers'])
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:24
+
+from django.db import migrations
+from django.db.models import Min
+
+
+def remove_duplicate_attempts(apps, schema_editor):
+    FirstTimeCorrect = apps.get_model('first_time_correct', 'FirstTimeCorrect')
+
+    # keep each student's first attempt at a text
+    first_attempts = FirstTimeCorrect.objects.values('student', 'text').annotate(first_pk=Min('pk'))
+
+    FirstTimeCorrect.objects.exclude(pk__in=[attempt['first_pk'] for attempt in first_attempts]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0004_auto_20190424_0140'),
+        ('text', '0011_textsection_content_version'),
+        ('first_time_correct', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attempts, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='firsttimecorrect',
+            unique_together={('student', 'text')},
+        ),
+    ]
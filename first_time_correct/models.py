@@ -4,6 +4,9 @@ from user.student.models import Student
 from django.utils import timezone
 
 class FirstTimeCorrect(models.Model):
+    class Meta:
+        unique_together = (('student', 'text'),)
+
     # If a student id and text id exist in the model
     # then the student has attempted the text at least once
     student = models.ForeignKey(Student, related_name='student', on_delete=models.CASCADE)
@@ -15,6 +18,14 @@ class FirstTimeCorrect(models.Model):
     def to_json_schema():
         pass
 
+    @classmethod
+    def record(cls, student_id: int, text_id: int, correct_answers: int, total_answers: int):
+        """
+        Records a student's first attempt at a text.  Later attempts are ignored, so recording is idempotent.
+        """
+        cls.objects.bulk_create([cls(student_id=student_id, text_id=text_id, correct_answers=correct_answers,
+                                     total_answers=total_answers)], ignore_conflicts=True)
+
     # CREATE TABLE "first_time_correct" (
     #     "id" integer NOT NULL,
     #     "student_id" integer NOT NULL,
@@ -1,3 +1,26 @@
 from django.test import TestCase
 
-# Create your tests here.
+from ereadingtool.test.user import TestUser
+from first_time_correct.consumers import RecordFirstTimeCorrect
+from first_time_correct.models import FirstTimeCorrect
+from text.models import Text
+
+
+class TestFirstTimeCorrect(TestUser, TestCase):
+    def test_record_first_time_correct(self):
+        _, _, student = self.new_student()
+
+        text = Text.objects.create(title='Title', introduction='Introduction', source='Source')
+
+        consumer = RecordFirstTimeCorrect(scope={})
+
+        message = {'type': 'first_time_correct.record', 'student_pk': student.pk, 'text_pk': text.pk,
+                   'correct_answers': 2, 'total_answers': 4}
+
+        consumer.first_time_correct_record(message)
+
+        # later attempts don't replace the first
+        consumer.first_time_correct_record(dict(message, correct_answers=4))
+
+        self.assertEquals(list(FirstTimeCorrect.objects.filter(student=student, text=text).values_list(
+            'correct_answers', 'total_answers')), [(2, 4)])
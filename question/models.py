@@ -25,23 +25,42 @@ class Question(Timestamped, models.Model):
         return self.body[:15]
 
     def to_text_reading_dict(self, text_reading=None) -> Dict:
-        answers = [answer.to_text_reading_dict(text_reading=text_reading) for answer in self.answers.all()]
-
-        if text_reading:
-            random.seed(text_reading.random_seed)
-            random.shuffle(answers)
+        return self.personalize_text_reading_dict(self.to_base_text_reading_dict(), text_reading=text_reading)
 
+    def to_base_text_reading_dict(self) -> Dict:
+        """
+        The student-independent part of the reading dict.  Answers still carry 'correct' here, it's removed once the
+        dict is personalized for a reading.
+        """
         return {
             'id': self.pk,
-            'text_section_id': self.text_section.pk,
+            'text_section_id': self.text_section_id,
             'created_dt': self.created_dt.isoformat(),
             'modified_dt': self.modified_dt.isoformat(),
             'body': self.body,
             'order': self.order,
-            'answers': answers,
+            'answers': [answer.to_dict() for answer in self.answers.all()],
             'question_type': self.type
         }
 
+    @classmethod
+    def personalize_text_reading_dict(cls, question_dict: Dict, text_reading=None, answer_state=None) -> Dict:
+        question_dict = dict(question_dict)
+
+        if text_reading and answer_state is None:
+            answer_state = text_reading.answer_state(question_dict['text_section_id'])
+
+        answers = [Answer.personalize_text_reading_dict(answer_dict, answer_state=answer_state)
+                   for answer_dict in question_dict['answers']]
+
+        if text_reading:
+            random.seed(text_reading.random_seed)
+            random.shuffle(answers)
+
+        question_dict['answers'] = answers
+
+        return question_dict
+
     def to_dict(self) -> Dict:
         return {
             'id': self.pk,
@@ -71,19 +90,21 @@ class Answer(models.Model):
         return f'{self.order}'
 
     def to_text_reading_dict(self, text_reading=None) -> Dict:
-        answer_dict = self.to_dict()
+        answer_state = text_reading.answer_state(self.question.text_section_id) if text_reading else None
+
+        return self.personalize_text_reading_dict(self.to_dict(), answer_state=answer_state)
 
-        answer_dict.pop('correct')
+    @classmethod
+    def personalize_text_reading_dict(cls, answer_dict: Dict, answer_state=None) -> Dict:
+        answer_dict = dict(answer_dict)
+
+        correct = answer_dict.pop('correct')
 
         answer_dict['answered_correctly'] = None
 
-        if text_reading and text_reading.text_reading_answers.filter(answer=self).count():
+        if answer_state and answer_state.is_answered(answer_dict['id']):
             # this was one of the user's answers
-            if self == text_reading.text_reading_answers.filter(question=self.question)[0].answer:
-                # answer was given first
-                answer_dict['answered_correctly'] = self.correct
-
-            answer_dict['answered_correctly'] = self.correct
+            answer_dict['answered_correctly'] = correct
 
         return answer_dict
 
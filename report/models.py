@@ -399,7 +399,9 @@ class StudentFlashcardsReport(object):
 
     def to_dict(self) -> Dict:
         texts = {}
-        flashcards = self.student.flashcards_report.flashcards.all()
+        flashcards = list(self.student.flashcards_report.flashcards.select_related('phrase__text_section',
+                                                                                   'text_section__text'))
+        TextPhrase.prefetch_sentences(fc.phrase for fc in flashcards)
         for fc in flashcards:
             try:
                 text_title = fc.text_section.text.title
@@ -456,7 +458,8 @@ class StudentFlashcardsCSV(object):
         self.flashcards = Flashcards.objects.filter(student=student) 
 
     def to_list(self):
-        flashcards = self.student.flashcards_report.flashcards.all()
+        flashcards = list(self.student.flashcards_report.flashcards.select_related('phrase__text_section'))
+        TextPhrase.prefetch_sentences(fc.phrase for fc in flashcards)
         fc_list = []
 
         for fc in flashcards:
@@ -478,7 +481,8 @@ class StudentFlashcardsTable(object):
 
     def to_list(self):
         # moving directly from legacy `flashcards` to `my_words` in the model instead of in the view
-        my_words = self.student.flashcards_report.flashcards.all()
+        my_words = list(self.student.flashcards_report.flashcards.select_related('phrase__text_section'))
+        TextPhrase.prefetch_sentences(word.phrase for word in my_words)
         # my_words_data is a list of dictionaries, each one containing a "my_words" object of 
         # {phrase:'', context:'', lemma:'', translation:''}
         listy = list(my_words)
@@ -0,0 +1,84 @@
+import threading
+
+from collections import OrderedDict
+from typing import AnyStr, Any, Optional
+
+from django.core.cache import caches
+
+
+class PayloadCacheBackend(object):
+    def get(self, key: AnyStr) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: AnyStr, value: Any):
+        raise NotImplementedError
+
+    def delete(self, key: AnyStr):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LRUCacheBackend(PayloadCacheBackend):
+    """
+    An in-process, thread-safe LRU.  Entries are only visible to the process that built them.
+    """
+    def __init__(self, max_size: int = 256, **kwargs):
+        self.max_size = max_size
+
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key: AnyStr) -> Optional[Any]:
+        with self.lock:
+            try:
+                self.entries.move_to_end(key)
+
+                return self.entries[key]
+            except KeyError:
+                return None
+
+    def set(self, key: AnyStr, value: Any):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: AnyStr):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class DjangoCacheBackend(PayloadCacheBackend):
+    """
+    Stores payloads in one of the caches configured in settings.CACHES, so they can be shared between processes.
+    """
+    def __init__(self, alias: AnyStr = 'default', timeout: Optional[int] = None, **kwargs):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key: AnyStr) -> Optional[Any]:
+        return self.cache.get(key)
+
+    def set(self, key: AnyStr, value: Any):
+        self.cache.set(key, value, timeout=self.timeout)
+
+    def delete(self, key: AnyStr):
+        self.cache.delete(key)
+
+    def clear(self):
+        self.cache.clear()
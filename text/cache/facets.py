@@ -0,0 +1,90 @@
+from typing import AnyStr, Callable, Dict, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from text.cache.backends import PayloadCacheBackend
+
+DEFAULT_FACET_CACHE = {
+    'BACKEND': 'text.cache.backends.LRUCacheBackend',
+    'OPTIONS': {
+        'max_size': 1024,
+    },
+}
+
+
+class TextFacetCache(object):
+    """
+    Caches the counts of texts by difficulty and tag (per audience, since students don't see hidden texts) keyed by
+    the catalog's version, and the counts by reading status per profile keyed by the catalog's version and the
+    version of the profile's readings.  Saving or deleting a text or moving a reading changes a version, so the counts
+    are only recounted after something they depend on has changed.
+    """
+    key_prefix = 'text_facets'
+
+    def __init__(self, backend: PayloadCacheBackend):
+        self.backend = backend
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> 'TextFacetCache':
+        config = getattr(settings, 'TEXT_FACET_CACHE', DEFAULT_FACET_CACHE)
+
+        backend_cls = import_string(config['BACKEND'])
+
+        return cls(backend=backend_cls(**config.get('OPTIONS', {})))
+
+    def key(self, facets: AnyStr, owner: AnyStr, version: AnyStr) -> AnyStr:
+        return f'{self.key_prefix}:{facets}:{owner}:{version}'
+
+    def get(self, facets: AnyStr, owner: AnyStr, version: AnyStr) -> Optional[Dict]:
+        return self.backend.get(self.key(facets, owner, version))
+
+    def get_or_build(self, facets: AnyStr, owner: AnyStr, version: AnyStr, build: Callable[[], Dict]) -> Dict:
+        key = self.key(facets, owner, version)
+
+        counts = self.backend.get(key)
+
+        if counts is not None:
+            self.hits += 1
+
+            return counts
+
+        self.misses += 1
+
+        counts = build()
+
+        self.backend.set(key, counts)
+
+        return counts
+
+    def catalog_counts(self, audience: AnyStr, catalog_version: AnyStr, build: Callable[[], Dict]) -> Dict:
+        return self.get_or_build('catalog', audience, catalog_version, build)
+
+    def status_counts(self, profile_key: AnyStr, catalog_version: AnyStr, text_readings_version: AnyStr,
+                      build: Callable[[], Dict]) -> Dict:
+        return self.get_or_build('status', profile_key, f'{catalog_version}:{text_readings_version}', build)
+
+    def clear(self):
+        self.backend.clear()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+text_facet_cache = None
+
+
+def get_text_facet_cache() -> TextFacetCache:
+    global text_facet_cache
+
+    if text_facet_cache is None:
+        text_facet_cache = TextFacetCache.from_settings()
+
+    return text_facet_cache
@@ -0,0 +1,103 @@
+import threading
+
+from typing import AnyStr, Callable, Dict, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from text.cache.backends import PayloadCacheBackend
+
+DEFAULT_PAYLOAD_CACHE = {
+    'BACKEND': 'text.cache.backends.LRUCacheBackend',
+    'OPTIONS': {
+        'max_size': 256,
+    },
+}
+
+
+class TextSectionPayloadCache(object):
+    """
+    Caches the student-independent part of a text section's reading payload (body, questions and translations),
+    keyed by the section pk and its content version.  Bumping the version is what invalidates an entry, so a stale
+    entry in another process simply stops being looked up.
+    """
+    key_prefix = 'text_section_reading_payload'
+
+    def __init__(self, backend: PayloadCacheBackend):
+        self.backend = backend
+
+        self.hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+        self.build_locks = {}
+
+    @classmethod
+    def from_settings(cls) -> 'TextSectionPayloadCache':
+        config = getattr(settings, 'TEXT_READING_PAYLOAD_CACHE', DEFAULT_PAYLOAD_CACHE)
+
+        backend_cls = import_string(config['BACKEND'])
+
+        return cls(backend=backend_cls(**config.get('OPTIONS', {})))
+
+    def key(self, text_section_pk: int, version: int) -> AnyStr:
+        return f'{self.key_prefix}:{text_section_pk}:{version}'
+
+    def get(self, text_section_pk: int, version: int) -> Optional[Dict]:
+        return self.backend.get(self.key(text_section_pk, version))
+
+    def get_or_build(self, text_section_pk: int, version: int, build: Callable[[], Dict]) -> Dict:
+        key = self.key(text_section_pk, version)
+
+        payload = self.backend.get(key)
+
+        if payload is not None:
+            self.hits += 1
+
+            return payload
+
+        # readers of the same section wait on one build rather than each serializing it
+        with self.lock:
+            build_lock = self.build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            payload = self.backend.get(key)
+
+            if payload is None:
+                self.misses += 1
+
+                payload = build()
+
+                self.backend.set(key, payload)
+            else:
+                self.hits += 1
+
+        with self.lock:
+            self.build_locks.pop(key, None)
+
+        return payload
+
+    def invalidate(self, text_section_pk: int, version: int):
+        self.backend.delete(self.key(text_section_pk, version))
+
+    def clear(self):
+        self.backend.clear()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+text_section_payload_cache = None
+
+
+def get_text_section_payload_cache() -> TextSectionPayloadCache:
+    global text_section_payload_cache
+
+    if text_section_payload_cache is None:
+        text_section_payload_cache = TextSectionPayloadCache.from_settings()
+
+    return text_section_payload_cache
@@ -1,20 +1,25 @@
+import asyncio
 import json
-from typing import AnyStr
+import logging
+from typing import AnyStr, Dict, List, Optional, Tuple
 from channels.db import database_sync_to_async
+from channels.exceptions import ChannelFull
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
-from django.utils import timezone
+from django.db import transaction
 from jwt import InvalidTokenError
 
 from question.models import Answer
-from text.models import Text
+from text.models import Text, TextSection
+from text_reading.session import TextReadingSession
 from text_reading.exceptions import (TextReadingException, TextReadingNotAllQuestionsAnswered,
                                      TextReadingQuestionNotInSection)
 from user.models import ReaderUser
 
-from first_time_correct.models import FirstTimeCorrect
 
-from auth.producer_auth import jwt_validation 
+from auth.producer_auth import AuthContext, jwt_auth_context
+
+logger = logging.getLogger('django.consumers')
 
 class Unauthorized(Exception):
     pass
@@ -39,17 +44,35 @@ def get_answer_or_error(answer_id: int, user: ReaderUser):
         raise Unauthorized
 
     try:
-        return Answer.objects.get(pk=answer_id)
+        return Answer.objects.select_related('question').get(pk=answer_id)
     except Answer.DoesNotExist:
         raise TextReadingException(code='invalid_answer', error_msg='This answer does not exist.')
 
 
 class TextReaderConsumer(AsyncJsonWebsocketConsumer):
+    max_batch_commands = 20
+
+    # clients that offer this subprotocol on connect get answer replies with only the answered question
+    delta_subprotocol = 'text_reading.delta'
+
+    # build the next section's payload while the current one is being read
+    prefetch_next_section = False
+
     def __init__(self, *args, **kwargs):
         super(TextReaderConsumer, self).__init__(*args, **kwargs)
 
         self.text = None
         self.text_reading = None
+        self.text_reading_session = None
+
+        self.delta_protocol = False
+
+        self.prefetch_task = None
+        # (section pk, content version, payload)
+        self.prefetched_section = None
+
+        # validated once on connect, see refresh_token() for replacing it mid-connection
+        self.auth = None
 
     def start_reading(self):
         raise NotImplementedError
@@ -74,7 +97,87 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
     def get_current_text_reading_dict(self):
         return self.text_reading.to_text_reading_dict()
 
-    async def answer(self, user: ReaderUser, answer_id: int):
+    @database_sync_to_async
+    def get_current_text_reading_message(self) -> Dict:
+        message = {
+            'command': self.text_reading.current_state.name
+        }
+
+        if self.text_reading.in_progress:
+            text_section = self.text_reading.current_section
+            content_version = text_section.get_content_version()
+
+            if self.prefetched_section and self.prefetched_section[:2] == (text_section.pk, content_version):
+                message['result'] = self.prefetched_section[2]
+
+                self.prefetched_section = None
+            else:
+                message['result'] = self.text_reading.to_text_reading_dict()
+
+            if self.delta_protocol:
+                message['section_version'] = content_version
+        else:
+            message['result'] = self.text_reading.to_text_reading_dict()
+
+        return message
+
+    @database_sync_to_async
+    def build_section_payload(self, text_section: TextSection) -> Tuple[int, int, Dict]:
+        content_version = text_section.get_content_version()
+
+        return text_section.pk, content_version, text_section.to_text_reading_dict(
+            text_reading=self.text_reading, num_of_sections=self.text_reading.number_of_sections)
+
+    def start_prefetch(self):
+        if not self.prefetch_next_section or not self.text_reading_session:
+            return
+
+        next_section = self.text_reading_session.next_section()
+
+        if not next_section or (self.prefetched_section and self.prefetched_section[0] == next_section.pk):
+            return
+
+        self.prefetch_task = asyncio.ensure_future(self.build_section_payload(next_section))
+
+    async def finish_prefetch(self):
+        """
+        Waits for a prefetch still in flight, so it never runs alongside a command that changes the reading.
+        """
+        if not self.prefetch_task:
+            return
+
+        prefetch_task, self.prefetch_task = self.prefetch_task, None
+
+        try:
+            self.prefetched_section = await prefetch_task
+        except Exception as e:
+            logger.exception(f'Failed to prefetch the next section of text reading pk={self.text_reading.pk}: {e}')
+
+            self.prefetched_section = None
+
+    @database_sync_to_async
+    def get_answer_delta_message(self, answer: Answer, section_version: Optional[int]) -> Optional[Dict]:
+        """
+        Only the answered question, if the client's copy of the section is still current.
+        """
+        text_section = self.text_reading.current_section
+        content_version = text_section.get_content_version()
+
+        if section_version != content_version:
+            return None
+
+        return {
+            'command': self.text_reading.current_state.name,
+            'delta': True,
+            'section_version': content_version,
+            'result': {
+                'question': text_section.to_question_text_reading_dict(answer.question_id,
+                                                                       text_reading=self.text_reading,
+                                                                       content_version=content_version)
+            }
+        }
+
+    async def answer(self, user: ReaderUser, answer_id: int, section_version: Optional[int] = None):
         try:
             if not user.id:
                 raise InvalidTokenError
@@ -90,12 +193,15 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
         answer = await get_answer_or_error(answer_id=answer_id, user=user)
 
         try:
-            await database_sync_to_async(self.text_reading.answer)(answer)
+            await database_sync_to_async(self.text_reading_session.answer)(answer)
 
-            await self.send_json({
-                'command': self.text_reading.current_state.name,
-                'result': await self.get_current_text_reading_dict()
-            })
+            message = None
+
+            if self.delta_protocol and section_version is not None:
+                message = await self.get_answer_delta_message(answer, section_version)
+
+            # full payload if the client isn't using deltas or its section is out of date
+            await self.send_json(message or await self.get_current_text_reading_message())
 
         except TextReadingQuestionNotInSection:
             await self.send_json({
@@ -119,12 +225,9 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
             await self.close(code=1000)
 
         try:
-            await database_sync_to_async(self.text_reading.prev)()
+            await database_sync_to_async(self.text_reading_session.prev)()
 
-            await self.send_json({
-                'command': self.text_reading.current_state.name,
-                'result': await self.get_current_text_reading_dict()
-            })
+            await self.send_json(await self.get_current_text_reading_message())
 
         except TextReadingException as e:
             await self.send_json({
@@ -141,12 +244,9 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
             await self.close(code=1000)
 
         try:
-            await database_sync_to_async(self.text_reading.next)()
+            await database_sync_to_async(self.text_reading_session.next)()
 
-            await self.send_json({
-                'command': self.text_reading.current_state.name,
-                'result': await self.get_current_text_reading_dict()
-            })
+            await self.send_json(await self.get_current_text_reading_message())
 
         except TextReadingNotAllQuestionsAnswered as e:
             await self.send_json({
@@ -159,7 +259,125 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
                 'result': {'code': 'unknown', 'error_msg': 'something went wrong'}
             })
 
+    async def refresh_token(self, token: AnyStr):
+        auth = await jwt_auth_context(self.scope, token=token)
+
+        if auth.expired() or auth.user.id != self.auth.user.id:
+            await self.send_json({'error': 'Invalid JWT'})
+            await self.close(code=1000)
+
+            return
+
+        self.auth = auth
+
+        await self.send_json({
+            'command': 'refresh_token',
+            'result': {'exp': self.auth.exp}
+        })
+
+    def reload_text_reading(self):
+        """
+        Reads the reading back from the database, for when a rolled back write left the session ahead of it.
+        """
+        self.text_reading = type(self.text_reading).objects.get(pk=self.text_reading.pk)
+        self.text_reading_session = TextReadingSession(self.text_reading)
+
+    def run_batch(self, commands: List[Dict]) -> List[Dict]:
+        """
+        Runs a batch of answer/next/prev commands in order in one transaction.  Commands run up to the first one
+        that's refused (a TextReadingException, raised before it writes anything), which is reported along with the
+        results of the commands before it, and those commands are kept.  Any other error rolls back the whole batch,
+        reloads the session so it agrees with the database again, and is reported as the batch's only result.
+        """
+        results = []
+
+        cmd = None
+
+        try:
+            with transaction.atomic():
+                for command in commands:
+                    cmd = command.get('command', None) if isinstance(command, dict) else None
+
+                    result = {'command': cmd}
+
+                    try:
+                        if cmd == 'answer':
+                            try:
+                                answer = Answer.objects.select_related('question').get(
+                                    pk=command.get('answer_id', None))
+                            except (Answer.DoesNotExist, ValueError, TypeError):
+                                raise TextReadingException(code='invalid_answer',
+                                                           error_msg='This answer does not exist.')
+
+                            result['answer_id'] = answer.pk
+
+                            self.text_reading_session.answer(answer)
+                        elif cmd == 'next':
+                            self.text_reading_session.next()
+                        elif cmd == 'prev':
+                            self.text_reading_session.prev()
+                        else:
+                            raise TextReadingException(code='invalid_command',
+                                                       error_msg=f'{cmd} is not a valid batch command.')
+
+                    except TextReadingException as e:
+                        result['error'] = {'code': e.code, 'error_msg': e.error_msg}
+
+                        results.append(result)
+
+                        break
+
+                    result['state'] = self.text_reading.current_state.name
+
+                    results.append(result)
+        except Exception:
+            logger.exception(f'Batch command {cmd} failed, rolled back the batch for text reading '
+                             f'pk={self.text_reading.pk}.')
+
+            self.reload_text_reading()
+
+            results = [{'command': cmd, 'error': {'code': 'unknown', 'error_msg': 'something went wrong'}}]
+
+        return results
+
+    async def batch(self, user: ReaderUser, commands: List[Dict]):
+        try:
+            if not user.id:
+                raise InvalidTokenError
+        except InvalidTokenError:
+            await self.send_json({'error': 'Invalid JWT'})
+            await self.close(code=1000)
+
+            return
+
+        if not isinstance(commands, list) or not 0 < len(commands) <= self.max_batch_commands:
+            await self.send_json({
+                'command': 'exception',
+                'result': {'code': 'invalid_batch',
+                           'error_msg': f'A batch must have between 1 and {self.max_batch_commands} commands.'}
+            })
+
+            return
+
+        results = await database_sync_to_async(self.run_batch)(commands)
+
+        # one payload for the state the batch ended in, rather than one per command
+        message = await self.get_current_text_reading_message()
+
+        message.update({
+            'command': 'batch',
+            'result': {
+                'state': message['command'],
+                'commands': results,
+                'text_reading': message['result']
+            }
+        })
+
+        await self.send_json(message)
+
     async def connect(self):
+        self.auth = self.scope.get('auth') or AuthContext(self.scope['user'])
+
         if not self.scope['user'].id:
             await self.accept()
             # ****
@@ -169,7 +387,9 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
             await self.close(code=1000) 
         else:
             try:
-                await self.accept()
+                self.delta_protocol = self.delta_subprotocol in self.scope.get('subprotocols', [])
+
+                await self.accept(subprotocol=self.delta_subprotocol if self.delta_protocol else None)
 
                 text_id = self.scope['url_route']['kwargs']['text_id']
                 user = self.scope['user']
@@ -181,33 +401,52 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
 
                 started, self.text_reading = await self.start_reading()
 
+                self.text_reading_session = await database_sync_to_async(TextReadingSession)(self.text_reading)
+
                 if started:
-                    result = await database_sync_to_async(self.text.to_text_reading_dict)()
+                    message = {
+                        'command': self.text_reading.current_state.name,
+                        'result': await database_sync_to_async(self.text.to_text_reading_dict)()
+                    }
                 else:
-                    result = await self.get_current_text_reading_dict()
+                    message = await self.get_current_text_reading_message()
 
                 await database_sync_to_async(self.text_reading.set_last_read_dt)()
 
-                await self.send_json({
-                    'command': self.text_reading.current_state.name,
-                    'result': result
-                })
+                await self.send_json(message)
+
+                self.start_prefetch()
             except:
                 await self.send_json({
                     "error": "Missing text"
                 })
 
     async def receive_json(self, content, **kwargs):
-        user = await jwt_validation(self.scope)
-
         available_cmds = {
             'next': 1,
             'prev': 1,
             'answer': 1,
             'add_flashcard_phrase': 1,
-            'remove_flashcard_phrase': 1
+            'remove_flashcard_phrase': 1,
+            'batch': 1
         }
 
+        # a refreshed token is validated on its own, so a client whose token just expired can still send one
+        if content.get('command', None) == 'refresh_token':
+            await self.refresh_token(token=content.get('token', None))
+
+            return
+
+        if self.auth.expired():
+            await self.send_json({'error': 'Invalid JWT'})
+            await self.close(code=1000)
+
+            return
+
+        user = self.auth.user
+
+        await self.finish_prefetch()
+
         try:
             cmd = content.get('command', None)
 
@@ -220,7 +459,11 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
                     await self.prev(user=user)
 
                 if cmd == 'answer':
-                    await self.answer(answer_id=content.get('answer_id', None), user=user)
+                    await self.answer(answer_id=content.get('answer_id', None), user=user,
+                                      section_version=content.get('section_version', None))
+
+                if cmd == 'batch':
+                    await self.batch(user=user, commands=content.get('commands', None))
 
                 if cmd == 'add_flashcard_phrase':
                     await self.add_flashcard_phrase(user=user, phrase=content.get('phrase', None),
@@ -236,21 +479,26 @@ class TextReaderConsumer(AsyncJsonWebsocketConsumer):
         except TextReadingException as e:
             await self.send_json({'error': {'code': e.code, 'error_msg': e.error_msg}})
 
+        self.start_prefetch()
 
     async def disconnect(self, code):
-        # check to see if they've started this text once before
-        if not FirstTimeCorrect.objects.filter(student=self.student, text=self.text).exists():
-            # create an entry in the first_time_correct table logging the student, their text, and their score
+        if self.prefetch_task:
+            self.prefetch_task.cancel()
+
+        student = getattr(self, 'student', None)
+
+        if student and self.text_reading:
+            # log the student's score for their first attempt at this text.  the write happens in the
+            # first_time_correct worker and is ignored if they've attempted the text before.
             try:
-                ftc = FirstTimeCorrect(student=self.student, 
-                                       text=self.text, 
-                                       correct_answers=self.text_reading.score["section_scores"],
-                                       total_answers=self.text_reading.score["possible_section_scores"],
-                                       end_dt=timezone.now()
-                                       )
-                ftc.save()
-            except BaseException as be:
-                # TODO: Handle the exception accordingly, should we reply even though the connection is closed?
+                await self.channel_layer.send('first_time_correct', {
+                    'type': 'first_time_correct.record',
+                    'student_pk': student.pk,
+                    'text_pk': self.text.pk,
+                    'correct_answers': self.text_reading.first_answers_correct,
+                    'total_answers': self.text_reading.questions_answered
+                })
+            except (OSError, ChannelFull):
                 pass
 
-        return super().disconnect(code)
\ No newline at end of file
+        return await super().disconnect(code)
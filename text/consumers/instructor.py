@@ -1,11 +1,9 @@
 import logging
+import os
+import socket
+import threading
 
-from typing import Dict, AnyStr, List, Tuple, Union
-
-from django.db import transaction
-
-from lxml.html import fragment_fromstring
-from lxml.html.diff import htmldiff
+from typing import Callable, Dict, AnyStr, List, Optional, Tuple, Union
 
 from channels.db import database_sync_to_async
 
@@ -15,8 +13,9 @@ from text.consumers.base import TextReaderConsumer
 from text_reading.models import InstructorTextReading
 from text.models import TextSection
 
-from text.phrase.models import TextPhraseTranslation
+from text.translations.jobs import TranslationJob, TranslationJobLeaseLost
 from text.translations.models import TextWord
+from text.translations.tokens import body_to_text, tokenize
 
 logger = logging.getLogger('django.consumers')
 
@@ -30,18 +29,87 @@ class InstructorTextReaderConsumer(TextReaderConsumer):
 
 
 class ParseTextSectionForDefinitions(SyncConsumer):
-    def text_section_update_definitions_if_new(self, message: Dict):
+    def translation_jobs_run(self, message: Dict):
+        self.run_translation_jobs()
+
+    def run_translation_jobs(self, owner: AnyStr = None, max_jobs: int = None,
+                             log_msgs: List[AnyStr] = None) -> Tuple[int, List[AnyStr]]:
+        """
+        Leases and runs translation jobs until there are none due (or max_jobs have run).
+        """
+        owner = owner or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+        num_of_jobs = 0
+
+        while max_jobs is None or num_of_jobs < max_jobs:
+            job = TranslationJob.lease(owner)
+
+            if job is None:
+                break
+
+            num_of_jobs += 1
+
+            try:
+                log_msgs = self.run_translation_job(job, log_msgs=log_msgs)
+            except TranslationJobLeaseLost:
+                # another worker has the job now, nothing of this run was written
+                logger.warning(f'Lost the lease on translation job pk={job.pk}, leaving it to its new owner.')
+            except Exception as e:
+                logger.exception(f'Translation job pk={job.pk} failed on attempt {job.attempts}.')
+
+                job.fail(e)
+            else:
+                job.complete()
+
+        return num_of_jobs, log_msgs
+
+    def run_translation_job(self, job: TranslationJob, log_msgs: List[AnyStr] = None) -> List[AnyStr]:
+        """
+        Runs a leased job, recording its progress (which extends the lease) after each batch of lemmas looked up.
+
+        :raises TranslationJobLeaseLost: if the job was leased by another worker in the meantime
+        """
+        message = {'text_section_pk': job.text_section_id}
+
+        def progress(words_done: int, words_total: int):
+            if not job.progress(words_done=words_done, words_total=words_total):
+                raise TranslationJobLeaseLost(f'lost the lease on translation job pk={job.pk}')
+
+        progress(0, len(job.text_section.tokens))
+
+        if job.kind == 'update':
+            self.text_section_update_definitions_if_new(dict(message, old_body=job.old_body), progress=progress)
+        else:
+            _, log_msgs = self.text_section_parse_word_definitions(message, log_msgs=log_msgs, progress=progress)
+
+        return log_msgs
+
+    def text_section_update_definitions_if_new(self, message: Dict,
+                                               progress: Optional[Callable[[int, int], None]] = None):
         text_section = TextSection.objects.get(pk=message['text_section_pk'])
 
-        old_html = fragment_fromstring(message['old_body'], create_parent='div')
-        new_html = fragment_fromstring(text_section.body, create_parent='div')
+        old_words = [token.token for token in tokenize(body_to_text(message['old_body']))]
+
+        if old_words == list(text_section.words):
+            return
 
-        if htmldiff(old_html, new_html):
-            logger.info(f'Found new body in text section pk={message["text_section_pk"]}')
+        logger.info(f'Found new body in text section pk={message["text_section_pk"]}')
 
+        if not TextWord.objects.filter(text_section=text_section).exists():
+            # nothing to carry over
             text_section.update_definitions()
 
+            return
+
+        counts = TextWord.update_from_word_diff(text_section, old_words, progress=progress)
+
+        logger.info(f'Updated words for text section pk={message["text_section_pk"]} ({counts["kept"]} kept, '
+                    f'{counts["renumbered"]} renumbered, {counts["removed"]} removed, {counts["created"]} created)')
+
+        text_section.bump_content_version()
+
     def text_section_parse_word_definitions(self, message: Dict, *args, log_msgs: List[AnyStr] = None,
+                                            progress: Optional[Callable[[int, int], None]] = None,
                                             **kwargs) -> Tuple[TextSection, List[AnyStr]]:
         text_section = TextSection.objects.get(pk=message['text_section_pk'])
 
@@ -58,38 +126,18 @@ class ParseTextSectionForDefinitions(SyncConsumer):
         log_msgs = log(f'Parsing {len(text_section_words)} word definitions for '
                        f'text section pk={message["text_section_pk"]}', log_msgs)
 
-        word_data, word_freqs = text_section.parse_word_definitions()
-
-        for word in word_data:
-            for i, word_instance in enumerate(word_data[word]):
-                with transaction.atomic():
-                    text_word, text_word_created = TextWord.objects.get_or_create(
-                        text_section=text_section,
-                        phrase=word,
-                        instance=i,
-                        **word_instance['grammemes'])
-
-                    if text_word_created:
-                        # populate translations
-                        log_msgs = log(f'created a new word "{text_word.phrase}" '
-                                       f'(pk: {text_word.pk}, instance: {text_word.instance}) '
-                                       f'for section pk {text_section.pk}', log_msgs)
+        word_data, word_freqs = text_section.parse_word_definitions(dictionary_mode=message.get('dictionary_mode'),
+                                                                    progress=progress)
 
-                        text_word.save()
+        for text_word, word_instance in TextWord.bulk_create_from_word_data(text_section, word_data):
+            log_msgs = log(f'created a new word "{text_word.phrase}" '
+                           f'(pk: {text_word.pk}, instance: {text_word.instance}) '
+                           f'for section pk {text_section.pk}', log_msgs)
 
-                        if len(word_instance['translations']):
-                            for j, translation in enumerate(word_instance['translations']):
-                                if translation.phrase:
-                                    text_word_definition = TextPhraseTranslation.create(
-                                        text_phrase=text_word,
-                                        phrase=translation.phrase.text,
-                                        correct_for_context=(True if j == 0 else False))
-
-                                    text_word_definition.save()
-
-                            log_msgs = log(f'created '
-                                           f'{len(word_instance["translations"])} translations '
-                                           f'for text word pk {text_word.pk}', log_msgs)
+            if len(word_instance['translations']):
+                log_msgs = log(f'created '
+                               f'{len(word_instance["translations"])} translations '
+                               f'for text word pk {text_word.pk}', log_msgs)
 
         log_msgs = log(f'Finished parsing translations for text section pk={message["text_section_pk"]}', log_msgs)
 
@@ -97,4 +145,6 @@ class ParseTextSectionForDefinitions(SyncConsumer):
 
         text_section.save()
 
+        text_section.bump_content_version()
+
         return text_section, log_msgs
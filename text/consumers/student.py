@@ -12,6 +12,8 @@ from user.student.models import Student
 
 
 class StudentTextReaderConsumer(TextReaderConsumer):
+    prefetch_next_section = True
+
     def __init__(self, *args, **kwargs):
         super(StudentTextReaderConsumer, self).__init__(*args, **kwargs)
 
@@ -8,6 +8,8 @@ from django.core.management.base import BaseCommand, CommandError
 
 from text.models import TextSection
 from text.consumers.instructor import ParseTextSectionForDefinitions
+from text.translations.dictionary import dictionary_modes
+from text.translations.jobs import TranslationJob
 
 from django.db import models
 from django.utils import timezone
@@ -23,8 +25,17 @@ class Command(BaseCommand):
         parser.add_argument('--text_section', nargs='?', default=None, action='store',
                             help='Creates TextPhrases for one text section.')
 
+        parser.add_argument('--dictionary-mode', choices=dictionary_modes, default=None, dest='dictionary_mode',
+                            help='Where --text_section looks up definitions (defaults to '
+                                 'settings.TRANSLATION_DICTIONARY).')
+
         parser.add_argument('--run-cron', action='store', nargs='?', default=None, type=int,
-                            help='Translate a certain amount of text words based on a given limit')
+                            help='Queue a certain amount of untranslated text words based on a given limit and run '
+                                 'the translation jobs that are due')
+
+        parser.add_argument('--max-jobs', type=int, default=10, dest='max_jobs',
+                            help='The most translation jobs --run-cron runs, so it stays a fallback for the workers '
+                                 'rather than draining their queue.')
 
     def handle(self, *args, **options):
         consumer = ParseTextSectionForDefinitions(scope={})
@@ -33,7 +44,8 @@ class Command(BaseCommand):
             try:
                 text_section = TextSection.objects.get(pk=options['text_section'])
 
-                consumer.text_section_parse_word_definitions({'text_section_pk': text_section.pk})
+                consumer.text_section_parse_word_definitions({'text_section_pk': text_section.pk,
+                                                              'dictionary_mode': options['dictionary_mode']})
             except TextSection.DoesNotExist:
                 raise CommandError(f"Can't find text section pk: {options['text_section']}")
 
@@ -51,32 +63,32 @@ class Command(BaseCommand):
             log_msgs = log(f'Began cron run for collecting translations on '
                            f'{timezone.now().astimezone(pac_tz).isoformat()}.', [])
 
-            total_translated_words = 0
+            total_queued_words = 0
 
             try:
+                # sections with no words that aren't already queued
                 for text_section in TextSection.objects.annotate(
                         num_of_words=models.Count('translated_words')).filter(
-                        num_of_words=0):
-                    if total_translated_words >= options['run_cron']:
+                        num_of_words=0).exclude(translation_jobs__status__in=['pending', 'leased']):
+                    if total_queued_words >= options['run_cron']:
                         break
 
-                    text_section_phrases = list(text_section.words)
-                    text_section_phrases_count = len(text_section_phrases)
+                    text_section_phrases_count = len(text_section.tokens)
 
                     logger.debug(
                         f'text section pk: {text_section.pk} has {text_section_phrases_count} phrases.')
 
-                    if text_section_phrases_count + total_translated_words > options['run_cron']:
+                    if text_section_phrases_count + total_queued_words > options['run_cron']:
                         continue
 
-                    _, log_msgs = consumer.text_section_parse_word_definitions({'text_section_pk': text_section.pk},
-                                                                               log_msgs=log_msgs)
+                    TranslationJob.enqueue(text_section)
 
-                    translated_word_count = text_section.translated_words.count()
+                    total_queued_words += text_section_phrases_count
 
-                    total_translated_words += translated_word_count
+                num_of_jobs, log_msgs = consumer.run_translation_jobs(max_jobs=options['max_jobs'], log_msgs=log_msgs)
 
-                log_msgs = log(f'Finished cron run.  Translated {total_translated_words} words.', log_msgs)
+                log_msgs = log(f'Finished cron run.  Queued {total_queued_words} words and ran {num_of_jobs} '
+                               f'translation jobs.', log_msgs)
 
                 logger.info("\n".join(log_msgs))
             except Exception:
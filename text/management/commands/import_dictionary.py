@@ -0,0 +1,127 @@
+import csv
+import gzip
+import json
+import os
+
+from typing import AnyStr, Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from text.translations.dictionary import DictionaryEntry
+
+
+class Command(BaseCommand):
+    help = 'Imports a bilingual dictionary (lemma -> translations) for looking up definitions without the network.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='A TSV file (lemma, translation[, part of speech] per line, translations '
+                                         'may be separated by ";") or a JSON object of lemma -> list of translations '
+                                         '(strings or {"text": ..., "pos": ...}).  Either may be gzipped.')
+
+        parser.add_argument('--format', choices=['tsv', 'json'], default=None,
+                            help='Defaults to the format of the file extension.')
+
+        parser.add_argument('--from-lang', default='ru', dest='from_lang')
+        parser.add_argument('--to-lang', default='en', dest='to_lang')
+
+        parser.add_argument('--source', default=None, help='Names the import (defaults to the file name).')
+
+        parser.add_argument('--replace', action='store_true', dest='replace',
+                            help='Deletes the entries of an earlier import from the same source first.')
+
+        parser.add_argument('--batch-size', default=1000, type=int, dest='batch_size')
+
+    def open(self, path: AnyStr):
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8')
+
+        return open(path, encoding='utf-8')
+
+    def read_tsv(self, dictionary_file) -> Dict[AnyStr, List[Dict]]:
+        translations = dict()
+
+        for row in csv.reader(dictionary_file, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if not row or not row[0].strip() or row[0].startswith('#') or len(row) < 2:
+                continue
+
+            lemma = row[0].strip()
+            pos = row[2].strip() if len(row) > 2 and row[2].strip() else None
+
+            for text in row[1].split(';'):
+                if text.strip():
+                    translation = {'text': text.strip()}
+
+                    if pos:
+                        translation['pos'] = pos
+
+                    translations.setdefault(lemma, []).append(translation)
+
+        return translations
+
+    def read_json(self, dictionary_file) -> Dict[AnyStr, List[Dict]]:
+        try:
+            dictionary = json.load(dictionary_file)
+        except json.JSONDecodeError as e:
+            raise CommandError(f'Invalid JSON: {e}')
+
+        if not isinstance(dictionary, dict):
+            raise CommandError('Expected a JSON object of lemma -> list of translations.')
+
+        return {
+            lemma: [{'text': translation} if isinstance(translation, str) else translation
+                    for translation in lemma_translations]
+            for lemma, lemma_translations in dictionary.items() if lemma_translations
+        }
+
+    def handle(self, *args, **options):
+        path = options['path']
+
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist.')
+
+        file_format = options['format'] or ('json' if '.json' in os.path.basename(path) else 'tsv')
+        source = options['source'] or os.path.basename(path)
+        batch_size = options['batch_size']
+
+        from_lang, to_lang = options['from_lang'], options['to_lang']
+
+        with self.open(path) as dictionary_file:
+            if file_format == 'json':
+                translations = self.read_json(dictionary_file)
+            else:
+                translations = self.read_tsv(dictionary_file)
+
+        entries = {
+            lemma: json.dumps(DictionaryEntry.to_definitions(lemma, lemma_translations), ensure_ascii=False)
+            for lemma, lemma_translations in translations.items()
+        }
+
+        with transaction.atomic():
+            entries_for_langs = DictionaryEntry.objects.filter(from_lang=from_lang, to_lang=to_lang)
+
+            if options['replace']:
+                entries_for_langs.filter(source=source).delete()
+
+            lemmas = list(entries)
+
+            existing = []
+
+            for i in range(0, len(lemmas), batch_size):
+                existing.extend(entries_for_langs.filter(lemma__in=lemmas[i:i+batch_size]))
+
+            for entry in existing:
+                entry.definitions = entries[entry.lemma]
+                entry.source = source
+
+            DictionaryEntry.objects.bulk_update(existing, ['definitions', 'source'], batch_size=batch_size)
+
+            existing_lemmas = {entry.lemma for entry in existing}
+
+            DictionaryEntry.objects.bulk_create([
+                DictionaryEntry(lemma=lemma, from_lang=from_lang, to_lang=to_lang, definitions=definitions,
+                                source=source)
+                for lemma, definitions in entries.items() if lemma not in existing_lemmas], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {len(entries)} lemmas ({len(existing)} updated) '
+                                             f'from {source}.'))
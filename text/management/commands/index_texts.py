@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from text.models import Text
+from text.search import TextSearchDocument
+
+
+class Command(BaseCommand):
+    help = 'Brings the search index of texts up to date (texts are also indexed as they are saved).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--texts', nargs='+', type=int, default=None,
+                            help='Only these texts (by pk).')
+
+        parser.add_argument('--rebuild', action='store_true', dest='rebuild',
+                            help='Deletes the index of the texts first, e.g. after a change of lemmatization.')
+
+    def handle(self, *args, **options):
+        texts = Text.objects.order_by('pk')
+
+        if options['texts']:
+            texts = texts.filter(pk__in=options['texts'])
+
+        if options['rebuild']:
+            TextSearchDocument.objects.filter(text__in=texts).delete()
+
+        totals = {'indexed': 0, 'unchanged': 0}
+
+        for text in texts.iterator():
+            counts = TextSearchDocument.index_text(text)
+
+            totals['indexed'] += counts['indexed']
+            totals['unchanged'] += counts['unchanged']
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {totals["indexed"]} parts of texts '
+                                             f'({totals["unchanged"]} unchanged).'))
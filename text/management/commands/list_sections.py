@@ -39,9 +39,9 @@ class Command(BaseCommand):
                 translations_count=Count('translated_words__translations')).filter(translations_count__gt=0)
 
         for section in queryset.filter():
-            words = list(section.words)
+            num_of_words = len(section.tokens)
             num_of_translated_words = section.translated_words.count()
 
             self.stdout.write(
-                self.style.SUCCESS(table_str.format(section.pk, section.text.pk, len(words), num_of_translated_words))
+                self.style.SUCCESS(table_str.format(section.pk, section.text.pk, num_of_words, num_of_translated_words))
             )
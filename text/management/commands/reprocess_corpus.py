@@ -0,0 +1,129 @@
+import os
+import tempfile
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+
+from text.models import TextSection
+from text.translations.corpus import CorpusWriter, analyse_body, init_worker
+from text.translations.dictionary import dictionary_modes
+from text.yandex.api.lookup import AsyncYandexDefinitionLookup
+
+
+class Command(BaseCommand):
+    help = 'Re-tokenizes and re-lemmatizes every text section with a pool of worker processes, creating the words ' \
+           'of sections that have none.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', nargs='+', type=int, default=None,
+                            help='Only these text sections (by pk).')
+
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Worker processes for tokenizing and parsing.')
+
+        parser.add_argument('--budget', type=int, default=None,
+                            help='Stop before processing more than this many words.')
+
+        parser.add_argument('--resume', action='store_true', dest='resume',
+                            help='Skip the sections finished by an earlier run (see --checkpoint).')
+
+        parser.add_argument('--checkpoint', default=os.path.join(tempfile.gettempdir(),
+                                                                 'ereadingtool_reprocess_corpus.txt'),
+                            help='A file of the pks of finished sections.')
+
+        parser.add_argument('--dictionary-mode', choices=dictionary_modes, default=None, dest='dictionary_mode',
+                            help='Where definitions of new words are looked up (defaults to '
+                                 'settings.TRANSLATION_DICTIONARY).')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+
+        finished = set()
+
+        if options['resume'] and os.path.exists(options['checkpoint']):
+            with open(options['checkpoint']) as checkpoint_file:
+                finished = {int(line) for line in checkpoint_file if line.strip()}
+
+        queryset = TextSection.objects.order_by('pk')
+
+        if options['sections']:
+            queryset = queryset.filter(pk__in=options['sections'])
+
+        text_section_pks = [pk for pk in queryset.values_list('pk', flat=True) if pk not in finished]
+
+        num_of_sections = len(text_section_pks)
+
+        self.stdout.write(f'Reprocessing {num_of_sections} text sections ({len(finished)} already finished) with '
+                          f'{options["workers"]} workers.')
+
+        remaining_pks = iter(text_section_pks)
+
+        totals = {'sections': 0, 'words': 0, 'created': 0, 'relemmatized': 0}
+
+        over_budget = False
+
+        start = time.time()
+
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=init_worker) as executor, \
+                AsyncYandexDefinitionLookup() as definitions_lookup, \
+                open(options['checkpoint'], 'a' if options['resume'] else 'w') as checkpoint_file:
+            writer = CorpusWriter(definitions_lookup=definitions_lookup, dictionary_mode=options['dictionary_mode'])
+
+            bodies = dict()
+            pending = set()
+
+            def submit():
+                text_section_pk = next(remaining_pks, None)
+
+                if text_section_pk is not None:
+                    bodies[text_section_pk] = TextSection.objects.values_list('body', flat=True).get(
+                        pk=text_section_pk)
+
+                    pending.add(executor.submit(analyse_body, text_section_pk, bodies[text_section_pk]))
+
+            # a bounded window of sections in flight.  workers only get bodies, all reads and writes stay here
+            for _ in range(options['workers'] * 2):
+                submit()
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    text_section_pk, tokens, sentences, parsed_words = future.result()
+
+                    body = bodies.pop(text_section_pk)
+
+                    if options['budget'] is not None and totals['words'] + len(tokens) > options['budget']:
+                        over_budget = True
+
+                        continue
+
+                    counts = writer.write(TextSection.objects.get(pk=text_section_pk), body, tokens, sentences,
+                                          parsed_words)
+
+                    checkpoint_file.write(f'{text_section_pk}\n')
+                    checkpoint_file.flush()
+
+                    totals['sections'] += 1
+                    totals['words'] += len(tokens)
+                    totals['created'] += counts['created']
+                    totals['relemmatized'] += counts['relemmatized']
+
+                    self.stdout.write(f'[{totals["sections"]}/{num_of_sections}] text section pk={text_section_pk}: '
+                                      f'{len(tokens)} words, {counts["created"]} created, '
+                                      f'{counts["relemmatized"]} re-lemmatized '
+                                      f'({totals["sections"] / max(time.time() - start, 0.001):.1f} sections/s)')
+
+                    if not over_budget:
+                        submit()
+
+        msg = f'Reprocessed {totals["sections"]} text sections ({totals["words"]} words, {totals["created"]} ' \
+              f'created, {totals["relemmatized"]} re-lemmatized) in {time.time() - start:.1f}s.'
+
+        if over_budget:
+            msg += '  Stopped at the word budget, run again with --resume to continue.'
+
+        self.stdout.write(self.style.SUCCESS(msg))
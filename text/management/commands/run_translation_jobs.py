@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from text.consumers.instructor import ParseTextSectionForDefinitions
+
+
+class Command(BaseCommand):
+    help = 'Runs queued translation jobs.  Any number of these workers can run at once.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', dest='once',
+                            help='Exit once there are no jobs due rather than polling for more.')
+
+        parser.add_argument('--poll', action='store', default=10, type=float,
+                            help='Seconds to wait between checks for jobs.')
+
+        parser.add_argument('--owner', action='store', default=None,
+                            help='Name this worker leases jobs under (defaults to host:pid:thread).')
+
+    def handle(self, *args, **options):
+        consumer = ParseTextSectionForDefinitions(scope={})
+
+        while True:
+            num_of_jobs, _ = consumer.run_translation_jobs(owner=options['owner'])
+
+            if num_of_jobs:
+                self.stdout.write(self.style.SUCCESS(f'Ran {num_of_jobs} translation jobs.'))
+
+            if options['once']:
+                break
+
+            time.sleep(options['poll'])
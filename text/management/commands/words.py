@@ -1,14 +1,20 @@
 from django.core.management.base import BaseCommand, CommandError
 from text.models import TextSection
+from text.translations.morphology import get_morphology_service
 
 
 class Command(BaseCommand):
-    help = 'Returns the number of words within a text section.'
+    help = 'Returns the number of words (and optionally distinct lemmas) within a text section.'
 
     def add_arguments(self, parser):
         parser.add_argument('text_section_id', nargs='+', type=int)
 
+        parser.add_argument('--lemmas', action='store_true', dest='lemmas',
+                            help='Also count the distinct lemmas of the words.')
+
     def handle(self, *args, **options):
+        morphology = get_morphology_service()
+
         for text_section_id in options['text_section_id']:
             try:
                 text_section = TextSection.objects.get(pk=text_section_id)
@@ -16,5 +22,14 @@ class Command(BaseCommand):
             except TextSection.DoesNotExist:
                 raise CommandError(f'Text section pk={text_section_id} does not exist.')
 
-            self.stdout.write(self.style.SUCCESS(f'Text section pk='
-                                                 f'{text_section_id} has {len(words)} words.'))
+            msg = f'Text section pk={text_section_id} has {len(words)} words'
+
+            if options['lemmas']:
+                lemmas = {grammemes['lemma'] for grammemes in morphology.parse_many(words).values()}
+
+                msg += f' and {len(lemmas)} lemmas'
+
+            self.stdout.write(self.style.SUCCESS(msg + '.'))
+
+        if options['lemmas']:
+            self.stdout.write(f'Morphology cache: {morphology.stats}')
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text', '0010_auto_20210420_2047'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='textsection',
+            name='content_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
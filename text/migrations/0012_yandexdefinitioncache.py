@@ -0,0 +1,28 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text', '0011_textsection_content_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YandexDefinitionCache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lemma', models.CharField(max_length=255)),
+                ('from_lang', models.CharField(max_length=8)),
+                ('to_lang', models.CharField(max_length=8)),
+                ('definitions', models.TextField(null=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('modified_dt', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('lemma', 'from_lang', 'to_lang')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text', '0012_yandexdefinitioncache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextSectionTokens',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body_hash', models.CharField(max_length=40)),
+                ('num_of_tokens', models.IntegerField(default=0)),
+                ('tokens', models.TextField()),
+                ('text_section', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='token_index', to='text.TextSection')),
+            ],
+        ),
+    ]
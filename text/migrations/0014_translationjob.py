@@ -0,0 +1,39 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text', '0013_textsectiontokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('parse', 'Parse all words'), ('update', 'Update words after an edit')], default='parse', max_length=8)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('leased', 'Leased'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=8)),
+                ('old_body', models.TextField(blank=True, null=True)),
+                ('priority', models.IntegerField(default=0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('lease_owner', models.CharField(blank=True, max_length=255, null=True)),
+                ('lease_expires_dt', models.DateTimeField(blank=True, null=True)),
+                ('run_after_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('words_total', models.IntegerField(default=0)),
+                ('words_done', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_dt', models.DateTimeField(auto_now_add=True)),
+                ('modified_dt', models.DateTimeField(auto_now=True)),
+                ('text_section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='translation_jobs', to='text.TextSection')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='translationjob',
+            index=models.Index(fields=['status', 'run_after_dt'], name='text_transl_status_869cdb_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text', '0014_translationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DictionaryEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lemma', models.CharField(max_length=255)),
+                ('from_lang', models.CharField(max_length=8)),
+                ('to_lang', models.CharField(max_length=8)),
+                ('definitions', models.TextField()),
+                ('source', models.CharField(blank=True, max_length=255)),
+                ('modified_dt', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Dictionary Entries',
+                'unique_together': {('lemma', 'from_lang', 'to_lang')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+def invalidate_token_indexes(apps, schema_editor):
+    TextSectionTokens = apps.get_model('text', 'TextSectionTokens')
+
+    # stored before sentences were, so they're re-tokenized (with their sentences) when next read
+    TextSectionTokens.objects.update(body_hash='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text', '0015_dictionaryentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='textphrase',
+            name='sentence_index',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='textsectiontokens',
+            name='sentences',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.RunPython(invalidate_token_indexes, migrations.RunPython.noop),
+    ]
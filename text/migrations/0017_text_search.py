@@ -0,0 +1,38 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text', '0016_sentence_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextSearchDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=40)),
+                ('length', models.IntegerField(default=0)),
+                ('text', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='text.Text')),
+                ('text_section', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='text.TextSection')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TextSearchPosting',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lemma', models.CharField(max_length=128)),
+                ('count', models.IntegerField(default=0)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='text.TextSearchDocument')),
+                ('text', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='text.Text')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='textsearchposting',
+            index=models.Index(fields=['lemma', 'text'], name='text_textse_lemma_c62f45_idx'),
+        ),
+    ]
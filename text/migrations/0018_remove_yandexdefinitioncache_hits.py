@@ -0,0 +1,17 @@
+# Generated by Django 2.2.20 on 2026-10-18 13:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text', '0017_text_search'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='yandexdefinitioncache',
+            name='hits',
+        ),
+    ]
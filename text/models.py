@@ -1,9 +1,12 @@
-from typing import Optional, List, Dict
+from typing import AnyStr, Optional, List, Dict, Tuple
 
 from django.db import models
+from django.db.models import F
 from mixins.model import Timestamped, WriteLockable, WriteLocked
 from tag.models import Taggable
 
+from text.cache.payload import get_text_section_payload_cache
+from text.search import TextSearchDocument
 from text.translations.mixins import TextSectionDefinitionsMixin
 from text.managers import TextWithStudentReadingsManager, TextWithInstructorReadingsManager
 
@@ -137,8 +140,7 @@ class Text(Taggable, WriteLockable, Timestamped, models.Model):
             text_section.save()
 
             if section_params['instance']:
-                text_section.update_definitions_if_new(
-                    old_body=section_params['text_section_form'].cleaned_data['body'])
+                text_section.update_definitions_if_new(old_body=section_params['old_body'])
 
             # Need to freshen up the answers. Delete them all and re-add them.
             text_section.questions.all().delete()
@@ -157,6 +159,10 @@ class Text(Taggable, WriteLockable, Timestamped, models.Model):
                     answer.order = j
                     answer.save()
 
+            text_section.bump_content_version()
+
+        text.update_search_index()
+
         return text
 
     @classmethod
@@ -185,17 +191,60 @@ class Text(Taggable, WriteLockable, Timestamped, models.Model):
                     answer.order = j
                     answer.save()
 
+        text.update_search_index()
+
         return text
 
-    def to_summary_dict(self) -> Dict:
+    def update_search_index(self) -> Dict:
+        return TextSearchDocument.index_text(self)
+
+    def to_summary_dict(self, section_counts: Optional[Tuple[int, int]] = None) -> Dict:
+        """
+        :param section_counts: the number of the text's sections and of those processed, if they've been counted
+                               already (see to_summary_dicts())
+        """
         text_dict = self.to_dict_meta()
 
         text_dict['rating'] = self.rating
-        text_dict['text_section_count'] = self.sections.count()
-        text_dict['translation_service_processed'] = all([ts.translation_service_processed == 1 for ts in self.sections.all()])
+
+        if section_counts is None:
+            text_dict['text_section_count'] = self.sections.count()
+            text_dict['translation_service_processed'] = all([ts.translation_service_processed == 1 for ts in self.sections.all()])
+        else:
+            text_dict['text_section_count'] = section_counts[0]
+            text_dict['translation_service_processed'] = section_counts[0] == section_counts[1]
 
         return text_dict
 
+    @classmethod
+    def catalog_version(cls) -> AnyStr:
+        """
+        Changes whenever a text (or one of its sections) is added, changed or deleted, from two aggregate queries.
+        """
+        texts = cls.objects.aggregate(num_of_texts=models.Count('pk'), modified_dt=models.Max('modified_dt'))
+        sections = TextSection.objects.aggregate(num_of_sections=models.Count('pk'),
+                                                 modified_dt=models.Max('modified_dt'))
+
+        return f'{texts["num_of_texts"]}:{texts["modified_dt"]}:{sections["num_of_sections"]}:' \
+               f'{sections["modified_dt"]}'
+
+    @classmethod
+    def to_summary_dicts(cls, texts: models.QuerySet) -> List[Dict]:
+        """
+        to_summary_dict() for many texts, with their difficulties, authors, tags and section counts read in a fixed
+        number of queries.
+        """
+        texts = list(texts.select_related('difficulty', 'created_by__user').prefetch_related('tags'))
+
+        section_counts = {
+            section_count['text']: (section_count['num_of_sections'], section_count['num_of_sections_processed'])
+            for section_count in TextSection.objects.filter(text__in=texts).order_by().values('text').annotate(
+                num_of_sections=models.Count('pk'),
+                num_of_sections_processed=models.Count('pk', filter=models.Q(translation_service_processed=1)))
+        }
+
+        return [text.to_summary_dict(section_counts=section_counts.get(text.pk, (0, 0))) for text in texts]
+
     def to_student_summary_dict(self) -> Dict:
         text_summary_dict = self.to_summary_dict()
 
@@ -209,13 +258,25 @@ class Text(Taggable, WriteLockable, Timestamped, models.Model):
         return text_summary_dict
 
     def to_text_reading_dict(self) -> Dict:
-        text_dict = self.to_dict()
+        text_sections = self.sections.all()
 
-        del text_dict['words']
-        del text_dict['write_locker']
-
-        text_dict['text_sections'] = list(map(lambda section: section.to_text_reading_dict(), self.sections.all()))
-        return text_dict
+        return {
+            'id': self.pk,
+            'title': self.title,
+            'introduction': self.introduction,
+            'conclusion': self.conclusion,
+            'author': self.author,
+            'source': self.source,
+            'difficulty': self.difficulty.slug,
+            'created_by': str(self.created_by),
+            'last_modified_by': str(self.last_modified_by) if self.last_modified_by else None,
+            'tags': [tag.name for tag in self.tags.all()],
+            'modified_dt': self.modified_dt.isoformat(),
+            'created_dt': self.created_dt.isoformat(),
+            'text_sections': [text_section.to_text_reading_dict() for text_section in text_sections],
+            'translation_service_processed': all([text_section.translation_service_processed == 1
+                                                  for text_section in text_sections]),
+        }
 
     def to_dict(self, text_sections: Optional[List] = None) -> Dict:
         return {
@@ -269,6 +330,9 @@ class TextSection(TextSectionDefinitionsMixin, Timestamped, models.Model):
     body = models.TextField()
     translation_service_processed = models.IntegerField(default=0)
 
+    # bumped whenever the body, questions or translations change so cached reading payloads are rebuilt
+    content_version = models.IntegerField(default=0)
+
     @classmethod
     def to_json_schema(cls) -> Dict:
         schema = {
@@ -300,11 +364,21 @@ class TextSection(TextSectionDefinitionsMixin, Timestamped, models.Model):
 
         return schema
 
-    def to_text_reading_dict(self, text_reading=None, *args, **kwargs) -> Dict:
-        questions_text_reading_dicts = [question.to_text_reading_dict(text_reading)
-                                        for question in self.questions.all()]
+    @classmethod
+    def bump_content_versions(cls, text_section_pks: List[int]):
+        cls.objects.filter(pk__in=text_section_pks).update(content_version=F('content_version') + 1)
+
+    def bump_content_version(self):
+        self.bump_content_versions([self.pk])
 
-        questions_count = len((list(questions_text_reading_dicts)))
+        self.refresh_from_db(fields=['content_version'])
+
+    def to_base_text_reading_dict(self) -> Dict:
+        """
+        The student-independent part of the text reading dict.
+        """
+        questions = [question.to_base_text_reading_dict() for question in
+                     self.questions.prefetch_related('answers').all()]
 
         phrases = dict()
 
@@ -319,16 +393,51 @@ class TextSection(TextSectionDefinitionsMixin, Timestamped, models.Model):
 
             phrases[text_phrase.phrase].append(text_word_dict)
 
-        text_section_dict = {
+        return {
             'order': self.order,
             'created_dt': self.created_dt.isoformat(),
             'modified_dt': self.modified_dt.isoformat(),
-            'question_count': questions_count,
-            'questions': questions_text_reading_dicts,
+            'question_count': len(questions),
+            'questions': questions,
             'body': self.body,
             'translations': phrases
         }
 
+    def get_content_version(self) -> int:
+        # the version is read fresh so edits made by other processes are picked up
+        return TextSection.objects.filter(pk=self.pk).values_list('content_version', flat=True).first()
+
+    def get_base_text_reading_dict(self, content_version: Optional[int] = None) -> Dict:
+        if content_version is None:
+            content_version = self.get_content_version()
+
+        return get_text_section_payload_cache().get_or_build(self.pk, content_version, self.to_base_text_reading_dict)
+
+    def to_question_text_reading_dict(self, question_pk: int, text_reading=None,
+                                      content_version: Optional[int] = None) -> Optional[Dict]:
+        """
+        A single question of the text reading dict, e.g. after it's been answered.
+        """
+        answer_state = text_reading.answer_state(self.pk) if text_reading else None
+
+        for question_dict in self.get_base_text_reading_dict(content_version)['questions']:
+            if question_dict['id'] == question_pk:
+                return self.questions.model.personalize_text_reading_dict(question_dict, text_reading=text_reading,
+                                                                          answer_state=answer_state)
+
+        return None
+
+    def to_text_reading_dict(self, text_reading=None, *args, **kwargs) -> Dict:
+        text_section_dict = dict(self.get_base_text_reading_dict())
+
+        # one query for the reader's answers to the whole section rather than one per answer option
+        answer_state = text_reading.answer_state(self.pk) if text_reading else None
+
+        text_section_dict['questions'] = [
+            self.questions.model.personalize_text_reading_dict(question_dict, text_reading=text_reading,
+                                                               answer_state=answer_state)
+            for question_dict in text_section_dict['questions']]
+
         text_section_dict.update(**kwargs)
 
         return text_section_dict
@@ -1,6 +1,6 @@
 import re
 
-from typing import Dict, AnyStr, Optional, Union
+from typing import Dict, AnyStr, Iterable, List, Optional, Union
 
 from django.db import models
 
@@ -8,6 +8,7 @@ from django.urls import reverse
 
 from text.models import TextSection
 from text.translations.mixins import TextPhraseGrammemes
+from text.translations.tokens import TextSectionTokens
 
 
 class TextPhrase(TextPhraseGrammemes, models.Model):
@@ -19,16 +20,48 @@ class TextPhrase(TextPhraseGrammemes, models.Model):
 
     phrase = models.CharField(max_length=128, blank=False)
 
+    # which of the section's sentences (TextSection.sentences) the phrase is in
+    sentence_index = models.IntegerField(null=True, blank=True)
+
     @property
     def sentence(self) -> Union[AnyStr, None]:
-        matches = re.search(r'[^\w\s,—\-]?\s*(?P<sentence>[\w\s,]*' + self.phrase + r'[\w\s,]*[^\w\s,—\-]?)',
-                            self.text_section.body_text, re.DOTALL | re.MULTILINE)
+        if '_sentence' not in self.__dict__:
+            self._sentence = self.find_sentence(self.text_section.sentences)
+
+        return self._sentence
+
+    def find_sentence(self, sentences: List[AnyStr]) -> Union[AnyStr, None]:
+        sentence_index = self.sentence_index
+
+        if sentence_index is None:
+            # phrases made before their sentences were indexed
+            sentence_index = self.text_section.word_sentences.get((self.phrase, self.instance))
+
+        if sentence_index is not None and sentence_index < len(sentences):
+            return sentences[sentence_index]
+
+        matches = re.search(r'[^\w\s,—\-]?\s*(?P<sentence>[\w\s,]*' + re.escape(self.phrase) +
+                            r'[\w\s,]*[^\w\s,—\-]?)', self.text_section.body_text, re.DOTALL | re.MULTILINE)
 
         try:
             return matches.group('sentence')
-        except (TypeError, IndexError):
+        except (AttributeError, IndexError):
             return None
 
+    @classmethod
+    def prefetch_sentences(cls, text_phrases: Iterable['TextPhrase']):
+        """
+        Reads the sentences of many phrases (e.g. a student's flashcards) with one query for all of their sections.
+        """
+        text_phrases = [text_phrase for text_phrase in text_phrases if text_phrase is not None]
+
+        section_sentences = TextSectionTokens.sentences_for_sections(
+            {text_phrase.text_section_id: text_phrase.text_section for text_phrase in text_phrases}.values())
+
+        for text_phrase in text_phrases:
+            if text_phrase.text_section_id in section_sentences:
+                text_phrase._sentence = text_phrase.find_sentence(section_sentences[text_phrase.text_section_id])
+
     @property
     def child_instance(self):
         try:
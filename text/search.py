@@ -0,0 +1,189 @@
+import hashlib
+import math
+
+from collections import Counter
+from typing import AnyStr, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import models, transaction
+
+from text.translations.morphology import get_morphology_service
+from text.translations.tokens import tokenize
+
+DEFAULT_TEXT_SEARCH = {
+    # BM25's term frequency saturation and document length normalization
+    'K1': 1.2,
+    'B': 0.75,
+    # occurrences in a text's title or introduction count this many times over
+    'META_WEIGHT': 2,
+}
+
+
+class TextSearchDocument(models.Model):
+    """
+    An indexed part of a text, either one of its sections or (without a section) its title and introduction.  A part
+    is only re-indexed when the hash of its content changes.
+    """
+    text = models.ForeignKey('text.Text', related_name='search_documents', on_delete=models.CASCADE)
+    text_section = models.OneToOneField('text.TextSection', null=True, related_name='search_document',
+                                        on_delete=models.CASCADE)
+
+    content_hash = models.CharField(max_length=40)
+
+    # the number of words in the part (weighted as its postings are)
+    length = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'search document for text pk={self.text_id} section pk={self.text_section_id}'
+
+    @classmethod
+    def config(cls) -> Dict:
+        return dict(DEFAULT_TEXT_SEARCH, **getattr(settings, 'TEXT_SEARCH', {}))
+
+    @classmethod
+    def lemma_counts(cls, words: List[AnyStr], weight: int = 1) -> Counter:
+        morphology = get_morphology_service()
+
+        lemma_counts = Counter()
+
+        for word in words:
+            lemma_counts[morphology.lemma(word).lower()] += weight
+
+        return lemma_counts
+
+    @classmethod
+    def index_text(cls, text) -> Dict[AnyStr, int]:
+        """
+        Brings the index of a text up to date, re-indexing only its parts whose content changed (the parts of deleted
+        sections are deleted with them).
+
+        :return: counts of the parts indexed and left as they were
+        """
+        # words are only tokenized for the parts whose content changed
+        parts = [(None, text.title + '\n' + text.introduction, lambda: [token.token for token in tokenize(
+            text.title + ' ' + text.introduction)], cls.config()['META_WEIGHT'])]
+
+        for text_section in text.sections.all():
+            parts.append((text_section, text_section.body, lambda text_section=text_section: list(text_section.words),
+                          1))
+
+        documents = {document.text_section_id: document for document in cls.objects.filter(text=text)}
+
+        counts = {'indexed': 0, 'unchanged': 0}
+
+        for text_section, content, words, weight in parts:
+            content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+            document = documents.get(text_section.pk if text_section else None)
+
+            if document and document.content_hash == content_hash:
+                counts['unchanged'] += 1
+
+                continue
+
+            lemma_counts = cls.lemma_counts(words(), weight=weight)
+
+            with transaction.atomic():
+                if document:
+                    document.postings.all().delete()
+                else:
+                    document = cls(text=text, text_section=text_section)
+
+                document.content_hash = content_hash
+                document.length = sum(lemma_counts.values())
+
+                document.save()
+
+                TextSearchPosting.objects.bulk_create([
+                    TextSearchPosting(document=document, text=text, lemma=lemma, count=count)
+                    for lemma, count in lemma_counts.items()], batch_size=500)
+
+            counts['indexed'] += 1
+
+        return counts
+
+    @classmethod
+    def query_lemmas(cls, query: AnyStr) -> List[AnyStr]:
+        return list(cls.lemma_counts([token.token for token in tokenize(query)]))
+
+    @classmethod
+    def search(cls, query: AnyStr, texts: Optional[models.QuerySet] = None) -> List[Tuple[int, float]]:
+        """
+        Ranks the texts containing any of the query's words (in any form, since the words and the index are both
+        lemmatized) with BM25.
+
+        :param texts: only rank these texts, e.g. the texts matching the catalog's other filters
+        :return: (text pk, score) for each matching text, best first
+        """
+        lemmas = cls.query_lemmas(query)
+
+        if not lemmas:
+            return []
+
+        config = cls.config()
+
+        postings = TextSearchPosting.objects.filter(lemma__in=lemmas)
+
+        if texts is not None:
+            postings = postings.filter(text__in=texts.order_by().values('pk'))
+
+        term_counts = dict()
+
+        for text_pk, lemma, count in postings.order_by().values('text', 'lemma').annotate(
+                total=models.Sum('count')).values_list('text', 'lemma', 'total'):
+            term_counts.setdefault(text_pk, dict())[lemma] = count
+
+        if not term_counts:
+            return []
+
+        # document frequencies and lengths are of the whole corpus, not just of the texts filtered for
+        corpus = cls.objects.aggregate(num_of_texts=models.Count('text', distinct=True),
+                                       length=models.Sum('length'))
+
+        document_frequencies = dict(TextSearchPosting.objects.filter(lemma__in=lemmas).order_by().values(
+            'lemma').annotate(num_of_texts=models.Count('text', distinct=True)).values_list('lemma', 'num_of_texts'))
+
+        text_lengths = dict(cls.objects.filter(text__in=list(term_counts)).order_by().values('text').annotate(
+            length=models.Sum('length')).values_list('text', 'length'))
+
+        num_of_texts = corpus['num_of_texts']
+        average_length = (corpus['length'] or 0) / max(num_of_texts, 1)
+
+        scores = []
+
+        for text_pk, text_term_counts in term_counts.items():
+            length_norm = 1 - config['B'] + config['B'] * (text_lengths.get(text_pk, 0) / (average_length or 1))
+
+            score = 0
+
+            for lemma, count in text_term_counts.items():
+                document_frequency = document_frequencies[lemma]
+
+                idf = math.log(1 + (num_of_texts - document_frequency + 0.5) / (document_frequency + 0.5))
+
+                score += idf * count * (config['K1'] + 1) / (count + config['K1'] * length_norm)
+
+            scores.append((text_pk, score))
+
+        return sorted(scores, key=lambda text_score: (-text_score[1], -text_score[0]))
+
+
+class TextSearchPosting(models.Model):
+    """
+    How many times a lemma occurs in an indexed part of a text.
+    """
+    class Meta:
+        indexes = [
+            models.Index(fields=['lemma', 'text']),
+        ]
+
+    document = models.ForeignKey(TextSearchDocument, related_name='postings', on_delete=models.CASCADE)
+
+    # denormalized from the document so a lemma's texts are read from the index alone
+    text = models.ForeignKey('text.Text', related_name='+', on_delete=models.CASCADE)
+
+    lemma = models.CharField(max_length=128)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.lemma} x{self.count} in text pk={self.text_id}'
@@ -1,14 +1,30 @@
+import asyncio
 import collections
+import fcntl
 import json
 import os
 import gzip
+import io
+import tempfile
+import threading
+import time
 
-from typing import Dict, Optional, List, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import AnyStr, Dict, Optional, List, Tuple
+from urllib.parse import parse_qs, urlparse
 
 import channels.layers
+import jwt
+from jwt import InvalidTokenError
 from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError, connection
 from django.test import TestCase
-from unittest import skipIf
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from unittest import mock, skipIf
 from django.test.client import Client
 from statemachine import State
 
@@ -16,17 +32,32 @@ from flashcards.student.session.models import StudentFlashcardSession
 
 from ereadingtool.test.data import TestData
 from ereadingtool.test.user import TestUser
+from auth.producer_auth import AuthContext, get_user_for_path, jwt_auth_context
 from ereadingtool.urls import reverse_lazy
 from question.models import Answer
 from text.consumers.instructor import ParseTextSectionForDefinitions
-from text.models import Text, TextSection
+from text.consumers.student import StudentTextReaderConsumer
+from text.cache.facets import get_text_facet_cache
+from text.cache.payload import get_text_section_payload_cache
+from text.models import Text, TextRating, TextSection
 from tag.models import Tag
 from text.phrase.models import TextPhrase, TextPhraseTranslation
+from text.search import TextSearchDocument
+from text.views.api.text import TextAPIView
+from text.translations.dictionary import DictionaryEntry
+from text.translations.jobs import TranslationJob
 from text.translations.models import TextWord
+from text.translations.morphology import MorphologyService
+from text.translations.tokens import TextSectionTokens, Token, tokenize
+from text.yandex.api.lookup import AsyncYandexDefinitionLookup
+from text.yandex.exceptions import YandexException, YandexInvalidAPIKeyException
+from text.yandex.models import YandexDefinitionCache
+from text.yandex.ratelimit import FileLockTokenBucket, LocalTokenBucket, RedisTokenBucket, take_tokens
 from text.yandex.api.definition import (YandexDefinition, YandexDefinitions, YandexDefinitionAPI, YandexTranslations,
                                         YandexTranslation, YandexPhrase)
 from text_reading.base import TextReadingNotAllQuestionsAnswered
 from text_reading.models import StudentTextReading
+from text_reading.session import TextReadingSession
 from user.student.models import Student
 
 
@@ -59,6 +90,263 @@ class TestText(TestData, TestUser, TestCase):
 
                 self.assertIsInstance(yandex_translation.phrase, YandexPhrase)
 
+    def test_definition_cache(self):
+        yandex_definition_api = YandexDefinitionAPI()
+
+        resp = json.dumps({'head': {}, 'def': [{'text': 'заявление', 'pos': 'noun',
+                                                'tr': [{'text': 'statement', 'pos': 'noun'}]}]})
+
+        YandexDefinitionCache.reset_stats()
+
+        with mock.patch.object(YandexDefinitionAPI, 'request', side_effect=[json.loads(resp), {'head': {}, 'def': []}]) as request:
+            for _ in range(0, 2):
+                definitions = yandex_definition_api.lookup('заявление')
+
+                self.assertEquals(definitions[0].translations[0].phrase.text, 'statement')
+
+            # no definitions are cached too
+            for _ in range(0, 2):
+                self.assertFalse(yandex_definition_api.lookup('абв'))
+
+            self.assertEquals(request.call_count, 2)
+
+        self.assertDictEqual(YandexDefinitionCache.stats, {'hits': 2, 'misses': 2})
+
+        # a hit only reads
+        with self.assertNumQueries(1):
+            self.assertTrue(YandexDefinitionCache.get(lemma='заявление', from_lang='ru', to_lang='en'))
+
+        # expired entries are looked up again
+        YandexDefinitionCache.objects.filter(lemma='заявление').update(
+            modified_dt=timezone.now() - YandexDefinitionCache.ttl() - timezone.timedelta(seconds=1))
+
+        with mock.patch.object(YandexDefinitionAPI, 'request', return_value=json.loads(resp)) as request:
+            yandex_definition_api.lookup('заявление')
+
+            self.assertEquals(request.call_count, 1)
+
+    def test_rate_limiter(self):
+        state, wait = take_tokens(None, now=100.0, rate=0.5, burst=2)
+
+        self.assertEquals((state['tokens'], wait), (1, 0))
+
+        state, wait = take_tokens(state, now=100.0, rate=0.5, burst=2)
+        state, wait = take_tokens(state, now=100.0, rate=0.5, burst=2)
+
+        # empty, a token is refilled every 2 seconds
+        self.assertEquals(wait, 2.0)
+        self.assertEquals(take_tokens(state, now=102.0, rate=0.5, burst=2)[1], 0)
+
+        # more than the bucket holds would never be taken
+        self.assertRaises(ValueError, take_tokens, state, now=102.0, rate=0.5, burst=2, tokens=3)
+
+        with tempfile.TemporaryDirectory() as path:
+            for rate_limiter in [LocalTokenBucket(key='test', rate=50, burst=2),
+                                 FileLockTokenBucket(key='test', rate=50, burst=2, path=path)]:
+                start = time.time()
+
+                for _ in range(0, 3):
+                    rate_limiter.acquire()
+
+                async_to_sync(rate_limiter.acquire_async)()
+
+                self.assertGreaterEqual(time.time() - start, 0.03)
+
+                self.assertEquals(rate_limiter.stats['acquired'], 4)
+                self.assertEquals(rate_limiter.stats['waited'], 2)
+                self.assertGreater(rate_limiter.stats['wait_seconds'], 0)
+
+    def test_file_lock_rate_limiter_off_the_event_loop(self):
+        with tempfile.TemporaryDirectory() as path:
+            rate_limiter = FileLockTokenBucket(key='test', rate=50, burst=2, path=path)
+
+            ticks = []
+
+            async def tick():
+                for _ in range(0, 5):
+                    await asyncio.sleep(0.01)
+
+                    ticks.append(time.time())
+
+            async def take_while_locked():
+                await asyncio.gather(rate_limiter.take_async(), tick())
+
+            with open(rate_limiter.path, 'a+') as bucket_file:
+                # another process holds the bucket for a while
+                fcntl.flock(bucket_file, fcntl.LOCK_EX)
+
+                released = []
+
+                def release():
+                    released.append(time.time())
+
+                    fcntl.flock(bucket_file, fcntl.LOCK_UN)
+
+                timer = threading.Timer(0.2, release)
+                timer.start()
+
+                async_to_sync(take_while_locked)()
+
+                timer.join()
+
+            # the loop kept running while the take waited on the lock
+            self.assertEquals(len(ticks), 5)
+            self.assertLess(ticks[-1], released[0])
+
+    def test_redis_rate_limiter(self):
+        connections = []
+
+        class FakeRedis(object):
+            # runs the bucket script's arithmetic in Python
+            buckets = {}
+
+            def __init__(self):
+                self.closed = False
+
+            async def eval(self, script, keys: List, args: List):
+                rate, burst, now, tokens = args
+
+                self.buckets[keys[0]], wait = take_tokens(self.buckets.get(keys[0]), now, rate, burst, tokens)
+
+                return str(wait)
+
+            def close(self):
+                self.closed = True
+
+        async def create_redis(address):
+            connections.append(FakeRedis())
+
+            return connections[-1]
+
+        rate_limiter = RedisTokenBucket(key='test', rate=50, burst=2, hosts=[('localhost', 6379)])
+
+        async def acquire_async():
+            for _ in range(0, 3):
+                await rate_limiter.acquire_async()
+
+        with mock.patch('aioredis.create_redis', side_effect=create_redis):
+            start = time.time()
+
+            for _ in range(0, 3):
+                rate_limiter.acquire()
+
+            async_to_sync(acquire_async)()
+
+            self.assertGreaterEqual(time.time() - start, 0.06)
+
+            # one connection for the synchronous takes and one for the event loop's
+            self.assertEquals(len(connections), 2)
+
+            # a closed connection is replaced
+            connections[0].close()
+
+            rate_limiter.acquire()
+
+            self.assertEquals(len(connections), 3)
+
+        self.assertEquals(rate_limiter.stats['acquired'], 7)
+
+        self.assertRaises(ValueError, rate_limiter.take, tokens=3)
+
+    def test_async_definition_lookup(self):
+        lock = threading.Lock()
+
+        requests_seen = collections.Counter()
+        connections = set()
+        active = {'now': 0, 'max': 0}
+
+        class YandexStandIn(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                lemma = parse_qs(urlparse(self.path).query)['text'][0]
+
+                with lock:
+                    requests_seen[lemma] += 1
+                    connections.add(self.client_address)
+
+                    active['now'] += 1
+                    active['max'] = max(active['max'], active['now'])
+
+                time.sleep(0.05)
+
+                with lock:
+                    active['now'] -= 1
+
+                if lemma == 'ключ':
+                    status, body = 401, {'code': 401, 'message': 'API key is invalid'}
+                elif lemma == 'лимит' or (lemma == 'рубль' and requests_seen[lemma] == 1):
+                    status, body = 429, {'code': 429, 'message': 'Too many requests'}
+                elif lemma == 'неделя' and requests_seen[lemma] == 1:
+                    status, body = 503, {'code': 503, 'message': 'Service unavailable'}
+                else:
+                    status, body = 200, {'head': {}, 'def': [{'text': lemma, 'pos': 'noun',
+                                                              'tr': [{'text': f'{lemma} (en)', 'pos': 'noun'}]}]}
+
+                body = json.dumps(body).encode('utf8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), YandexStandIn)
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        yandex_definition_api = YandexDefinitionAPI()
+        yandex_definition_api.yandex_definition_uri = f'http://127.0.0.1:{server.server_address[1]}/'
+
+        def definitions_lookup(**kwargs) -> AsyncYandexDefinitionLookup:
+            return AsyncYandexDefinitionLookup(api=yandex_definition_api,
+                                               rate_limiter=LocalTokenBucket(key='test', rate=1000, burst=10),
+                                               max_concurrency=3, backoff=0.01, **kwargs)
+
+        try:
+            with definitions_lookup() as lookup:
+                definitions = async_to_sync(lookup.lookup_many)(
+                    ['заявление', 'неделя', 'рубль', 'биржа', 'заявление', 'курс'])
+
+                self.assertEquals(len(definitions), 5)
+                self.assertEquals(definitions['неделя'][0].translations[0].phrase.text, 'неделя (en)')
+
+                # throttled and failed requests are retried, duplicates are requested once
+                self.assertDictEqual(dict(requests_seen), {'заявление': 1, 'неделя': 2, 'рубль': 2, 'биржа': 1,
+                                                           'курс': 1})
+                self.assertEquals(lookup.stats['retries'], 2)
+
+                self.assertGreater(active['max'], 1)
+                self.assertLessEqual(active['max'], 3)
+
+                # connections are kept alive
+                self.assertLessEqual(len(connections), 3)
+
+                self.assertEquals(YandexDefinitionCache.objects.count(), 5)
+
+                with self.assertRaises(YandexInvalidAPIKeyException):
+                    async_to_sync(lookup.lookup_many)(['ключ'])
+
+            with definitions_lookup(use_cache=False, max_retries=1) as lookup:
+                async def lookup_twice():
+                    return await asyncio.gather(lookup.lookup('курс'), lookup.lookup('курс'))
+
+                self.assertEquals(len(async_to_sync(lookup_twice)()), 2)
+
+                self.assertEquals(requests_seen['курс'], 2)
+                self.assertEquals(lookup.stats['deduplicated'], 1)
+
+                # lemmas still throttled after retrying are left without definitions
+                self.assertDictEqual(async_to_sync(lookup.lookup_many)(['лимит']), {'лимит': None})
+                self.assertEquals(requests_seen['лимит'], 2)
+        finally:
+            server.shutdown()
+            server.server_close()
+
     def test_parsing_words(self):
         test_data = self.get_test_data()
 
@@ -84,6 +372,72 @@ class TestText(TestData, TestUser, TestCase):
         self.assertNotIn('2', words)
         self.assertIn('руб', words)
 
+    def test_text_section_tokens(self):
+        self.assertListEqual(list(tokenize(' Курс доллара (рубля) составил 56,25 руб./$. Падение продаж! Тест.')), [
+            Token('Курс', 'курс', 1, 0), Token('доллара', 'доллара', 6, 0), Token('составил', 'составил', 22, 0),
+            Token('руб', 'руб', 37, 0), Token('Падение', 'падение', 45, 1), Token('продаж', 'продаж', 53, 1),
+            Token('Тест', 'тест', 61, 2)])
+
+        test_data = self.get_test_data()
+
+        test_data['text_sections'][0]['body'] = '<p>Минувшую неделю рубль завершил.</p> <p>Курс доллара.</p>'
+
+        text = self.create_text(test_data=test_data)
+
+        text_section = TextSection.objects.get(pk=text.sections.get(order=0).pk)
+
+        self.assertListEqual(list(text_section.words), ['Минувшую', 'неделю', 'рубль', 'завершил', 'Курс', 'доллара'])
+        self.assertEquals(text_section.tokens[4].sentence, 1)
+
+        self.assertEquals(TextSectionTokens.objects.get(text_section=text_section).num_of_tokens, 6)
+
+        # the stored tokens are read back as long as the body is unchanged
+        text_section = TextSection.objects.get(pk=text_section.pk)
+
+        with mock.patch('text.translations.tokens.tokenize') as tokenize_mock:
+            self.assertEquals(len(list(text_section.words)), 6)
+            self.assertEquals(len(list(text_section.words)), 6)
+
+            tokenize_mock.assert_not_called()
+
+        text_section.body = '<p>Курс доллара.</p>'
+        text_section.save()
+
+        self.assertListEqual(list(TextSection.objects.get(pk=text_section.pk).words), ['Курс', 'доллара'])
+        self.assertEquals(TextSectionTokens.objects.get(text_section=text_section).num_of_tokens, 2)
+
+    def test_morphology_service(self):
+        morphology = MorphologyService(max_size=2)
+
+        parsed_words = morphology.parse_many(['неделю', 'рубль', 'неделю'])
+
+        self.assertEquals(parsed_words['неделю']['lemma'], 'неделя')
+        self.assertEquals(parsed_words['неделю']['pos'], 'NOUN')
+        self.assertEquals(morphology.lemma('неделю'), 'неделя')
+
+        self.assertDictEqual(morphology.stats, {'hits': 1, 'misses': 2, 'size': 2, 'max_size': 2})
+
+        # least recently used forms are evicted
+        morphology.parse('биржи')
+
+        with mock.patch.object(morphology.analyzer, 'parse', wraps=morphology.analyzer.parse) as parse:
+            morphology.parse('неделю')
+            morphology.parse('рубль')
+
+            self.assertEquals(parse.call_count, 1)
+
+        test_data = self.get_test_data()
+
+        test_data['text_sections'][0]['body'] = 'заявление неделю заявление'
+
+        text = self.create_text(test_data=test_data)
+
+        out = io.StringIO()
+
+        call_command('words', text.sections.get(order=0).pk, '--lemmas', stdout=out)
+
+        self.assertIn('has 3 words and 2 lemmas', out.getvalue())
+
     def test_example_sentence_re(self):
         test_data = self.get_test_data()
 
@@ -110,6 +464,52 @@ class TestText(TestData, TestUser, TestCase):
 
         self.assertEquals('Преподаватель немного опаздывает.', text_phrase.sentence)
 
+    def test_sentence_index(self):
+        test_data = self.get_test_data()
+
+        test_data['text_sections'][0]['body'] = '<p>Мне 18 лет. Я — студентка.</p> <p>Две пары подряд. ' \
+                                                'Преподаватель немного опаздывает</p>'
+
+        text = self.create_text(test_data=test_data)
+
+        text_section = TextSection.objects.get(pk=text.sections.get(order=0).pk)
+
+        self.assertListEqual(text_section.sentences, ['Мне 18 лет.', 'Я — студентка.', 'Две пары подряд.',
+                                                      'Преподаватель немного опаздывает'])
+
+        TextWord.bulk_create_from_word_data(text_section, {
+            word: [{'grammemes': {'lemma': word.lower()}, 'translations': []}]
+            for word in ['студентка', 'пары', 'опаздывает']})
+
+        self.assertDictEqual(dict(TextWord.objects.filter(text_section=text_section).values_list(
+            'phrase', 'sentence_index')), {'студентка': 1, 'пары': 2, 'опаздывает': 3})
+
+        text_phrases = list(TextPhrase.objects.filter(text_section=text_section).select_related('text_section'))
+
+        # one query for the sentences of all the phrases, and no parsing of the body
+        with self.assertNumQueries(1), mock.patch('text.translations.tokens.body_to_text') as body_to_text_mock:
+            TextPhrase.prefetch_sentences(text_phrases)
+
+            self.assertListEqual(sorted(text_phrase.sentence for text_phrase in text_phrases),
+                                 ['Две пары подряд.', 'Преподаватель немного опаздывает', 'Я — студентка.'])
+
+            body_to_text_mock.assert_not_called()
+
+        # an edit moves kept words to their new sentences
+        old_words = list(text_section.words)
+
+        text_section.body = '<p>Мне 18 лет. Две пары подряд. Преподаватель немного опаздывает</p>'
+        text_section.save()
+
+        with mock.patch.object(TextSection, 'lookup_definitions', return_value={}):
+            TextWord.update_from_word_diff(text_section, old_words)
+
+        self.assertDictEqual(dict(TextWord.objects.filter(text_section=text_section, phrase__in=['пары', 'опаздывает'])
+                                  .values_list('phrase', 'sentence_index')), {'пары': 1, 'опаздывает': 2})
+
+        self.assertEquals(TextPhrase.objects.get(text_section=text_section, phrase='пары').sentence,
+                          'Две пары подряд.')
+
     def run_definition_background_job(self, test_data: Dict) -> Tuple[int, TextSection]:
         num_of_words = len(test_data['text_sections'][0]['body'].split())
 
@@ -149,6 +549,364 @@ class TestText(TestData, TestUser, TestCase):
 
         self.assertTrue(text_section_word_translation.phrase)
 
+    def test_bulk_word_definitions(self):
+        test_data = self.get_test_data()
+
+        test_data['text_sections'][0]['body'] = 'заявление неделю заявление'
+
+        text = self.create_text(test_data=test_data)
+
+        text_section = text.sections.get(order=0)
+
+        # store the section's tokens up front
+        self.assertEquals(len(list(text_section.words)), 3)
+
+        def lookup_definitions(lemmas, **kwargs):
+            return {lemma: YandexDefinitions(from_lang='ru', to_lang='en', phrase=lemma, definitions=[
+                {'text': lemma, 'pos': 'noun', 'tr': [{'text': f'{lemma} (en)'}, {'text': f'{lemma} (en 2)'}]}
+            ]) for lemma in lemmas}
+
+        with mock.patch.object(TextSection, 'lookup_definitions', side_effect=lookup_definitions):
+            with CaptureQueriesContext(connection) as queries:
+                _, log_msgs = ParseTextSectionForDefinitions(scope={}).text_section_parse_word_definitions(
+                    {'text_section_pk': text_section.pk}, log_msgs=['start'])
+
+            self.assertLess(len(queries), 15)
+
+            self.assertEquals(len([msg for msg in log_msgs if msg.startswith('created a new word')]), 3)
+
+            self.assertListEqual(list(TextWord.objects.filter(text_section=text_section).order_by(
+                'phrase', 'instance').values_list('phrase', 'instance', 'lemma')),
+                [('заявление', 0, 'заявление'), ('заявление', 1, 'заявление'), ('неделю', 0, 'неделя')])
+
+            for text_word in TextWord.objects.filter(text_section=text_section):
+                self.assertListEqual(list(text_word.translations.order_by('pk').values_list(
+                    'phrase', 'correct_for_context')), [(f'{text_word.lemma} (en)', True),
+                                                        (f'{text_word.lemma} (en 2)', False)])
+
+            # existing words are left alone
+            TextWord.objects.filter(text_section=text_section, phrase='неделю').delete()
+
+            ParseTextSectionForDefinitions(scope={}).text_section_parse_word_definitions(
+                {'text_section_pk': text_section.pk})
+
+        self.assertEquals(TextWord.objects.filter(text_section=text_section).count(), 3)
+        self.assertEquals(TextPhraseTranslation.objects.filter(text_phrase__text_section=text_section).count(), 6)
+
+    def test_incremental_word_definitions(self):
+        test_data = self.get_test_data()
+
+        test_data['text_sections'][0]['body'] = '<p>заявление неделю заявление курс</p>'
+
+        text = self.create_text(test_data=test_data)
+
+        text_section = text.sections.get(order=0)
+
+        looked_up = []
+
+        def lookup_definitions(lemmas, **kwargs):
+            lemmas = list(lemmas)
+
+            looked_up.extend(lemmas)
+
+            return {lemma: YandexDefinitions(from_lang='ru', to_lang='en', phrase=lemma, definitions=[
+                {'text': lemma, 'pos': 'noun', 'tr': [{'text': f'{lemma} (en)'}, {'text': f'{lemma} (en 2)'}]}
+            ]) for lemma in lemmas}
+
+        def edit(body: str):
+            old_body = text_section.body
+
+            text_section.body = body
+            text_section.save()
+
+            looked_up.clear()
+
+            ParseTextSectionForDefinitions(scope={}).text_section_update_definitions_if_new(
+                {'text_section_pk': text_section.pk, 'old_body': old_body})
+
+        def section_words():
+            return sorted(TextWord.objects.filter(text_section=text_section).values_list('phrase', 'instance'))
+
+        with mock.patch.object(TextSection, 'lookup_definitions', side_effect=lookup_definitions):
+            ParseTextSectionForDefinitions(scope={}).text_section_parse_word_definitions(
+                {'text_section_pk': text_section.pk})
+
+            kurs = TextWord.objects.get(text_section=text_section, phrase='курс')
+
+            # an instructor picks another translation
+            kurs.translations.update(correct_for_context=False)
+            kurs.translations.filter(phrase='курс (en 2)').update(correct_for_context=True)
+
+            # fixing a typo only looks up the changed word
+            edit('<p>заявление недели заявление курс</p>')
+
+            self.assertListEqual(looked_up, ['неделя'])
+            self.assertListEqual(section_words(), [('заявление', 0), ('заявление', 1), ('курс', 0), ('недели', 0)])
+
+            # markup changes alone don't touch the words
+            edit('<p><b>заявление</b> недели заявление курс</p>')
+
+            self.assertListEqual(looked_up, [])
+
+            # inserting a word renumbers the later instances of the same word
+            edit('<p>курс заявление недели заявление курс</p>')
+
+            self.assertListEqual(looked_up, ['курс'])
+            self.assertListEqual(section_words(), [('заявление', 0), ('заявление', 1), ('курс', 0), ('курс', 1),
+                                                   ('недели', 0)])
+
+        kurs = TextWord.objects.get(pk=kurs.pk)
+
+        self.assertEquals(kurs.instance, 1)
+        self.assertEquals(kurs.translations.get(correct_for_context=True).phrase, 'курс (en 2)')
+
+        self.assertTrue(TextWord.objects.get(text_section=text_section, phrase='курс', instance=0).translations.filter(
+            phrase='курс (en)', correct_for_context=True).exists())
+
+    def test_edit_text_section_words(self):
+        test_data = self.get_test_data()
+
+        test_data['text_sections'][0]['body'] = '<p>заявление неделю</p>'
+
+        text = self.create_text(test_data=test_data)
+
+        text_section = text.sections.get(order=0)
+
+        consumer = ParseTextSectionForDefinitions(scope={})
+
+        with mock.patch.object(TextSection, 'lookup_definitions', side_effect=lambda lemmas, **kwargs: {}):
+            consumer.run_translation_jobs()
+
+            test_data['text_sections'][0]['body'] = '<p>заявление рубль</p>'
+
+            resp = self.instructor.put(reverse_lazy('text-item-api', kwargs={'pk': text.pk}), json.dumps(test_data),
+                                       content_type='application/json')
+
+            self.assertEquals(resp.status_code, 200)
+
+            # the job diffs against the body before the edit
+            self.assertEquals(TranslationJob.objects.get(text_section=text_section, status='pending').old_body,
+                              '<p>заявление неделю</p>')
+
+            consumer.run_translation_jobs()
+
+        self.assertListEqual(sorted(TextWord.objects.filter(text_section=text_section).values_list(
+            'phrase', flat=True)), ['заявление', 'рубль'])
+
+    def test_translation_jobs(self):
+        text = self.create_text()
+
+        num_of_sections = text.sections.count()
+
+        # creating a text queues a job per section, and queueing again folds into the pending job
+        self.assertEquals(TranslationJob.objects.filter(status='pending', kind='parse').count(), num_of_sections)
+
+        text_section = text.sections.get(order=0)
+
+        text_section.update_definitions_if_new(old_body='<p>старый текст</p>')
+        text_section.update_definitions(priority=1)
+
+        self.assertEquals(TranslationJob.objects.count(), num_of_sections)
+        self.assertEquals(TranslationJob.objects.get(text_section=text_section).priority, 1)
+
+        # workers lease different jobs, highest priority first
+        job = TranslationJob.lease('worker-1')
+
+        self.assertEquals(job.text_section_id, text_section.pk)
+        self.assertNotEqual(TranslationJob.lease('worker-2').pk, job.pk)
+
+        # an expired lease can be taken over
+        TranslationJob.objects.filter(pk=job.pk).update(lease_expires_dt=timezone.now() - timezone.timedelta(seconds=1))
+
+        job = TranslationJob.lease('worker-3')
+
+        self.assertEquals((job.text_section_id, job.lease_owner, job.attempts), (text_section.pk, 'worker-3', 2))
+
+        # the old owner can no longer complete it
+        stale_job = TranslationJob.objects.get(pk=job.pk)
+        stale_job.lease_owner = 'worker-1'
+
+        self.assertFalse(stale_job.complete())
+
+        # progress extends the lease, but only for its owner
+        lease_expires_dt = job.lease_expires_dt
+
+        self.assertTrue(job.progress(words_done=1, words_total=2, lease_seconds=60 * 60))
+        self.assertGreater(TranslationJob.objects.get(pk=job.pk).lease_expires_dt, lease_expires_dt)
+        self.assertEquals(TranslationJob.objects.get(pk=job.pk).words_done, 1)
+
+        self.assertFalse(stale_job.progress(words_done=2))
+
+        TranslationJob.objects.update(status='pending', lease_owner=None, lease_expires_dt=None, attempts=0)
+
+        consumer = ParseTextSectionForDefinitions(scope={})
+
+        with mock.patch.object(TextSection, 'lookup_definitions', side_effect=YandexException(message='unavailable')):
+            self.assertEquals(consumer.run_translation_jobs()[0], num_of_sections)
+
+        # failed jobs are retried after a backoff
+        self.assertFalse(TranslationJob.objects.exclude(status='pending').exists())
+        self.assertIsNone(TranslationJob.lease('worker-1'))
+
+        job = TranslationJob.objects.get(text_section=text_section)
+
+        self.assertEquals((job.attempts, job.last_error), (1, 'unavailable'))
+        self.assertGreater(job.run_after_dt, timezone.now() + timezone.timedelta(seconds=30))
+
+        TranslationJob.objects.update(run_after_dt=timezone.now())
+
+        with mock.patch.object(TextSection, 'lookup_definitions', side_effect=lambda lemmas, **kwargs: {}):
+            self.assertEquals(consumer.run_translation_jobs()[0], num_of_sections)
+
+        job = TranslationJob.objects.get(text_section=text_section)
+
+        self.assertEquals(job.status, 'done')
+        self.assertEquals(job.words_done, len(text_section.tokens))
+
+        self.assertTrue(TextWord.objects.filter(text_section=text_section).exists())
+
+        resp = self.instructor.get(reverse_lazy('text-translation-status-api', kwargs={'pk': text.pk}))
+
+        self.assertEquals(resp.status_code, 200)
+
+        status = json.loads(resp.content.decode('utf8'))
+
+        self.assertTrue(status['complete'])
+        self.assertEquals(len(status['sections']), num_of_sections)
+        self.assertEquals(status['sections'][0]['attempts'], 2)
+
+        self.assertEquals(self.student.get(reverse_lazy('text-translation-status-api',
+                                                        kwargs={'pk': text.pk})).status_code, 403)
+
+        # progress is recorded after each batch of lemmas looked up
+        TextWord.objects.filter(text_section=text_section).delete()
+
+        text_section.body = '<p>заявление неделю курс</p>'
+        text_section.save()
+
+        job = TranslationJob.enqueue(text_section)
+
+        words_done = []
+
+        def lookup_definitions(lemmas, **kwargs):
+            words_done.append(TranslationJob.objects.get(pk=job.pk).words_done)
+
+            return {}
+
+        with self.settings(TRANSLATION_JOBS=dict(TranslationJob.config(), BATCH_SIZE=1)):
+            with mock.patch.object(TextSection, 'lookup_definitions', side_effect=lookup_definitions):
+                self.assertEquals(consumer.run_translation_jobs()[0], 1)
+
+            self.assertListEqual(words_done, [0, 1, 2])
+
+            # a job whose lease is taken over stops before writing anything
+            TextWord.objects.filter(text_section=text_section).delete()
+
+            job = TranslationJob.enqueue(text_section)
+
+            def steal_lease(lemmas, **kwargs):
+                TranslationJob.objects.filter(pk=job.pk).update(lease_owner='worker-2')
+
+                return {}
+
+            with mock.patch.object(TextSection, 'lookup_definitions', side_effect=steal_lease):
+                consumer.run_translation_jobs()
+
+        job = TranslationJob.objects.get(pk=job.pk)
+
+        self.assertEquals((job.status, job.lease_owner), ('leased', 'worker-2'))
+        self.assertFalse(TextWord.objects.filter(text_section=text_section).exists())
+
+    def test_offline_dictionary(self):
+        with tempfile.TemporaryDirectory() as path:
+            tsv_path = os.path.join(path, 'ru-en.tsv')
+            json_path = os.path.join(path, 'ru-en.json.gz')
+
+            with open(tsv_path, 'w', encoding='utf-8') as tsv_file:
+                tsv_file.write('# lemma\ttranslations\tpos\n'
+                               'заявление\tstatement; application\tnoun\n'
+                               'неделя\tweek\n')
+
+            with gzip.open(json_path, 'wt', encoding='utf-8') as json_file:
+                json.dump({'неделя': ['week', {'text': 'seven days', 'pos': 'noun'}]}, json_file)
+
+            out = io.StringIO()
+
+            call_command('import_dictionary', tsv_path, stdout=out)
+            call_command('import_dictionary', json_path, stdout=out)
+
+        self.assertIn('Imported 1 lemmas (1 updated)', out.getvalue())
+        self.assertEquals(DictionaryEntry.objects.count(), 2)
+
+        definitions = DictionaryEntry.lookup_many(['заявление', 'неделя', 'рубль'], from_lang='ru', to_lang='en')
+
+        self.assertListEqual(sorted(definitions), ['заявление', 'неделя'])
+        self.assertListEqual([tr.phrase.text for tr in definitions['заявление'][0].translations],
+                             ['statement', 'application'])
+        self.assertEquals(len(definitions['неделя']), 2)
+
+        test_data = self.get_test_data()
+
+        test_data['text_sections'][0]['body'] = 'заявление неделю рубль'
+
+        text = self.create_text(test_data=test_data)
+
+        text_section = text.sections.get(order=0)
+
+        with mock.patch.object(TextSection, 'lookup_definitions', return_value={}) as lookup_definitions:
+            word_data, _ = text_section.parse_word_definitions(dictionary_mode='offline')
+
+            lookup_definitions.assert_not_called()
+
+            self.assertEquals(word_data['заявление'][0]['translations'][0].phrase.text, 'statement')
+            self.assertListEqual(word_data['рубль'][0]['translations'], [])
+
+            # only misses go to the network
+            text_section.parse_word_definitions(dictionary_mode='offline_first')
+
+            lookup_definitions.assert_called_once_with(['рубль'], definitions_lookup=None)
+
+    def test_reprocess_corpus(self):
+        text = self.create_text()
+
+        text_sections = list(text.sections.order_by('pk'))
+
+        TextWord.create(text_section=text_sections[1], phrase='section', instance=0, lemma='устаревший')
+
+        def reprocess(*args) -> str:
+            out = io.StringIO()
+
+            call_command('reprocess_corpus', '--workers', '2', '--checkpoint', checkpoint_path, *args, stdout=out)
+
+            return out.getvalue()
+
+        with tempfile.TemporaryDirectory() as path, mock.patch.object(
+                TextSection, 'lookup_definitions', side_effect=lambda lemmas, **kwargs: {}) as lookup_definitions:
+            checkpoint_path = os.path.join(path, 'checkpoint.txt')
+
+            # the budget stops the run after the first section
+            out = reprocess('--budget', str(len(text_sections[0].tokens)))
+
+            self.assertIn('Reprocessed 1 text sections', out)
+            self.assertIn('Stopped at the word budget', out)
+
+            out = reprocess('--resume')
+
+            self.assertIn('(1 already finished)', out)
+            self.assertIn('Reprocessed 1 text sections', out)
+
+            # lookups go through the one client of the run
+            self.assertTrue(all(call[1]['definitions_lookup'] for call in lookup_definitions.call_args_list))
+
+        self.assertEquals(TextSectionTokens.objects.count(), len(text_sections))
+
+        self.assertEquals(TextWord.objects.filter(text_section=text_sections[0]).count(),
+                          len(text_sections[0].tokens))
+
+        # sections that already have words are re-lemmatized
+        self.assertEquals(TextWord.objects.get(text_section=text_sections[1], phrase='section').lemma, 'section')
+        self.assertEquals(TextWord.objects.filter(text_section=text_sections[1]).count(), 1)
+
     def test_text_reading(self,
                           text: Text = None, student: Student = None, final_state: State = None) -> StudentTextReading:
         test_data = self.get_test_data()
@@ -231,6 +989,307 @@ class TestText(TestData, TestUser, TestCase):
 
         return text_reading
 
+    def test_text_section_reading_payload_cache(self):
+        payload_cache = get_text_section_payload_cache()
+        payload_cache.clear()
+
+        text = self.create_text()
+        text_section = text.sections.all()[0]
+
+        text_reading_dict = text_section.to_text_reading_dict()
+
+        self.assertEquals(payload_cache.stats, {'hits': 0, 'misses': 1})
+        self.assertDictEqual(text_section.to_text_reading_dict(), text_reading_dict)
+        self.assertEquals(payload_cache.stats, {'hits': 1, 'misses': 1})
+
+        # students never see the correct answers
+        self.assertNotIn('correct', text_reading_dict['questions'][0]['answers'][0])
+
+        resp = self.instructor.post(reverse_lazy('text-word-api'), json.dumps({
+            'text': text.pk,
+            'text_section': text_section.order,
+            'instance': 0,
+            'phrase': 'section'
+        }), content_type='application/json')
+
+        self.assertEquals(resp.status_code, 200, json.dumps(json.loads(resp.content.decode('utf8')), indent=4))
+
+        # adding a word invalidates the cached payload
+        self.assertIn('section', text_section.to_text_reading_dict()['translations'])
+        self.assertEquals(payload_cache.stats, {'hits': 1, 'misses': 2})
+
+    def test_text_reading_answer_state(self):
+        text_reading = self.test_text_reading(final_state=StudentTextReading.state_machine_cls.in_progress)
+        text_section = text_reading.current_section
+
+        # warm the payload cache so only the per-reading queries are counted
+        text_section.to_text_reading_dict(text_reading=text_reading)
+
+        with CaptureQueriesContext(connection) as unanswered_queries:
+            text_section.to_text_reading_dict(text_reading=text_reading)
+
+        questions = text_section.questions.all()
+
+        text_reading.answer(questions[0].answers.all()[2])
+        text_reading.answer(questions[0].answers.all()[3])
+        text_reading.answer(questions[1].answers.all()[1])
+
+        with CaptureQueriesContext(connection) as answered_queries:
+            text_section_dict = text_section.to_text_reading_dict(text_reading=text_reading)
+
+        self.assertEquals(len(answered_queries), len(unanswered_queries))
+
+        answer_state = text_reading.answer_state(text_section.pk)
+
+        self.assertEquals(answer_state.first_answer(questions[0].pk), questions[0].answers.all()[2].pk)
+        self.assertEquals(answer_state.first_answer(questions[1].pk), questions[1].answers.all()[1].pk)
+
+        answered_correctly = {answer['id']: answer['answered_correctly'] for question in
+                              text_section_dict['questions'] for answer in question['answers']}
+
+        self.assertEquals(answered_correctly[questions[0].answers.all()[2].pk], False)
+        self.assertEquals(answered_correctly[questions[0].answers.all()[3].pk], True)
+        self.assertEquals(answered_correctly[questions[0].answers.all()[0].pk], None)
+
+    def test_backfill_text_reading_scores(self):
+        text_reading = self.test_text_reading(final_state=StudentTextReading.state_machine_cls.complete)
+
+        score = text_reading.score
+
+        StudentTextReading.objects.filter(pk=text_reading.pk).update(complete_sections=0, first_answers_correct=0,
+                                                                     questions_answered=0, max_score=0)
+
+        self.assertRaises(CommandError, lambda: call_command('backfill_text_reading_scores', '--verify',
+                                                             stdout=open(os.devnull, 'w')))
+
+        call_command('backfill_text_reading_scores', stdout=open(os.devnull, 'w'))
+        call_command('backfill_text_reading_scores', '--verify', stdout=open(os.devnull, 'w'))
+
+        text_reading.refresh_from_db()
+
+        self.assertDictEqual(text_reading.score, score)
+        self.assertEquals(text_reading.max_score, score['possible_section_scores'])
+
+    def test_websocket_auth_context(self):
+        user, _, student = self.new_student()
+
+        def token(exp: float) -> bytes:
+            return jwt.encode({'user_id': user.pk, 'exp': exp}, os.getenv('DJANGO_SECRET_KEY'), algorithm='HS256')
+
+        scope = {'path': '/student/text_read/1', 'query_string': token(time.time() + 60)}
+
+        # the user is looked up synchronously here, inside the test's transaction (database_sync_to_async closes the
+        # connection it would run on, and the event loop's thread has a connection of its own)
+        self.assertEquals(get_user_for_path.__wrapped__(user.pk, scope['path']), user)
+        self.assertRaises(InvalidTokenError, get_user_for_path.__wrapped__, user.pk, '/instructor/text_read/1')
+
+        users_for_path = {(user.pk, scope['path']): user}
+
+        async def user_for_path(user_id: int, path: AnyStr):
+            return users_for_path[(user_id, path)]
+
+        with mock.patch('auth.producer_auth.get_user_for_path', new=user_for_path):
+            auth = async_to_sync(jwt_auth_context)(scope)
+
+            self.assertEquals(auth.user, user)
+            self.assertFalse(auth.expired())
+            self.assertTrue(auth.expired(now=auth.exp))
+
+            # expired and malformed tokens fall back to an anonymous, expired context
+            for invalid_token in [token(time.time() - 60), b'invalid']:
+                auth = async_to_sync(jwt_auth_context)(scope, token=invalid_token)
+
+                self.assertFalse(auth.user.id)
+                self.assertTrue(auth.expired())
+
+            # a client whose token has expired can still refresh it
+            consumer = StudentTextReaderConsumer(scope=scope)
+            consumer.auth = AuthContext(user, exp=time.time() - 1)
+
+            sent = []
+
+            async def send_json(content, close=False):
+                sent.append(content)
+
+            consumer.send_json = send_json
+
+            async_to_sync(consumer.receive_json)({'command': 'refresh_token', 'token': token(time.time() + 60)})
+
+            self.assertEquals(sent[-1]['command'], 'refresh_token')
+            self.assertFalse(consumer.auth.expired())
+
+    def test_text_reading_session(self):
+        text_reading = self.test_text_reading(final_state=StudentTextReading.state_machine_cls.intro)
+        text_sections = text_reading.text.sections.all()
+
+        text_reading_session = TextReadingSession(text_reading)
+
+        # transitions only write the reading
+        with CaptureQueriesContext(connection) as queries:
+            text_reading_session.next()
+
+        self.assertEquals(len(queries), 1)
+        self.assertEquals(text_reading.current_section, text_sections[0])
+
+        # the bumped version reads back as a number
+        self.assertEquals(text_reading.version, StudentTextReading.objects.get(pk=text_reading.pk).version)
+        self.assertIsInstance(text_reading.version, int)
+
+        questions = text_sections[0].questions.all()
+
+        text_reading_session.answer(questions[0].answers.all()[0])
+
+        self.assertRaises(TextReadingNotAllQuestionsAnswered, lambda: text_reading_session.next())
+
+        text_reading_session.answer(questions[1].answers.all()[3])
+
+        for _ in text_sections[1:]:
+            text_reading_session.next()
+
+            for question in text_reading.current_section.questions.all():
+                text_reading_session.answer(question.answers.all()[3])
+
+        text_reading_session.next()
+
+        text_reading_session.prev()
+        text_reading_session.next()
+
+        text_reading = StudentTextReading.objects.get(pk=text_reading.pk)
+
+        self.assertTrue(text_reading.complete)
+        self.assertTrue(text_reading.end_dt)
+        self.assertDictEqual(text_reading.score, {'num_of_sections': len(text_sections),
+                                                  'complete_sections': len(text_sections),
+                                                  'section_scores': text_reading.max_score - 1,
+                                                  'possible_section_scores': text_reading.max_score})
+
+    def test_text_reading_prefetch_next_section(self):
+        text_reading = self.test_text_reading(final_state=StudentTextReading.state_machine_cls.intro)
+        text_section = text_reading.text.sections.all()[0]
+
+        consumer = StudentTextReaderConsumer(scope={})
+        consumer.text_reading = text_reading
+        consumer.text_reading_session = TextReadingSession(text_reading)
+
+        # the consumer's database work runs synchronously here, inside the test's transaction (database_sync_to_async
+        # closes the connection it would run on)
+        build_section_payload = StudentTextReaderConsumer.build_section_payload.__wrapped__
+        get_current_text_reading_message = StudentTextReaderConsumer.get_current_text_reading_message.__wrapped__
+
+        section_payload = build_section_payload(consumer, text_section)
+
+        async def build_next_section_payload(next_section: TextSection):
+            self.assertEquals(next_section, text_section)
+
+            return section_payload
+
+        consumer.build_section_payload = build_next_section_payload
+
+        async def prefetch():
+            consumer.start_prefetch()
+
+            await consumer.finish_prefetch()
+
+        async_to_sync(prefetch)()
+
+        self.assertEquals(consumer.prefetched_section[:2], (text_section.pk, text_section.content_version))
+
+        payload = consumer.prefetched_section[2]
+
+        consumer.text_reading_session.next()
+
+        message = get_current_text_reading_message(consumer)
+
+        self.assertIs(message['result'], payload)
+        self.assertIsNone(consumer.prefetched_section)
+        self.assertDictEqual(message['result'], text_reading.to_text_reading_dict())
+
+    def test_text_reading_batch(self):
+        text_reading = self.test_text_reading(final_state=StudentTextReading.state_machine_cls.in_progress)
+        questions = text_reading.current_section.questions.all()
+
+        consumer = StudentTextReaderConsumer(scope={})
+        consumer.text_reading = text_reading
+        consumer.text_reading_session = TextReadingSession(text_reading)
+
+        # a batch stops at the first command that fails
+        results = consumer.run_batch([
+            {'command': 'answer', 'answer_id': questions[0].answers.all()[2].pk},
+            {'command': 'next'},
+            {'command': 'prev'}
+        ])
+
+        self.assertEquals(len(results), 2)
+        self.assertEquals(results[0], {'command': 'answer', 'answer_id': questions[0].answers.all()[2].pk,
+                                       'state': 'in_progress'})
+        self.assertEquals(results[1]['error']['code'], 'questions_unanswered')
+
+        # any other error rolls back the whole batch, and the session is reloaded to match
+        questions_answered = consumer.text_reading.questions_answered
+
+        with mock.patch.object(TextReadingSession, 'save', side_effect=DatabaseError('disk I/O error')):
+            results = consumer.run_batch([
+                {'command': 'answer', 'answer_id': questions[1].answers.all()[1].pk},
+                {'command': 'next'},
+            ])
+
+        self.assertListEqual(results, [{'command': 'next', 'error': {'code': 'unknown',
+                                                                     'error_msg': 'something went wrong'}}])
+
+        self.assertEquals(consumer.text_reading.current_state.name, 'in_progress')
+        self.assertEquals(consumer.text_reading.questions_answered, questions_answered)
+        self.assertIsNot(consumer.text_reading_session.text_reading, text_reading)
+
+        results = consumer.run_batch([
+            {'command': 'answer', 'answer_id': questions[1].answers.all()[1].pk},
+            {'command': 'next'},
+            {'command': 'unknown'}
+        ])
+
+        self.assertEquals([result['state'] for result in results[:2]], ['in_progress', 'complete'])
+        self.assertEquals(results[2]['error']['code'], 'invalid_command')
+
+        text_reading.refresh_from_db()
+
+        self.assertTrue(text_reading.complete)
+        self.assertEquals(text_reading.questions_answered, 4)
+
+        # a user without an id is closed before anything of the batch runs
+        sent = []
+        closed = []
+
+        async def send_json(content, close=False):
+            sent.append(content)
+
+        async def close(code=None):
+            closed.append(code)
+
+        consumer.send_json, consumer.close = send_json, close
+
+        with mock.patch.object(StudentTextReaderConsumer, 'run_batch') as run_batch:
+            async_to_sync(consumer.batch)(user=AnonymousUser(), commands=[{'command': 'prev'}])
+
+        run_batch.assert_not_called()
+
+        self.assertListEqual(sent, [{'error': 'Invalid JWT'}])
+        self.assertListEqual(closed, [1000])
+
+    def test_text_reading_question_delta(self):
+        text_reading = self.test_text_reading(final_state=StudentTextReading.state_machine_cls.in_progress)
+        text_section = text_reading.current_section
+
+        question = text_section.questions.all()[1]
+
+        text_reading.answer(question.answers.all()[3])
+
+        question_dict = text_section.to_question_text_reading_dict(question.pk, text_reading=text_reading)
+
+        # the delta for a question matches the question in the full payload
+        self.assertIn(question_dict, text_section.to_text_reading_dict(text_reading=text_reading)['questions'])
+        self.assertIn(True, [answer['answered_correctly'] for answer in question_dict['answers']])
+
+        self.assertIsNone(text_section.to_question_text_reading_dict(0, text_reading=text_reading))
+
     def test_set_difficulty(self):
         text = self.create_text(diff_data={'difficulty': 'advanced_mid'})
 
@@ -362,10 +1421,40 @@ class TestText(TestData, TestUser, TestCase):
         ], addl_filters=[('tag', 'Science/Technology'), ('difficulty', 'intermediate_mid')])
 
         test_status({'read'}, [], addl_filters=[('tag', 'Science/Technology'), ('difficulty', 'intermediate_mid')])
-        # TODO: Move away from `MIGRATION_MODULES = {'report': None}` to create db views and populate them.
-        # The database views that track completion and in progress readings are not populated due to the last line of `settings-test.py`
-        # Because of this, we must have enough specificity in the `addl_filters` to return only a single text. The mathematical set 
-        # code in `text/api/views/text.py get_texts_queryset(..)` always returns the empty list when querying the db views.
+
+        test_status({'read'}, [text['read']])
+        test_status({'in_progress'}, [text['intro'], text['in_progress']])
+        test_status({'unread', 'read'}, [text['unread'], text['read']])
+        test_status({'in_progress'}, [text['in_progress']], addl_filters=[('tag', 'Economics/Business'),
+                                                                         ('tag', 'Medicine/Health Care')])
+
+        # every difficulty asked for is honoured
+        test_status({'unread'}, [text['unread']], addl_filters=[('difficulty', 'intermediate_mid'),
+                                                                ('difficulty', 'advanced_low')])
+
+        text['hidden'] = self.create_text(diff_data={'title': 'hidden', 'tags': ['Other']})
+        text['hidden'].tags.add(Tag.objects.get_or_create(name='Hidden')[0])
+
+        test_status({'unread'}, [text['unread']])
+
+        # the statuses are filtered in the one query for the texts
+        with self.assertNumQueries(1):
+            list(TextAPIView().get_texts_queryset(user, {'unread', 'in_progress'},
+                                                  {'difficulty__slug__in': ['intermediate_mid'],
+                                                   'tags__name__in': ['Science/Technology', 'Other']}))
+
+        TextRating.objects.create(student=user, text=text['read'], vote=1)
+
+        texts = TextAPIView().get_texts_queryset(user, set(), {})
+
+        # the summaries of the whole result set are read in a fixed number of queries, and match each text's summary
+        with self.assertNumQueries(5):
+            text_summaries = user.to_text_summary_dicts(texts)
+
+        self.assertListEqual(text_summaries, [user.to_text_summary_dict(txt) for txt in texts])
+
+        self.assertEquals([text_summary['vote'] for text_summary in text_summaries
+                           if text_summary['id'] == text['read'].pk], ['up'])
 
     def test_get_text_by_tag_or(self):
         student = Student.objects.get()
@@ -391,6 +1480,170 @@ class TestText(TestData, TestUser, TestCase):
 
         self.assertListEqual(resp_content, [student.to_text_summary_dict(text_two), student.to_text_summary_dict(text_one)])
 
+    def test_text_catalog_pages(self):
+        student = Student.objects.get()
+
+        texts = [self.create_text(diff_data={'title': f'text {i}'}) for i in range(3)]
+
+        def get_texts(params: AnyStr, **headers):
+            resp = self.student.get(f'/api/text?{params}', **headers)
+
+            self.assertIn(resp.status_code, [200, 304])
+
+            return resp, json.loads(gzip.decompress(resp.content).decode('utf8')) if resp.status_code == 200 else None
+
+        resp, first_page = get_texts('difficulty=intermediate_mid&limit=2')
+
+        self.assertListEqual([text['id'] for text in first_page], [texts[2].pk, texts[1].pk])
+
+        next_url = resp['Link'][1:resp['Link'].index('>')]
+
+        self.assertIn('difficulty=intermediate_mid', next_url)
+
+        resp, second_page = get_texts(next_url[next_url.index('?') + 1:])
+
+        self.assertListEqual([text['id'] for text in second_page], [texts[0].pk])
+        self.assertFalse(resp.has_header('Link'))
+
+        # unpaged, the whole catalog is returned in the same order
+        resp, catalog = get_texts('')
+
+        self.assertListEqual(catalog, first_page + second_page)
+
+        # an unchanged catalog isn't serialized again
+        with self.assertNumQueries(7):
+            not_modified, _ = get_texts('', HTTP_IF_NONE_MATCH=resp['ETag'])
+
+        self.assertEquals(not_modified.status_code, 304)
+        self.assertEquals(not_modified['ETag'], resp['ETag'])
+
+        # the student's readings are part of their catalog
+        StudentTextReading.start(student=student, text=texts[0])
+
+        modified, catalog = get_texts('', HTTP_IF_NONE_MATCH=resp['ETag'])
+
+        self.assertEquals(modified.status_code, 200)
+        self.assertNotEquals(modified['ETag'], resp['ETag'])
+
+        self.assertEquals(self.student.get('/api/text?cursor=notacursor').status_code, 400)
+        self.assertEquals(self.student.get('/api/text?limit=0').status_code, 400)
+
+    def test_text_search(self):
+        def section_data(body: AnyStr) -> List[Dict]:
+            return [dict(self.gen_text_section_params(0), body=body)]
+
+        texts = [
+            self.create_text(diff_data={'title': 'Кошки', 'text_sections': section_data(
+                '<p>Кошка спит. Кошки любят молоко.</p>')}),
+            self.create_text(diff_data={'title': 'Собаки', 'text_sections': section_data(
+                '<p>Собака спит на диване.</p>')}),
+            self.create_text(diff_data={'title': 'Животные', 'difficulty': 'advanced_low',
+                                        'text_sections': section_data('<p>Кошка и собака.</p>')}),
+        ]
+
+        # texts are indexed as they're saved, and the query's words are lemmatized like the texts' words
+        self.assertListEqual([text_pk for text_pk, _ in TextSearchDocument.search('кошек')],
+                             [texts[0].pk, texts[2].pk])
+
+        # words of the title count for more
+        self.assertListEqual([text_pk for text_pk, _ in TextSearchDocument.search('собакой')],
+                             [texts[1].pk, texts[2].pk])
+
+        self.assertListEqual(TextSearchDocument.search('слон'), [])
+
+        with self.assertNumQueries(4):
+            TextSearchDocument.search('кошка спит', texts=Text.objects.filter(difficulty__slug='intermediate_mid'))
+
+        def search(params: AnyStr) -> List[int]:
+            resp = self.student.get(f'/api/text?{params}')
+
+            self.assertEquals(resp.status_code, 200)
+
+            return [text['id'] for text in json.loads(gzip.decompress(resp.content).decode('utf8'))]
+
+        self.assertListEqual(search('q=кошек'), [texts[0].pk, texts[2].pk])
+        self.assertListEqual(search('q=кошек&difficulty=intermediate_mid'), [texts[0].pk])
+        self.assertListEqual(search('q=кошек&limit=1'), [texts[0].pk])
+
+        # only the part of a text that changed is indexed again
+        text_section = texts[2].sections.get()
+        text_section.body = '<p>Только собака.</p>'
+        text_section.save()
+
+        self.assertDictEqual(TextSearchDocument.index_text(texts[2]), {'indexed': 1, 'unchanged': 1})
+
+        # unchanged parts aren't tokenized
+        with mock.patch('text.search.tokenize') as title_tokenize, \
+                mock.patch.object(TextSectionTokens, 'for_section') as for_section:
+            self.assertDictEqual(TextSearchDocument.index_text(texts[0]), {'indexed': 0, 'unchanged': 2})
+
+        title_tokenize.assert_not_called()
+        for_section.assert_not_called()
+
+        self.assertListEqual(search('q=кошек'), [texts[0].pk])
+
+        out = io.StringIO()
+
+        call_command('index_texts', '--rebuild', stdout=out)
+
+        self.assertIn('Indexed 6 parts of texts (0 unchanged)', out.getvalue())
+
+    def test_text_facets(self):
+        student = Student.objects.get()
+
+        facet_cache = get_text_facet_cache()
+        facet_cache.clear()
+
+        texts = [
+            self.create_text(diff_data={'tags': ['Sports']}),
+            self.create_text(diff_data={'tags': ['Sports', 'Other'], 'difficulty': 'advanced_low'}),
+        ]
+
+        hidden_text = self.create_text(diff_data={'tags': ['Other']})
+        hidden_text.tags.add(Tag.objects.get_or_create(name='Hidden')[0])
+
+        def get_facets(client: Client) -> Dict:
+            resp = client.get('/api/text?facets')
+
+            self.assertEquals(resp.status_code, 200)
+
+            return json.loads(resp.content.decode('utf8'))
+
+        facets = get_facets(self.student)
+
+        self.assertEquals(facets['difficulty']['intermediate_mid'], 1)
+        self.assertEquals(facets['difficulty']['advanced_low'], 1)
+        self.assertEquals(facets['difficulty']['advanced_mid'], 0)
+
+        self.assertEquals(facets['tag']['Sports'], 2)
+        self.assertEquals(facets['tag']['Other'], 1)
+        self.assertNotIn('Hidden', facets['tag'])
+
+        self.assertDictEqual(facets['status'], {'unread': 2, 'in_progress': 0, 'read': 0})
+
+        # instructors see the hidden text
+        self.assertEquals(get_facets(self.instructor)['tag']['Other'], 2)
+
+        # an unchanged catalog is only asked for its versions
+        with self.assertNumQueries(3):
+            TextAPIView().get_text_facets(student)
+
+        self.assertEquals(facet_cache.stats, {'hits': 2, 'misses': 4})
+
+        # a reading only recounts the student's statuses
+        StudentTextReading.start(student=student, text=texts[0])
+
+        self.assertDictEqual(get_facets(self.student)['status'], {'unread': 1, 'in_progress': 1, 'read': 0})
+        self.assertEquals(facet_cache.stats, {'hits': 3, 'misses': 5})
+
+        # a text saved recounts both
+        self.create_text(diff_data={'tags': ['Sports']})
+
+        facets = get_facets(self.student)
+
+        self.assertEquals(facets['tag']['Sports'], 3)
+        self.assertEquals(facets['status']['unread'], 2)
+
     def test_put_text(self):
 
         test_data = self.get_test_data()
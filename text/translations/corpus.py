@@ -0,0 +1,95 @@
+from typing import AnyStr, Dict, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from text.models import TextSection
+from text.phrase.models import TextPhrase
+from text.translations import morphology
+from text.translations.models import TextWord
+from text.translations.morphology import MorphologyService, get_morphology_service
+from text.translations.tokens import TextSectionTokens, Token, body_to_text, split_sentences, tokenize
+from text.yandex.api.lookup import AsyncYandexDefinitionLookup
+
+grammeme_fields = ['pos', 'tense', 'aspect', 'form', 'mood', 'lemma']
+
+
+def init_worker():
+    # a fresh analyzer per worker process rather than one inherited from the parent
+    morphology.morphology_service = MorphologyService.from_settings()
+
+
+def analyse_body(text_section_pk: int, body: AnyStr) -> Tuple[int, List[Token], List[AnyStr], Dict[AnyStr, Dict]]:
+    """
+    Tokenizes a section's body, splits its sentences and parses its distinct words.  Runs in a worker process, so it
+    doesn't touch the database.
+    """
+    text = body_to_text(body)
+
+    tokens = list(tokenize(text))
+
+    return (text_section_pk, tokens, split_sentences(text),
+            get_morphology_service().parse_many(token.token for token in tokens))
+
+
+class CorpusWriter(object):
+    """
+    Writes the analysis of sections made by worker processes.  All writes go through this one writer (so through one
+    database connection) and dictionary lookups through its one rate limited client.
+    """
+    def __init__(self, definitions_lookup: AsyncYandexDefinitionLookup, dictionary_mode: Optional[AnyStr] = None):
+        self.definitions_lookup = definitions_lookup
+        self.dictionary_mode = dictionary_mode
+
+    def write(self, text_section: TextSection, body: AnyStr, tokens: List[Token], sentences: List[AnyStr],
+              parsed_words: Dict[AnyStr, Dict]) -> Dict[AnyStr, int]:
+        """
+        Stores the section's tokens and sentences, then creates its words if it has none (looking up their
+        definitions), or updates the grammemes of its words that parse differently now and the sentence index of
+        words that don't have one.
+
+        :return: counts of the words created and re-lemmatized
+        """
+        TextSectionTokens.store(text_section.pk, body, tokens, sentences)
+
+        counts = {'created': 0, 'relemmatized': 0}
+
+        text_words = list(TextWord.objects.filter(text_section=text_section).values_list(
+            'pk', 'phrase', 'instance', 'sentence_index', *grammeme_fields))
+
+        if not text_words:
+            # looked up before the transaction so the database isn't locked while waiting on the network
+            word_data, _ = text_section.parse_word_definitions(dictionary_mode=self.dictionary_mode,
+                                                               parsed_words=parsed_words,
+                                                               definitions_lookup=self.definitions_lookup)
+
+            with transaction.atomic():
+                counts['created'] = len(TextWord.bulk_create_from_word_data(text_section, word_data))
+
+                TextSection.objects.filter(pk=text_section.pk).update(translation_service_processed=1,
+                                                                       modified_dt=timezone.now())
+        else:
+            changed = []
+            resentenced = []
+
+            word_sentences = text_section.word_sentences
+
+            for pk, phrase, instance, sentence_index, *grammemes in text_words:
+                new_grammemes = parsed_words.get(phrase)
+
+                if new_grammemes and [new_grammemes[field] for field in grammeme_fields] != grammemes:
+                    changed.append(TextPhrase(pk=pk, **new_grammemes))
+
+                if sentence_index != word_sentences.get((phrase, instance)):
+                    resentenced.append(TextPhrase(pk=pk, sentence_index=word_sentences.get((phrase, instance))))
+
+            with transaction.atomic():
+                TextPhrase.objects.bulk_update(changed, grammeme_fields, batch_size=500)
+                TextPhrase.objects.bulk_update(resentenced, ['sentence_index'], batch_size=500)
+
+            counts['relemmatized'] = len(changed)
+
+        if counts['created'] or counts['relemmatized']:
+            text_section.bump_content_version()
+
+        return counts
@@ -0,0 +1,81 @@
+import json
+
+from typing import AnyStr, Dict, Iterable, List
+
+from django.conf import settings
+from django.db import models
+
+from text.yandex.api.definition import YandexDefinitions
+
+DEFAULT_TRANSLATION_DICTIONARY = {
+    # 'online' only uses the dictionary API, 'offline_first' uses imported dictionaries and the API for lemmas they
+    # don't have, 'offline' only uses imported dictionaries
+    'MODE': 'online',
+}
+
+dictionary_modes = ['online', 'offline_first', 'offline']
+
+
+class DictionaryEntry(models.Model):
+    """
+    A lemma's definitions from an imported bilingual dictionary, stored in the same shape as a dictionary API lookup
+    so they're read the same way.
+    """
+    class Meta:
+        verbose_name_plural = 'Dictionary Entries'
+        unique_together = (('lemma', 'from_lang', 'to_lang'),)
+
+    lemma = models.CharField(max_length=255)
+
+    from_lang = models.CharField(max_length=8)
+    to_lang = models.CharField(max_length=8)
+
+    # the 'def' list of a lookup response, as JSON
+    definitions = models.TextField()
+
+    # the name of the import this entry came from
+    source = models.CharField(max_length=255, blank=True)
+
+    modified_dt = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.lemma} ({self.from_lang}-{self.to_lang})'
+
+    @classmethod
+    def mode(cls) -> AnyStr:
+        return getattr(settings, 'TRANSLATION_DICTIONARY', DEFAULT_TRANSLATION_DICTIONARY)['MODE']
+
+    @classmethod
+    def to_definitions(cls, lemma: AnyStr, translations: List[Dict]) -> List[Dict]:
+        """
+        The 'def' list for a lemma's translations, each a dict with a 'text' and optionally a 'pos'.
+        """
+        definitions = dict()
+
+        for translation in translations:
+            pos = translation.get('pos')
+
+            definitions.setdefault(pos, {'text': lemma, 'tr': []})
+
+            if pos:
+                definitions[pos]['pos'] = pos
+
+            definitions[pos]['tr'].append(dict(translation))
+
+        return list(definitions.values())
+
+    @classmethod
+    def lookup_many(cls, lemmas: Iterable[AnyStr], from_lang: AnyStr, to_lang: AnyStr,
+                    batch_size: int = 500) -> Dict[AnyStr, YandexDefinitions]:
+        lemmas = list(dict.fromkeys(lemmas))
+
+        definitions = dict()
+
+        for i in range(0, len(lemmas), batch_size):
+            for lemma, entry_definitions in cls.objects.filter(
+                    lemma__in=lemmas[i:i+batch_size], from_lang=from_lang, to_lang=to_lang).values_list(
+                    'lemma', 'definitions'):
+                definitions[lemma] = YandexDefinitions(from_lang=from_lang, to_lang=to_lang, phrase=lemma,
+                                                       definitions=json.loads(entry_definitions))
+
+        return definitions
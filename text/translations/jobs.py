@@ -0,0 +1,219 @@
+from typing import AnyStr, Dict, Optional
+
+from django.conf import settings
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+
+DEFAULT_TRANSLATION_JOBS = {
+    # seconds
+    'LEASE': 60 * 10,
+    'MAX_ATTEMPTS': 5,
+    # seconds before the first retry, doubled on each retry
+    'BACKOFF': 60,
+    'MAX_BACKOFF': 60 * 60,
+    # lemmas looked up between reports of progress (each of which extends the lease)
+    'BATCH_SIZE': 100,
+}
+
+translation_job_kinds = [
+    ('parse', 'Parse all words'),
+    ('update', 'Update words after an edit'),
+]
+
+translation_job_statuses = [
+    ('pending', 'Pending'),
+    ('leased', 'Leased'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+]
+
+
+class TranslationJobLeaseLost(Exception):
+    pass
+
+
+class TranslationJob(models.Model):
+    """
+    Translation work for a text section, kept in the database so it survives the channel layer going away.  Workers
+    lease the highest priority job that's due, and a job whose lease expires (e.g. its worker died) can be leased
+    again.  Failed jobs are retried with exponential backoff until they run out of attempts.
+    """
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after_dt']),
+        ]
+
+    text_section = models.ForeignKey('text.TextSection', related_name='translation_jobs', on_delete=models.CASCADE)
+
+    kind = models.CharField(max_length=8, choices=translation_job_kinds, default='parse')
+    status = models.CharField(max_length=8, choices=translation_job_statuses, default='pending')
+
+    # the section's body before the edit, for 'update' jobs
+    old_body = models.TextField(null=True, blank=True)
+
+    priority = models.IntegerField(default=0)
+    attempts = models.IntegerField(default=0)
+
+    lease_owner = models.CharField(max_length=255, null=True, blank=True)
+    lease_expires_dt = models.DateTimeField(null=True, blank=True)
+
+    run_after_dt = models.DateTimeField(default=timezone.now)
+
+    words_total = models.IntegerField(default=0)
+    words_done = models.IntegerField(default=0)
+
+    last_error = models.TextField(null=True, blank=True)
+
+    created_dt = models.DateTimeField(auto_now_add=True)
+    modified_dt = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.kind} job for text section pk={self.text_section_id} ({self.status})'
+
+    @classmethod
+    def config(cls) -> Dict:
+        return dict(DEFAULT_TRANSLATION_JOBS, **getattr(settings, 'TRANSLATION_JOBS', {}))
+
+    @classmethod
+    def enqueue(cls, text_section, kind: AnyStr = 'parse', old_body: Optional[AnyStr] = None,
+                priority: int = 0) -> 'TranslationJob':
+        """
+        Queues work for a section, folding it into a job that's still pending: a pending parse covers any update, and
+        a pending update keeps the oldest body so it diffs against what the section's words were built from.
+        """
+        pending_jobs = cls.objects.filter(text_section=text_section, status='pending')
+
+        job = pending_jobs.filter(kind='parse').first()
+
+        if job is None and kind == 'update':
+            job = pending_jobs.filter(kind='update').first()
+
+        if job is None:
+            return cls.objects.create(text_section=text_section, kind=kind, old_body=old_body, priority=priority)
+
+        if priority > job.priority:
+            cls.objects.filter(pk=job.pk).update(priority=priority)
+
+            job.priority = priority
+
+        if kind == 'parse' and job.kind == 'update':
+            cls.objects.filter(pk=job.pk).update(kind='parse', old_body=None)
+
+            job.kind, job.old_body = 'parse', None
+
+        return job
+
+    @classmethod
+    def lease(cls, owner: AnyStr, lease_seconds: Optional[int] = None) -> Optional['TranslationJob']:
+        """
+        Leases the next job that's due.  The lease is taken with a conditional update, so when workers race for the
+        same job only one of them gets it.
+        """
+        now = timezone.now()
+
+        lease_expires_dt = now + timezone.timedelta(seconds=lease_seconds or cls.config()['LEASE'])
+
+        due = cls.objects.filter(Q(status='pending', run_after_dt__lte=now) |
+                                 Q(status='leased', lease_expires_dt__lt=now))
+
+        for job in due.order_by('-priority', 'run_after_dt', 'pk')[:10]:
+            leased = cls.objects.filter(pk=job.pk, status=job.status, lease_owner=job.lease_owner,
+                                        lease_expires_dt=job.lease_expires_dt).update(
+                status='leased', lease_owner=owner, lease_expires_dt=lease_expires_dt, attempts=F('attempts') + 1)
+
+            if leased:
+                job.refresh_from_db()
+
+                return job
+
+        return None
+
+    def owned(self) -> models.QuerySet:
+        return TranslationJob.objects.filter(pk=self.pk, status='leased', lease_owner=self.lease_owner)
+
+    def progress(self, words_done: int, words_total: Optional[int] = None,
+                 lease_seconds: Optional[int] = None) -> bool:
+        """
+        Records progress and extends the lease.
+
+        :return: False if the lease was lost
+        """
+        self.words_done = words_done
+        self.words_total = self.words_total if words_total is None else words_total
+
+        self.lease_expires_dt = timezone.now() + timezone.timedelta(seconds=lease_seconds or self.config()['LEASE'])
+
+        return bool(self.owned().update(words_done=self.words_done, words_total=self.words_total,
+                                         lease_expires_dt=self.lease_expires_dt, modified_dt=timezone.now()))
+
+    def complete(self) -> bool:
+        self.status = 'done'
+
+        return bool(self.owned().update(status='done', lease_owner=None, lease_expires_dt=None, last_error=None,
+                                        words_done=F('words_total'), modified_dt=timezone.now()))
+
+    def backoff(self) -> timezone.timedelta:
+        config = self.config()
+
+        return timezone.timedelta(seconds=min(config['MAX_BACKOFF'], config['BACKOFF'] * (2 ** (self.attempts - 1))))
+
+    def fail(self, error: AnyStr) -> bool:
+        """
+        Gives the job back to be retried after a backoff, or fails it once it's out of attempts.
+        """
+        if self.attempts >= self.config()['MAX_ATTEMPTS']:
+            self.status = 'failed'
+        else:
+            self.status = 'pending'
+
+        return bool(self.owned().update(status=self.status, lease_owner=None, lease_expires_dt=None,
+                                        last_error=str(error), run_after_dt=timezone.now() + self.backoff(),
+                                        modified_dt=timezone.now()))
+
+    def to_status_dict(self) -> Dict:
+        return {
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+            'words_total': self.words_total,
+            'words_done': self.words_done,
+            'run_after': self.run_after_dt.isoformat(),
+            'error': self.last_error,
+        }
+
+    @classmethod
+    def text_status(cls, text) -> Dict:
+        """
+        Translation progress for each of a text's sections, from their latest jobs.
+        """
+        latest_jobs = dict()
+
+        for job in cls.objects.filter(text_section__text=text).order_by('text_section', '-pk'):
+            latest_jobs.setdefault(job.text_section_id, job)
+
+        sections = []
+
+        for text_section in text.sections.order_by('order'):
+            job = latest_jobs.get(text_section.pk)
+
+            if job:
+                section_status = job.to_status_dict()
+            else:
+                # translated before jobs were queued
+                section_status = {'kind': None, 'status': 'done' if text_section.translation_service_processed
+                                  else 'pending', 'attempts': 0, 'words_total': 0, 'words_done': 0,
+                                  'run_after': None, 'error': None}
+
+            sections.append(dict(section_status, order=text_section.order))
+
+        statuses = [section['status'] for section in sections]
+
+        return {
+            'sections': sections,
+            'words_total': sum(section['words_total'] for section in sections),
+            'words_done': sum(section['words_done'] for section in sections),
+            'done': statuses.count('done'),
+            'failed': statuses.count('failed'),
+            'complete': all(status == 'done' for status in statuses),
+        }
@@ -1,18 +1,19 @@
 import logging
 
-import re
-import pymorphy2
-
-from lxml.html import fragment_fromstring
-
-from typing import Dict, AnyStr, List
+from collections import Counter
+from typing import Callable, Dict, AnyStr, Iterable, List, Optional, Tuple
 
 from django.db import models
 from django.utils.functional import cached_property
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
-from text.yandex.api.definition import YandexDefinitionAPI, YandexThrottlingException
+from text.yandex.api.definition import YandexDefinitionAPI, YandexDefinitions
+from text.yandex.api.lookup import AsyncYandexDefinitionLookup
+from text.translations.dictionary import DictionaryEntry
+from text.translations.jobs import TranslationJob
+from text.translations.morphology import get_morphology_service
+from text.translations.tokens import Token, TextSectionTokens, body_to_text
 
 logger = logging.getLogger('django')
 
@@ -60,86 +61,174 @@ class TextSectionDefinitionsMixin(models.Model):
     class Meta:
         abstract = True
 
-    word_re = re.compile(r'([^\W\d]+-[^\W\d]+|[^\W\d]+)')
-    morph = pymorphy2.MorphAnalyzer()
     yandex_definitions_api = YandexDefinitionAPI()
     body = NotImplemented
 
     @cached_property
     def body_text(self):
-        return re.sub(r'\s+', ' ', fragment_fromstring(self.body, create_parent='div').text_content())
+        return body_to_text(self.body)
+
+    def _token_index(self) -> Tuple[AnyStr, List[Token], List[AnyStr]]:
+        # read from the stored token index, re-tokenized only when the body has changed
+        body_hash = TextSectionTokens.hash_body(self.body)
+
+        if getattr(self, '_tokens', (None,))[0] != body_hash:
+            self.__dict__.pop('body_text', None)
+
+            self._tokens = (body_hash, *TextSectionTokens.for_section(self))
+
+        return self._tokens
 
     @property
-    def words(self):
-        for word in self.body_text.split():
-            word_match = self.word_re.match(word)
+    def tokens(self) -> List[Token]:
+        return self._token_index()[1]
+
+    @property
+    def sentences(self) -> List[AnyStr]:
+        return self._token_index()[2]
 
-            if word_match:
-                yield word_match.group(0)
-            else:
-                continue
+    @property
+    def word_sentences(self) -> Dict[Tuple[AnyStr, int], int]:
+        """
+        The sentence of each (word, instance), the instance numbered as TextWords are.
+        """
+        word_sentences = dict()
+        seen = dict()
 
-    def update_definitions_if_new(self, old_body: AnyStr):
-        channel_layer = get_channel_layer()
+        for token in self.tokens:
+            instance = seen.get(token.token, 0)
 
-        try:
-            async_to_sync(channel_layer.send)('text', {'type': 'text.section.update.definitions.if.new',
-                                                       'old_body': old_body, 'text_section_pk': self.pk})
-        except OSError:
-            pass
+            word_sentences[(token.token, instance)] = token.sentence
+
+            seen[token.token] = instance + 1
 
-    def update_definitions(self):
+        return word_sentences
+
+    @property
+    def words(self):
+        for token in self.tokens:
+            yield token.token
+
+    def notify_translation_workers(self):
+        # the job is already stored, so if the channel layer is down a worker (or the cron run) picks it up later
         channel_layer = get_channel_layer()
 
         try:
-            async_to_sync(channel_layer.send)('text', {'type': 'text.section.parse.word.definitions',
-                                                       'text_section_pk': self.pk})
+            async_to_sync(channel_layer.send)('text', {'type': 'translation.jobs.run', 'text_section_pk': self.pk})
         except OSError:
             pass
 
-    def parse_word_definitions(self) -> [Dict[AnyStr, List], Dict[AnyStr, int]]:
-        words = {}
-        word_freq = {}
-        seen_translations = {}
+    def update_definitions_if_new(self, old_body: AnyStr):
+        TranslationJob.enqueue(self, kind='update', old_body=old_body)
 
-        num_of_words = len(list(self.words))
+        self.notify_translation_workers()
 
-        for i, word in enumerate(self.words):
-            translations = None
+    def update_definitions(self, priority: int = 0):
+        TranslationJob.enqueue(self, kind='parse', priority=priority)
 
-            word_freq.setdefault(word, 0)
-            word_freq[word] += 1
+        self.notify_translation_workers()
 
-            parsed_word = self.morph.parse(word)[0]
+    def lookup_definitions(self, lemmas: Iterable[AnyStr],
+                           definitions_lookup: Optional[AsyncYandexDefinitionLookup] = None
+                           ) -> Dict[AnyStr, Optional[YandexDefinitions]]:
+        """
+        :param definitions_lookup: a client shared between calls (e.g. across a batch of sections), otherwise one is
+                                   opened for this call
+        """
+        if definitions_lookup is not None:
+            return async_to_sync(definitions_lookup.lookup_many)(lemmas)
 
-            if word in seen_translations:
-                translations = seen_translations[word]
-            else:
-                try:
-                    definitions = self.yandex_definitions_api.lookup(parsed_word.normal_form)
+        with AsyncYandexDefinitionLookup(api=self.yandex_definitions_api) as definitions_lookup:
+            definitions = async_to_sync(definitions_lookup.lookup_many)(lemmas)
 
-                    # list of definitions contain list of translations
-                    if definitions and definitions[0].translations:
-                        translations = seen_translations[word] = definitions[0].translations
+            logger.info(f'Retrieved definitions for {len(definitions)} lemmas '
+                        f'({definitions_lookup.stats["requests"]} requests, '
+                        f'{definitions_lookup.stats["cached"]} cached).')
 
-                    logger.info(f'Retrieved translation for word {i+1} out of {num_of_words}.')
-                except YandexThrottlingException as e:
-                    logger.error(f'YandexThrottlingException {e.message}')
+        return definitions
 
-            words.setdefault(word, [])
+    def find_definitions(self, lemmas: Iterable[AnyStr], dictionary_mode: Optional[AnyStr] = None,
+                         definitions_lookup: Optional[AsyncYandexDefinitionLookup] = None
+                         ) -> Dict[AnyStr, Optional[YandexDefinitions]]:
+        """
+        Definitions for each lemma from imported dictionaries, the dictionary API, or both (see
+        DictionaryEntry.mode()).
+        """
+        dictionary_mode = dictionary_mode or DictionaryEntry.mode()
 
-            word_data = dict()
+        lemmas = list(dict.fromkeys(lemmas))
 
-            word_data['grammemes'] = {
-                'pos': parsed_word.tag.POS,
-                'tense': parsed_word.tag.tense,
-                'aspect': parsed_word.tag.aspect,
-                'form': parsed_word.tag.case,
-                'mood': parsed_word.tag.mood,
-                'lemma': parsed_word.normal_form
-            }
+        definitions = dict()
+
+        if dictionary_mode in ('offline_first', 'offline'):
+            definitions.update(DictionaryEntry.lookup_many(lemmas, from_lang=self.yandex_definitions_api.from_lang,
+                                                           to_lang=self.yandex_definitions_api.to_lang))
+
+            logger.info(f'Found definitions for {len(definitions)} of {len(lemmas)} lemmas in imported dictionaries.')
+
+        misses = [lemma for lemma in lemmas if lemma not in definitions]
 
-            word_data['translations'] = []
+        if misses and dictionary_mode != 'offline':
+            definitions.update(self.lookup_definitions(misses, definitions_lookup=definitions_lookup))
+
+        return definitions
+
+    def build_word_data(self, words: Iterable[AnyStr], dictionary_mode: Optional[AnyStr] = None,
+                        parsed_words: Optional[Dict[AnyStr, Dict]] = None,
+                        definitions_lookup: Optional[AsyncYandexDefinitionLookup] = None,
+                        progress: Optional[Callable[[int, int], None]] = None) -> Dict[AnyStr, Dict]:
+        """
+        The grammemes and translations of each distinct word, from one morphological parse (unless parsed_words are
+        given) and one dictionary lookup per distinct lemma.
+
+        :param progress: called with (words done, words) once the words are parsed and after each batch of lemmas is
+                         looked up (see TRANSLATION_JOBS['BATCH_SIZE'])
+        """
+        words = list(words)
+
+        if parsed_words is None:
+            parsed_words = get_morphology_service().parse_many(words)
+
+        if progress is None:
+            lemma_definitions = self.find_definitions((grammemes['lemma'] for grammemes in parsed_words.values()),
+                                                      dictionary_mode=dictionary_mode,
+                                                      definitions_lookup=definitions_lookup)
+        else:
+            lemma_definitions = dict()
+
+            lemma_counts = Counter()
+
+            for word, count in Counter(words).items():
+                if word in parsed_words:
+                    lemma_counts[parsed_words[word]['lemma']] += count
+
+            lemmas = list(lemma_counts)
+            batch_size = TranslationJob.config()['BATCH_SIZE']
+
+            words_done = len(words) - sum(lemma_counts.values())
+
+            progress(words_done, len(words))
+
+            for i in range(0, len(lemmas), batch_size):
+                lemma_definitions.update(self.find_definitions(lemmas[i:i+batch_size], dictionary_mode=dictionary_mode,
+                                                               definitions_lookup=definitions_lookup))
+
+                words_done += sum(lemma_counts[lemma] for lemma in lemmas[i:i+batch_size])
+
+                progress(words_done, len(words))
+
+        word_data = {}
+
+        for word, grammemes in parsed_words.items():
+            translations = None
+
+            definitions = lemma_definitions.get(grammemes['lemma'])
+
+            # list of definitions contain list of translations
+            if definitions and definitions[0].translations:
+                translations = definitions[0].translations
+
+            word_data[word] = {'grammemes': grammemes, 'translations': []}
 
             if translations:
                 for j in range(0, 5):
@@ -149,10 +238,30 @@ class TextSectionDefinitionsMixin(models.Model):
                         if translation.phrase and not translation.phrase.is_english:
                             continue
 
-                        word_data['translations'].append(translation)
+                        word_data[word]['translations'].append(translation)
                     except IndexError:
                         break
 
-            words[word].append(word_data)
+        return word_data
+
+    def parse_word_definitions(self, dictionary_mode: Optional[AnyStr] = None,
+                               **kwargs) -> [Dict[AnyStr, List], Dict[AnyStr, int]]:
+        """
+        :param kwargs: passed to build_word_data()
+        """
+        words = {}
+        word_freq = {}
+
+        section_words = list(self.words)
+
+        word_data = self.build_word_data(section_words, dictionary_mode=dictionary_mode, **kwargs)
+
+        for word in section_words:
+            word_freq.setdefault(word, 0)
+            word_freq[word] += 1
+
+            words.setdefault(word, [])
+
+            words[word].append(dict(word_data[word], grammemes=dict(word_data[word]['grammemes'])))
 
         return words, word_freq
@@ -1,6 +1,10 @@
-from django.db import models
+from typing import AnyStr, Callable, Dict, List, Optional, Sequence, Tuple
 
-from text.phrase.models import TextPhrase
+from django.db import connection, models, transaction
+
+from text.models import TextSection
+from text.phrase.models import TextPhrase, TextPhraseTranslation
+from text.translations.tokens import diff_word_instances
 
 
 class TextWord(TextPhrase):
@@ -8,6 +12,143 @@ class TextWord(TextPhrase):
     def create(cls, **params) -> 'TextWord':
         return TextWord.objects.create(**params)
 
+    @classmethod
+    def bulk_create_from_word_data(cls, text_section: TextSection, word_data: Dict[AnyStr, List[Dict]],
+                                   batch_size: int = 500) -> List[Tuple['TextWord', Dict]]:
+        """
+        Creates the words (and their translations) from TextSection.parse_word_definitions() that the section doesn't
+        have yet, in one transaction.  An instance is numbered by its position in its word's list and only the first
+        translation is correct for context (unless a word instance gives its own 'instance').  Words already in the
+        section, by phrase, instance and lemma, are left as they are.
+
+        :return: (text word, word instance) for each word created
+        """
+        existing = set(TextPhrase.objects.filter(text_section=text_section).values_list('phrase', 'instance', 'lemma'))
+
+        new_words = dict()
+
+        for word in word_data:
+            for i, word_instance in enumerate(word_data[word]):
+                key = (word, word_instance.get('instance', i), word_instance['grammemes'].get('lemma'))
+
+                if key not in existing:
+                    new_words[key] = word_instance
+
+        if not new_words:
+            return []
+
+        word_sentences = text_section.word_sentences
+
+        with transaction.atomic():
+            # multi-table inherited models can't be bulk created, so the phrases and words are inserted separately
+            TextPhrase.objects.bulk_create([
+                TextPhrase(text_section=text_section, phrase=phrase, instance=instance,
+                           sentence_index=word_sentences.get((phrase, instance)), **word_instance['grammemes'])
+                for (phrase, instance, _), word_instance in new_words.items()], batch_size=batch_size)
+
+            phrase_pks = {
+                (phrase, instance, lemma): pk for pk, phrase, instance, lemma in
+                TextPhrase.objects.filter(text_section=text_section).values_list('pk', 'phrase', 'instance', 'lemma')
+            }
+
+            text_words = []
+
+            for key, word_instance in new_words.items():
+                text_word = cls(textphrase_ptr_id=phrase_pks[key], text_section=text_section, phrase=key[0],
+                                instance=key[1], sentence_index=word_sentences.get(key[:2]),
+                                **word_instance['grammemes'])
+
+                text_words.append((text_word, word_instance))
+
+            insert_sql = 'INSERT INTO {table} ({column}) VALUES (%s)'.format(
+                table=connection.ops.quote_name(cls._meta.db_table),
+                column=connection.ops.quote_name(cls._meta.pk.column))
+
+            with connection.cursor() as cursor:
+                for i in range(0, len(text_words), batch_size):
+                    cursor.executemany(insert_sql, [(text_word.pk,) for text_word, _ in text_words[i:i+batch_size]])
+
+            TextPhraseTranslation.objects.bulk_create([
+                TextPhraseTranslation(text_phrase_id=text_word.pk, phrase=translation.phrase.text,
+                                      correct_for_context=(j == 0))
+                for text_word, word_instance in text_words
+                for j, translation in enumerate(word_instance['translations']) if translation.phrase
+            ], batch_size=batch_size)
+
+        return text_words
+
+    @classmethod
+    def update_from_word_diff(cls, text_section: TextSection, old_words: Sequence[AnyStr],
+                              progress: Optional[Callable[[int, int], None]] = None) -> Dict[AnyStr, int]:
+        """
+        Brings the section's words up to date with an edit of its body, from a diff of the old and new words.  The
+        words (and curated translations) of unchanged tokens are kept and renumbered if their instance moved (or moved
+        to another sentence), the words of removed tokens are deleted, and only inserted tokens are parsed and looked
+        up.
+
+        :param progress: passed to build_word_data()
+        :return: counts of the words kept, renumbered, removed and created
+        """
+        word_diff = diff_word_instances(old_words, list(text_section.words))
+
+        word_sentences = text_section.word_sentences
+
+        text_word_pks = dict()
+        text_word_sentences = dict()
+
+        for pk, phrase, instance, sentence_index in cls.objects.filter(text_section=text_section).values_list(
+                'pk', 'phrase', 'instance', 'sentence_index'):
+            text_word_pks.setdefault((phrase, instance), []).append(pk)
+            text_word_sentences[pk] = sentence_index
+
+        renumbered = dict()
+        resentenced = []
+
+        for key, new_instance in word_diff.kept.items():
+            sentence_index = word_sentences.get((key[0], new_instance))
+
+            for pk in text_word_pks.get(key, []):
+                if key[1] != new_instance:
+                    renumbered[pk] = new_instance
+
+                if text_word_sentences[pk] != sentence_index:
+                    resentenced.append(TextPhrase(pk=pk, sentence_index=sentence_index))
+
+        removed = [pk for key in word_diff.removed for pk in text_word_pks.get(key, [])]
+
+        # kept tokens without a word (e.g. never parsed) are created along with the inserted ones
+        new_instances = list(word_diff.inserted) + [
+            (key[0], new_instance) for key, new_instance in word_diff.kept.items() if key not in text_word_pks]
+
+        new_word_data = dict()
+
+        if new_instances:
+            # parsed and looked up before the transaction so the database isn't locked while waiting on the network
+            word_data = text_section.build_word_data((word for word, _ in new_instances), progress=progress)
+
+            for word, instance in new_instances:
+                new_word_data.setdefault(word, []).append(dict(word_data[word], instance=instance))
+
+        with transaction.atomic():
+            cls.objects.filter(pk__in=removed).delete()
+
+            # renumbered through negative instances so no two words share a phrase and instance in between
+            for instance_offset in [-1, 0]:
+                TextPhrase.objects.bulk_update([
+                    TextPhrase(pk=pk, instance=(-new_instance + instance_offset if instance_offset else new_instance))
+                    for pk, new_instance in renumbered.items()], ['instance'], batch_size=500)
+
+            TextPhrase.objects.bulk_update(resentenced, ['sentence_index'], batch_size=500)
+
+            created = cls.bulk_create_from_word_data(text_section, new_word_data) if new_word_data else []
+
+        return {
+            'kept': len([key for key in word_diff.kept if key in text_word_pks]),
+            'renumbered': len(renumbered),
+            'removed': len(removed),
+            'created': len(created),
+        }
+
     def to_dict(self):
         text_word_dict = super(TextWord, self).to_dict()
 
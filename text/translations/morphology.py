@@ -0,0 +1,93 @@
+from typing import AnyStr, Dict, Iterable
+
+import pymorphy2
+
+from django.conf import settings
+
+from text.cache.backends import LRUCacheBackend
+
+DEFAULT_MORPHOLOGY = {
+    # surface forms
+    'MAX_SIZE': 50000,
+}
+
+
+class MorphologyService(object):
+    """
+    Wraps pymorphy2's analyzer with a bounded LRU of surface form -> grammemes of its most probable parse, so words
+    repeated within a section, or across sections parsed by the same process, are only analysed once.
+    """
+    def __init__(self, max_size: int = DEFAULT_MORPHOLOGY['MAX_SIZE']):
+        self.analyzer = pymorphy2.MorphAnalyzer()
+
+        self.backend = LRUCacheBackend(max_size=max_size)
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> 'MorphologyService':
+        config = getattr(settings, 'MORPHOLOGY', DEFAULT_MORPHOLOGY)
+
+        return cls(max_size=config['MAX_SIZE'])
+
+    def analyse(self, word: AnyStr) -> Dict:
+        parsed_word = self.analyzer.parse(word)[0]
+
+        return {
+            'pos': parsed_word.tag.POS,
+            'tense': parsed_word.tag.tense,
+            'aspect': parsed_word.tag.aspect,
+            'form': parsed_word.tag.case,
+            'mood': parsed_word.tag.mood,
+            'lemma': parsed_word.normal_form
+        }
+
+    def parse(self, word: AnyStr) -> Dict:
+        """
+        :return: the grammemes (as in TextPhraseGrammemes) of word's most probable parse
+        """
+        grammemes = self.backend.get(word)
+
+        if grammemes is None:
+            self.misses += 1
+
+            grammemes = self.analyse(word)
+
+            self.backend.set(word, grammemes)
+        else:
+            self.hits += 1
+
+        return dict(grammemes)
+
+    def parse_many(self, words: Iterable[AnyStr]) -> Dict[AnyStr, Dict]:
+        """
+        Parses each distinct word once.
+        """
+        return {word: self.parse(word) for word in dict.fromkeys(words)}
+
+    def lemma(self, word: AnyStr) -> AnyStr:
+        return self.parse(word)['lemma']
+
+    def clear(self):
+        self.backend.clear()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.backend),
+                'max_size': self.backend.max_size}
+
+
+morphology_service = None
+
+
+def get_morphology_service() -> MorphologyService:
+    global morphology_service
+
+    if morphology_service is None:
+        morphology_service = MorphologyService.from_settings()
+
+    return morphology_service
@@ -0,0 +1,181 @@
+import difflib
+import hashlib
+import json
+import re
+
+from collections import namedtuple
+from typing import AnyStr, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from django.db import models
+from lxml.html import fragment_fromstring
+
+Token = namedtuple('Token', ['token', 'normal', 'offset', 'sentence'])
+WordDiff = namedtuple('WordDiff', ['kept', 'inserted', 'removed'])
+
+word_re = re.compile(r'([^\W\d]+-[^\W\d]+|[^\W\d]+)')
+chunk_re = re.compile(r'\S+')
+sentence_end_re = re.compile(r'[.!?…]+["»”)\]]*$')
+
+
+def body_to_text(body: AnyStr) -> AnyStr:
+    return re.sub(r'\s+', ' ', fragment_fromstring(body, create_parent='div').text_content())
+
+
+def tokenize(text: AnyStr) -> Iterator[Token]:
+    """
+    Tokenizes the text of a section body in one pass.  A token is the word at the start of each whitespace separated
+    chunk (chunks that don't start with a letter have none), its offset is into text, and sentences are counted by
+    chunks ending in terminal punctuation.
+    """
+    sentence = 0
+
+    for chunk in chunk_re.finditer(text):
+        word_match = word_re.match(chunk.group(0))
+
+        if word_match:
+            word = word_match.group(0)
+
+            yield Token(token=word, normal=word.lower(), offset=chunk.start(), sentence=sentence)
+
+        if sentence_end_re.search(chunk.group(0)):
+            sentence += 1
+
+
+def split_sentences(text: AnyStr) -> List[AnyStr]:
+    """
+    The sentences of a section body's text, split the same way tokenize() counts them, so a token's sentence indexes
+    this list.
+    """
+    sentences = []
+
+    start = None
+
+    for chunk in chunk_re.finditer(text):
+        if start is None:
+            start = chunk.start()
+
+        if sentence_end_re.search(chunk.group(0)):
+            sentences.append(text[start:chunk.end()])
+
+            start = None
+
+    if start is not None:
+        sentences.append(text[start:].rstrip())
+
+    return sentences
+
+
+def word_instances(words: Sequence[AnyStr]) -> List[Tuple[AnyStr, int]]:
+    """
+    (word, instance) for each word, the instance counting the word's earlier occurrences as TextWords are numbered.
+    """
+    seen = dict()
+    instances = []
+
+    for word in words:
+        instances.append((word, seen.get(word, 0)))
+
+        seen[word] = seen.get(word, 0) + 1
+
+    return instances
+
+
+def diff_word_instances(old_words: Sequence[AnyStr], new_words: Sequence[AnyStr]) -> WordDiff:
+    """
+    Diffs two bodies' words.
+
+    :return: kept, a dict of (word, old instance) -> new instance for the words in both; inserted, the (word, new
+             instance) only in new_words; removed, the (word, old instance) only in old_words
+    """
+    old_instances = word_instances(old_words)
+    new_instances = word_instances(new_words)
+
+    kept = dict()
+    inserted = []
+    removed = []
+
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            for old_instance, new_instance in zip(old_instances[i1:i2], new_instances[j1:j2]):
+                kept[old_instance] = new_instance[1]
+        else:
+            removed.extend(old_instances[i1:i2])
+            inserted.extend(new_instances[j1:j2])
+
+    return WordDiff(kept=kept, inserted=inserted, removed=removed)
+
+
+class TextSectionTokens(models.Model):
+    """
+    The tokens of a text section's body, stored so they're only computed once per body.  The stored tokens are
+    invalidated by a change in the hash of the body.  The body's sentences are stored along with them so a word's
+    sentence can be read without parsing the body.
+    """
+    text_section = models.OneToOneField('text.TextSection', related_name='token_index', on_delete=models.CASCADE)
+
+    body_hash = models.CharField(max_length=40)
+    num_of_tokens = models.IntegerField(default=0)
+
+    # [[token, normal form, offset, sentence], ...] as JSON
+    tokens = models.TextField()
+
+    # [sentence, ...] as JSON
+    sentences = models.TextField(default='[]')
+
+    @classmethod
+    def hash_body(cls, body: AnyStr) -> AnyStr:
+        return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def for_section(cls, text_section) -> Tuple[List[Token], List[AnyStr]]:
+        """
+        :return: the tokens and sentences of the section's body
+        """
+        body_hash = cls.hash_body(text_section.body)
+
+        if text_section.pk is None:
+            return list(tokenize(text_section.body_text)), split_sentences(text_section.body_text)
+
+        token_index = cls.objects.filter(text_section_id=text_section.pk).first()
+
+        if token_index and token_index.body_hash == body_hash:
+            return token_index.to_tokens(), token_index.to_sentences()
+
+        tokens = list(tokenize(text_section.body_text))
+        sentences = split_sentences(text_section.body_text)
+
+        cls.store(text_section.pk, text_section.body, tokens, sentences)
+
+        return tokens, sentences
+
+    @classmethod
+    def sentences_for_sections(cls, text_sections: Iterable) -> Dict[int, List[AnyStr]]:
+        """
+        The stored sentences of each section, in one query.  Sections whose body changed since they were stored are
+        left out.
+        """
+        body_hashes = {text_section.pk: cls.hash_body(text_section.body) for text_section in text_sections}
+
+        return {
+            text_section_pk: json.loads(sentences) for text_section_pk, body_hash, sentences in
+            cls.objects.filter(text_section_id__in=body_hashes).values_list('text_section_id', 'body_hash',
+                                                                            'sentences')
+            if body_hashes[text_section_pk] == body_hash
+        }
+
+    @classmethod
+    def store(cls, text_section_pk: int, body: AnyStr, tokens: List[Token], sentences: List[AnyStr]):
+        cls.objects.update_or_create(text_section_id=text_section_pk, defaults={
+            'body_hash': cls.hash_body(body),
+            'num_of_tokens': len(tokens),
+            'tokens': json.dumps(tokens, ensure_ascii=False, separators=(',', ':')),
+            'sentences': json.dumps(sentences, ensure_ascii=False, separators=(',', ':'))
+        })
+
+    def to_tokens(self) -> List[Token]:
+        return [Token(*token) for token in json.loads(self.tokens)]
+
+    def to_sentences(self) -> List[AnyStr]:
+        return json.loads(self.sentences)
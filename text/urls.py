@@ -4,7 +4,7 @@ from text.views.template import TextLoadElm, TextView, TextSearchView, TextSearc
 from text.views.api.text import TextAPIView
 from text.views.api.tag import TextTagAPIView
 from text.views.api.lock import TextLockAPIView
-from text.views.api.translations import TextTranslationMatchAPIView
+from text.views.api.translations import TextTranslationMatchAPIView, TextTranslationStatusAPIView
 from text.views.api.text_word.word import TextWordAPIView, TextWordTranslationsAPIView
 from text.views.api.text_word.group import TextWordGroupAPIView
 
@@ -35,6 +35,8 @@ urlpatterns = [
 
     path('api/text/<int:pk>/tag', TextTagAPIView.as_view(), name='text-tag-api'),
     path('api/text/<int:pk>/lock', TextLockAPIView.as_view(), name='text-lock-api'),
+    path('api/text/<int:pk>/translation/status', TextTranslationStatusAPIView.as_view(),
+         name='text-translation-status-api'),
 
     path('text/search/load_elm.js', TextSearchLoadElm.as_view(), name='text-search-load-elm'),
     path('text/search', TextSearchView.as_view(), name='text-search'),
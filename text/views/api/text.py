@@ -1,3 +1,6 @@
+import base64
+import binascii
+import hashlib
 import json
 import gzip
 from logging import BASIC_FORMAT
@@ -8,9 +11,12 @@ from typing import TypeVar, Optional, List, Dict, AnyStr, Union, Set
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.db import IntegrityError, models
 from django.http import HttpResponse, HttpRequest, HttpResponseServerError
-from django.http import HttpResponseNotAllowed
+from django.http import HttpResponseNotAllowed, HttpResponseNotModified
 from django.urls import reverse
 from django.urls import reverse_lazy
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags, quote_etag
 from ereadingtool.views import APIView
 
 from mixins.model import WriteLocked
@@ -19,6 +25,9 @@ from question.models import Question
 
 from text.forms import TextForm, TextSectionForm, ModelForm
 from text.models import TextDifficulty, Text, TextRating, TextSection, text_statuses
+from text.search import TextSearchDocument
+from text.cache.facets import get_text_facet_cache
+from text_reading.state.models import TextReadingStateMachine
 
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
@@ -28,6 +37,37 @@ Student = TypeVar('Student')
 Instructor = TypeVar('Instructor')
 
 
+# the most texts a page of the catalog can have
+max_texts_per_page = 100
+
+
+def encode_cursor(text_summary: Dict) -> AnyStr:
+    """
+    A cursor for the texts after a text in the catalog's order (see TextAPIView.get_texts_queryset()).
+    """
+    return base64.urlsafe_b64encode(json.dumps([text_summary['rating'], text_summary['created_dt'],
+                                                text_summary['id']]).encode('utf-8')).decode('ascii')
+
+
+def after_cursor(cursor: AnyStr) -> models.Q:
+    """
+    :raises ValueError: if the cursor is malformed
+    """
+    try:
+        rating, created_dt, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (TypeError, ValueError, UnicodeError, binascii.Error):
+        raise ValueError(f'invalid cursor {cursor}')
+
+    created_dt = parse_datetime(created_dt) if isinstance(created_dt, str) else None
+
+    if created_dt is None or not isinstance(rating, int) or not isinstance(pk, int):
+        raise ValueError(f'invalid cursor {cursor}')
+
+    return (models.Q(rating__lt=rating) |
+            models.Q(rating=rating, created_dt__lt=created_dt) |
+            models.Q(rating=rating, created_dt=created_dt, pk__lt=pk))
+
+
 def or_filters(filters):
     status_filter = None
 
@@ -157,6 +197,9 @@ class TextAPIView(APIView):
 
         text_section['text_section_form'] = TextSectionForm(instance=text_section_instance, data=text_section_param)
 
+        # validating the form writes the new body onto the instance, so the stored body is kept for the edit's diff
+        text_section['old_body'] = text_section_instance.body if text_section_instance else None
+
         if 'questions' not in text_section_param:
             raise ValidationError(message="'questions' field is required.")
 
@@ -352,6 +395,9 @@ class TextAPIView(APIView):
         if 'difficulties' in request.GET.keys():
             return HttpResponse(json.dumps([(d.slug, d.name) for d in TextDifficulty.objects.all()]))
 
+        if 'facets' in request.GET.keys():
+            return HttpResponse(json.dumps(self.get_text_facets(user)))
+
         valid_difficulties = all(list(map(lambda difficulty: difficulty in all_difficulties, difficulties)))
         valid_tags = all(list(map(lambda tag: tag in all_tags, tags)))
         valid_statuses = all(list(map(lambda status: status in all_statuses, statuses)))
@@ -387,60 +433,167 @@ class TextAPIView(APIView):
         if 'pk' in kwargs:
             return HttpResponse(json.dumps(text.to_dict(text_sections=text_sections)))
         else:
-            texts = [user.to_text_summary_dict(text=txt) for txt in
-                     self.get_texts_queryset(user, set(statuses), filter_by)]
+            etag = self.get_texts_etag(user, request)
+
+            # nothing in the catalog or the user's readings has changed since they last asked
+            if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+
+                return response
+
+            text_queryset = self.get_texts_queryset(user, set(statuses), filter_by)
+
+            next_cursor = None
+
+            query = request.GET.get('q', '').strip()
+
+            try:
+                limit = self.get_texts_limit(request)
+
+                if query and 'cursor' in request.GET:
+                    raise ValueError('search results are ranked, not paged by cursor')
+
+                if 'cursor' in request.GET:
+                    text_queryset = text_queryset.filter(after_cursor(request.GET['cursor']))
+            except ValueError as e:
+                return HttpResponse(json.dumps({'errors': {'text': str(e)}}), status=400)
+
+            if query:
+                # the best matches of the texts the other filters leave, best first
+                ranked_text_pks = [text_pk for text_pk, _ in TextSearchDocument.search(query, texts=text_queryset)]
+                ranked_text_pks = ranked_text_pks[:limit]
+
+                ranks = {text_pk: rank for rank, text_pk in enumerate(ranked_text_pks)}
+
+                texts = sorted(user.to_text_summary_dicts(Text.objects.filter(pk__in=ranked_text_pks)),
+                               key=lambda text_summary: ranks[text_summary['id']])
+            elif limit:
+                texts = user.to_text_summary_dicts(text_queryset[:limit + 1])
+
+                if len(texts) > limit:
+                    texts = texts[:limit]
+
+                    next_cursor = encode_cursor(texts[-1])
+            else:
+                texts = user.to_text_summary_dicts(text_queryset)
 
             zipped_json = gzip.compress(bytes(json.dumps(texts), 'utf-8'))
             response = HttpResponse(zipped_json) 
             response['Content-Encoding'] = 'gzip'
             response['Content-Length'] = len(zipped_json)
+            response['ETag'] = etag
+
+            if next_cursor:
+                next_params = request.GET.copy()
+                next_params['cursor'] = next_cursor
+
+                response['Link'] = f'<{request.path}?{next_params.urlencode()}>; rel="next"'
+
+            # the browser keeps the response but checks it's still current with If-None-Match
+            patch_cache_control(response, private=True, no_cache=True)
 
             return response
 
-    def get_texts_queryset(self, user: Union[Student, Instructor], statuses: Set, filter_by: Dict):
-        all_statuses = dict(text_statuses)
-        subterfuge = {'tags__name__in': ['Hidden']}
-        if 'instructor' in user.login_url:
-            text_queryset = user.text_search_queryset.filter(**filter_by)
-        else:
-            text_queryset = user.text_search_queryset.filter(**filter_by).exclude(**subterfuge)
+    def get_texts_limit(self, request: HttpRequest) -> Optional[int]:
+        """
+        The size of the page of texts asked for.  Pages of the catalog are opt-in, without a limit or cursor it's
+        returned whole.
 
-        # https://stackoverflow.com/questions/16475384/rename-a-dictionary-key
-        view_filter_by = {'text_difficulty_slug' if k == 'difficulty__slug__in' else k:v for k,v in filter_by.items()}
+        :raises ValueError: if the limit isn't a number between 1 and max_texts_per_page
+        """
+        if 'limit' not in request.GET and 'cursor' not in request.GET:
+            return None
 
-        if view_filter_by:
-            view_filter_by['text_difficulty_slug'] = view_filter_by['text_difficulty_slug'][0]
+        limit = int(request.GET.get('limit', max_texts_per_page))
 
-        view_filter_by['student_id'] = user.id
+        if not 0 < limit <= max_texts_per_page:
+            raise ValueError(f'limit must be between 1 and {max_texts_per_page}')
 
-        if statuses == {'unread'}:
-            # (all texts) - (complete U in_progress)
-            all_texts_in_diff = set(Text.objects.filter(**filter_by).all())
+        return limit
 
-            l1 = StudentReadingsComplete.get_texts(view_filter_by)
-            l2 = StudentReadingsInProgress.get_texts(view_filter_by)
+    def get_texts_etag(self, user: Union[Student, Instructor], request: HttpRequest) -> AnyStr:
+        """
+        A strong ETag for the user's view of the catalog with the request's filters and page.
+        """
+        version = f'{Text.catalog_version()}:{user._meta.label}:{user.pk}:{user.text_readings_version}:' \
+                  f'{sorted(request.GET.lists())}'
 
-            # set difference
-            soln_without_tags = all_texts_in_diff - set(l1 + l2)
+        return quote_etag(hashlib.sha1(version.encode('utf-8')).hexdigest())
 
-            return soln_without_tags.intersection(text_queryset)
+    def get_text_facets(self, user: Union[Student, Instructor]) -> Dict:
+        """
+        How many of the texts the user can see there are of each difficulty, tag and status of their readings, for
+        showing next to the catalog's filters.  The counts are cached until the catalog or the user's readings change
+        (see TextFacetCache), so an unchanged catalog costs the three queries of its versions.
+        """
+        facet_cache = get_text_facet_cache()
 
-        elif 'read' in statuses:
-            # trim down the filter by here so that it works for just difficulty, then do the intersection of the sets later
-            without_tags = StudentReadingsComplete.get_texts(view_filter_by)
-            all_texts_in_diff = set(Text.objects.filter(**filter_by).all())
+        catalog_version = Text.catalog_version()
 
-            return all_texts_in_diff.intersection(without_tags)
+        def count_catalog() -> Dict:
+            texts = self.get_texts_queryset(user, set(), {}).order_by().values('pk')
 
-        # Note that texts can be completed but still shown as in_progress
-        elif 'in_progress' in statuses:
-            without_tags = StudentReadingsInProgress.get_texts(view_filter_by)
-            all_texts_in_diff = set(Text.objects.filter(**filter_by).all())
+            difficulties = {difficulty: 0 for difficulty in TextDifficulty.difficulty_keys()}
+            tags = {tag.name: 0 for tag in Text.tag_choices()}
 
-            return all_texts_in_diff.intersection(without_tags)
-        else:
-            return Text.objects.filter(**filter_by)
+            difficulties.update(Text.objects.filter(pk__in=texts).order_by().values('difficulty__slug').annotate(
+                num_of_texts=models.Count('pk')).values_list('difficulty__slug', 'num_of_texts'))
+
+            tags.update(Text.tags.through.objects.filter(text__in=texts).order_by().values('tag__name').annotate(
+                num_of_texts=models.Count('text')).values_list('tag__name', 'num_of_texts'))
+
+            if 'instructor' not in user.login_url:
+                tags.pop('Hidden', None)
+
+            return {'difficulty': difficulties, 'tag': tags}
+
+        def count_statuses() -> Dict:
+            # counted with the same filters the catalog applies, so a count is what filtering on its status returns
+            return {status: self.get_texts_queryset(user, {status}, {}).count() for status, _ in text_statuses}
+
+        audience = 'instructor' if 'instructor' in user.login_url else 'student'
+
+        return dict(facet_cache.catalog_counts(audience, catalog_version, count_catalog),
+                    status=facet_cache.status_counts(f'{user._meta.label}:{user.pk}', catalog_version,
+                                                     user.text_readings_version, count_statuses))
+
+    def get_texts_queryset(self, user: Union[Student, Instructor], statuses: Set, filter_by: Dict) -> models.QuerySet:
+        """
+        The texts matching filter_by and any of the statuses of the user's readings, as one query.  A text can be both
+        in progress and read (e.g. when it's being read again).  They're ordered by rating, then newest first, which
+        is the order the catalog's cursors page through.
+        """
+        state_cls = TextReadingStateMachine
+
+        text_queryset = Text.objects.filter(**{k: v for k, v in filter_by.items() if k != 'tags__name__in'})
+
+        if 'tags__name__in' in filter_by:
+            # a subquery rather than a join, so a text with more than one of the tags is only returned once
+            text_queryset = text_queryset.filter(
+                pk__in=Text.objects.filter(tags__name__in=filter_by['tags__name__in']).values('pk'))
+
+        if 'instructor' not in user.login_url:
+            text_queryset = text_queryset.exclude(tags__name__in=['Hidden'])
+
+        if statuses:
+            readings = user.text_readings.filter(text=models.OuterRef('pk'))
+
+            text_queryset = text_queryset.annotate(
+                has_readings=models.Exists(readings),
+                has_complete_readings=models.Exists(readings.filter(state=state_cls.complete.name)),
+                has_in_progress_readings=models.Exists(readings.filter(
+                    state__in=[state_cls.intro.name, state_cls.in_progress.name])))
+
+            status_filters = {
+                'unread': models.Q(has_readings=False),
+                'read': models.Q(has_complete_readings=True),
+                'in_progress': models.Q(has_in_progress_readings=True),
+            }
+
+            text_queryset = text_queryset.filter(or_filters([status_filters[status] for status in statuses]))
 
+        return text_queryset.order_by('-rating', '-created_dt', '-pk')
 
     def validate_params(self, text_params: AnyStr, text: Optional['Text'] = None) -> (Dict, Dict, HttpResponse):
         errors = resp = text_sections_params = None
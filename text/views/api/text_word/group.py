@@ -5,6 +5,7 @@ from django.db import transaction
 from django.http import HttpResponse, HttpRequest, HttpResponseServerError, response
 from django.urls import reverse_lazy
 from ereadingtool.views import APIView
+from text.models import TextSection
 from text.translations.group.models import TextWordGroup, TextGroupWord
 from text.translations.models import TextWord
 from text.phrase.models import TextPhrase
@@ -91,6 +92,8 @@ class TextWordGroupAPIView(APIView):
 
                 resp['grouped'] = True
                 resp['section'] = text_group.text_section.order
+
+                TextSection.bump_content_versions([text_group.text_section_id])
         else:
             try:
                 first_text_word_group = text_words[0].group_word.group
@@ -134,6 +137,11 @@ class TextWordGroupAPIView(APIView):
             del(response['translations'])
 
             try:
+                text_section_pks = TextWordGroup.objects.filter(
+                    pk=kwargs['textphrase_ptr_id']).values_list('text_section_id', flat=True)
+
+                TextSection.bump_content_versions(list(text_section_pks))
+
                 rows, deleted = TextWordGroup.objects.filter(pk=kwargs['textphrase_ptr_id']).delete()
                 response['deleted'] = rows > 0
                 response['grouped'] = False
@@ -37,6 +37,8 @@ class TextWordAPIView(APIView):
 
             text_word = TextWord.create(**text_word_add_params)
 
+            TextSection.bump_content_versions([text_word.text_section_id])
+
             text_word_dict = text_word.to_translations_dict()
 
             text_word_dict['id'] = text_word.pk
@@ -71,6 +73,8 @@ class TextWordAPIView(APIView):
                     for grammeme, grammeme_value in updated_grammeme_params.items():
                         setattr(text_phrase, grammeme, grammeme_value)
 
+                    TextSection.bump_content_versions([text_phrase.text_section_id])
+
                 text_word_dict = text_phrase.to_translations_dict()
 
                 text_word_dict['id'] = text_phrase.pk
@@ -95,6 +99,8 @@ class TextWordTranslationsAPIView(APIView):
 
             deleted, deleted_objs = text_phrase_translation.delete()
 
+            TextSection.bump_content_versions([text_phrase_translation.text_phrase.text_section_id])
+
             return HttpResponse(json.dumps({
                 'text_word': text_phrase_translation.text_phrase.child_instance.to_translations_dict(),
                 'translation': text_word_translation_dict,
@@ -132,6 +138,8 @@ class TextWordTranslationsAPIView(APIView):
 
                 text_phrase_translation = TextPhraseTranslation.create(**text_word_add_translation_params)
 
+                TextSection.bump_content_versions([text_phrase.text_section_id])
+
                 return HttpResponse(json.dumps({
                     'text_word': text_phrase.child_instance.to_translations_dict(),
                     'translation': text_phrase_translation.to_dict()
@@ -168,6 +176,8 @@ class TextWordTranslationsAPIView(APIView):
 
                 TextPhraseTranslation.objects.filter(pk=kwargs['tr_pk']).update(**text_translation_update_params)
 
+                TextSection.bump_content_versions([text_phrase_translation.text_phrase.text_section_id])
+
             text_phrase_translation.refresh_from_db()
 
             return HttpResponse(json.dumps({
@@ -3,13 +3,16 @@ import json
 import jsonschema
 
 from django.http import HttpResponse, HttpRequest, HttpResponseServerError
+from django.http import HttpResponseForbidden, HttpResponseNotFound
 from django.urls import reverse_lazy
 from ereadingtool.views import APIView
 
 from django.db import transaction, DatabaseError
 from django.core.exceptions import ObjectDoesNotExist
 
+from text.models import Text, TextSection
 from text.phrase.models import TextPhrase, TextPhraseTranslation
+from text.translations.jobs import TranslationJob
 
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
@@ -60,6 +63,8 @@ class TextTranslationMatchAPIView(APIView):
 
                     text_phrases.append(text_phrase)
 
+            TextSection.bump_content_versions([text_phrase.text_section_id for text_phrase in text_phrases])
+
             response = []
 
             for text_phrase in text_phrases:
@@ -69,3 +74,21 @@ class TextTranslationMatchAPIView(APIView):
 
         except (DatabaseError, ObjectDoesNotExist) as e:
             return HttpResponseServerError(json.dumps({'errors': 'something went wrong'}))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class TextTranslationStatusAPIView(APIView):
+    login_url = reverse_lazy('instructor-login')
+    allowed_methods = ['get']
+
+    @jwt_valid()
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not hasattr(request.user, 'instructor'):
+            return HttpResponseForbidden(json.dumps({'errors': 'instructors only'}))
+
+        try:
+            text = Text.objects.get(pk=kwargs['pk'])
+        except Text.DoesNotExist:
+            return HttpResponseNotFound(json.dumps({'errors': f"text {kwargs['pk']} does not exist"}))
+
+        return HttpResponse(json.dumps(TranslationJob.text_status(text)), status=200)
@@ -4,6 +4,7 @@ import json
 from django.conf import settings
 
 from text.yandex.api.base import YandexAPI
+from text.yandex.models import YandexDefinitionCache
 
 from text.yandex.exceptions import *
 
@@ -156,9 +157,17 @@ class YandexDefinitionAPI(YandexAPI):
     def lookup(self, phrase: AnyStr) -> Union[YandexDefinitions, None]:
         definitions = None
 
-        resp = self.request(uri=self.yandex_definition_uri, method='lookup', params={
-            'text': phrase
-        })
+        cached = YandexDefinitionCache.get(lemma=phrase, from_lang=self.from_lang, to_lang=self.to_lang)
+
+        if cached:
+            resp = cached.to_response()
+        else:
+            resp = self.request(uri=self.yandex_definition_uri, method='lookup', params={
+                'text': phrase
+            })
+
+            YandexDefinitionCache.set(lemma=phrase, from_lang=self.from_lang, to_lang=self.to_lang,
+                                      definitions=resp.get('def'))
 
         if 'def' in resp:
             definitions = YandexDefinitions(
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import random
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import AnyStr, Dict, Iterable, Optional
+
+import requests
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from text.yandex.api.definition import YandexDefinitionAPI, YandexDefinitions
+from text.yandex.exceptions import *
+from text.yandex.models import YandexDefinitionCache
+from text.yandex.ratelimit import TokenBucket
+
+logger = logging.getLogger('django.consumers')
+
+DEFAULT_DEFINITION_LOOKUP = {
+    'MAX_CONCURRENCY': 4,
+    'MAX_RETRIES': 4,
+    # seconds, doubled on each retry
+    'BACKOFF': 1.0,
+    'MAX_BACKOFF': 30.0,
+}
+
+
+class AsyncYandexDefinitionLookup(object):
+    """
+    Looks up many lemmas at once.  Requests run in a bounded pool over a keep-alive session, each one waiting on the
+    API's rate limiter, and are retried with exponential backoff when Yandex throttles or fails.  Concurrent lookups
+    of the same lemma share one request, and the lemma cache is read and written as in YandexDefinitionAPI.lookup().
+    """
+    retry_status_codes = (429, 500, 502, 503, 504)
+
+    def __init__(self, api: Optional[YandexDefinitionAPI] = None, rate_limiter: Optional[TokenBucket] = None,
+                 max_concurrency: Optional[int] = None, max_retries: Optional[int] = None,
+                 backoff: Optional[float] = None, max_backoff: Optional[float] = None, use_cache: bool = True):
+        config = dict(DEFAULT_DEFINITION_LOOKUP, **getattr(settings, 'YANDEX_DEFINITION_LOOKUP', {}))
+
+        self.api = api or YandexDefinitionAPI()
+        self.rate_limiter = rate_limiter or self.api.rate_limiter
+
+        self.max_concurrency = max_concurrency or config['MAX_CONCURRENCY']
+        self.max_retries = config['MAX_RETRIES'] if max_retries is None else max_retries
+        self.backoff = config['BACKOFF'] if backoff is None else backoff
+        self.max_backoff = config['MAX_BACKOFF'] if max_backoff is None else max_backoff
+
+        self.use_cache = use_cache
+
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency))
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+        self.loop = None
+        self.semaphore = None
+        self.in_flight: Dict[AnyStr, asyncio.Future] = dict()
+
+        self.stats = {'requests': 0, 'retries': 0, 'cached': 0, 'deduplicated': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+    def bind_loop(self):
+        # the semaphore belongs to the loop it was created on
+        loop = asyncio.get_event_loop()
+
+        if loop is not self.loop:
+            self.loop = loop
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.in_flight = dict()
+
+        return loop
+
+    def backoff_delay(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+
+        return random.uniform(delay / 2, delay)
+
+    def get(self, req_str: AnyStr) -> requests.Response:
+        return self.session.get(req_str, timeout=30)
+
+    async def request(self, lemma: AnyStr) -> Dict:
+        loop = self.bind_loop()
+
+        attempt = 0
+
+        while True:
+            exception = None
+
+            async with self.semaphore:
+                await self.rate_limiter.acquire_async()
+
+                req_str = self.api.build_uri(uri=self.api.yandex_definition_uri, method='lookup',
+                                             params={'text': lemma})
+
+                self.stats['requests'] += 1
+
+                try:
+                    resp = await loop.run_in_executor(self.executor, self.get, req_str)
+
+                    if resp.status_code == 200:
+                        return json.loads(resp.text)
+
+                    if resp.status_code not in self.retry_status_codes:
+                        raise self.api.resp_to_exception(resp)
+
+                    if resp.status_code == 429:
+                        exception = YandexThrottlingException(message=f'Throttled looking up {lemma}')
+                    else:
+                        exception = YandexException(message=f'{resp.status_code} {resp.reason} looking up {lemma}')
+                except requests.ConnectionError as e:
+                    exception = YandexException(message=f'{e} looking up {lemma}')
+
+            if attempt >= self.max_retries:
+                raise exception
+
+            delay = self.backoff_delay(attempt)
+
+            logger.warning(f'{exception}, retrying in {delay:.2f}s ({attempt+1} of {self.max_retries}).')
+
+            self.stats['retries'] += 1
+
+            attempt += 1
+
+            await asyncio.sleep(delay)
+
+    async def fetch(self, lemma: AnyStr) -> Optional[YandexDefinitions]:
+        from_lang, to_lang = self.api.from_lang, self.api.to_lang
+
+        cached = None
+
+        # sync_to_async rather than channels' database_sync_to_async, which closes the thread's connection around each
+        # call and so breaks a transaction the lookup runs in (e.g. a caller's, under async_to_sync)
+        if self.use_cache:
+            cached = await sync_to_async(YandexDefinitionCache.get)(
+                lemma=lemma, from_lang=from_lang, to_lang=to_lang)
+
+        if cached:
+            self.stats['cached'] += 1
+
+            resp = cached.to_response()
+        else:
+            resp = await self.request(lemma)
+
+            if self.use_cache:
+                await sync_to_async(YandexDefinitionCache.set)(
+                    lemma=lemma, from_lang=from_lang, to_lang=to_lang, definitions=resp.get('def'))
+
+        if 'def' not in resp:
+            return None
+
+        return YandexDefinitions(from_lang=from_lang, to_lang=to_lang, phrase=lemma, definitions=resp['def'])
+
+    async def lookup(self, lemma: AnyStr) -> Optional[YandexDefinitions]:
+        self.bind_loop()
+
+        if lemma in self.in_flight:
+            self.stats['deduplicated'] += 1
+        else:
+            self.in_flight[lemma] = asyncio.ensure_future(self.fetch(lemma))
+            self.in_flight[lemma].add_done_callback(lambda future: self.in_flight.pop(lemma, None))
+
+        # shielded so one caller going away doesn't cancel the lookup for the others
+        return await asyncio.shield(self.in_flight[lemma])
+
+    async def lookup_many(self, lemmas: Iterable[AnyStr]) -> Dict[AnyStr, Optional[YandexDefinitions]]:
+        """
+        Looks up each distinct lemma.  Lemmas that are still throttled after every retry are logged and map to None;
+        any other YandexException is raised.
+        """
+        lemmas = list(dict.fromkeys(lemmas))
+
+        results = await asyncio.gather(*[self.lookup(lemma) for lemma in lemmas], return_exceptions=True)
+
+        definitions = dict()
+
+        for lemma, result in zip(lemmas, results):
+            if isinstance(result, YandexThrottlingException):
+                logger.error(f'YandexThrottlingException {result.message}')
+
+                result = None
+            elif isinstance(result, BaseException):
+                raise result
+
+            definitions[lemma] = result
+
+        return definitions
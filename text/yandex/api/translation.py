@@ -70,8 +70,6 @@ class YandexTranslationAPI(YandexAPI):
         self.from_lang = from_lang
         self.to_lang = to_lang
 
-        self.last_request = None
-
     def translate(self, phrase: AnyStr) -> Union[YandexTranslations, None]:
         translations = None
 
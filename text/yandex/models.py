@@ -0,0 +1,82 @@
+import json
+
+from typing import AnyStr, Dict, List, Optional
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+DEFAULT_DEFINITION_CACHE = {
+    # seconds
+    'TTL': 60 * 60 * 24 * 90,
+    'NEGATIVE_TTL': 60 * 60 * 24 * 7,
+}
+
+
+class YandexDefinitionCache(models.Model):
+    """
+    Dictionary lookups by lemma, shared by every text so common lemmas are only requested once.  Lemmas without a
+    definition are cached too (with definitions set to null), for a shorter time.
+    """
+    class Meta:
+        unique_together = (('lemma', 'from_lang', 'to_lang'),)
+
+    lemma = models.CharField(max_length=255)
+
+    from_lang = models.CharField(max_length=8)
+    to_lang = models.CharField(max_length=8)
+
+    # the 'def' list of a lookup response, as JSON
+    definitions = models.TextField(null=True)
+
+    modified_dt = models.DateTimeField(auto_now=True)
+
+    # per process, so reading the cache never writes to it
+    stats = {'hits': 0, 'misses': 0}
+
+    def __str__(self):
+        return f'{self.lemma} ({self.from_lang}-{self.to_lang})'
+
+    @classmethod
+    def ttl(cls, negative: bool = False) -> timezone.timedelta:
+        config = getattr(settings, 'YANDEX_DEFINITION_CACHE', DEFAULT_DEFINITION_CACHE)
+
+        return timezone.timedelta(seconds=config['NEGATIVE_TTL'] if negative else config['TTL'])
+
+    @property
+    def is_negative(self) -> bool:
+        return self.definitions is None
+
+    @property
+    def is_fresh(self) -> bool:
+        return timezone.now() - self.modified_dt < self.ttl(negative=self.is_negative)
+
+    @classmethod
+    def get(cls, lemma: AnyStr, from_lang: AnyStr, to_lang: AnyStr) -> Optional['YandexDefinitionCache']:
+        cached = cls.objects.filter(lemma=lemma, from_lang=from_lang, to_lang=to_lang).first()
+
+        if cached and cached.is_fresh:
+            cls.stats['hits'] += 1
+
+            return cached
+
+        cls.stats['misses'] += 1
+
+        return None
+
+    @classmethod
+    def set(cls, lemma: AnyStr, from_lang: AnyStr, to_lang: AnyStr, definitions: Optional[List[Dict]]):
+        cls.objects.update_or_create(lemma=lemma, from_lang=from_lang, to_lang=to_lang, defaults={
+            'definitions': json.dumps(definitions) if definitions else None
+        })
+
+    @classmethod
+    def reset_stats(cls):
+        cls.stats['hits'] = 0
+        cls.stats['misses'] = 0
+
+    def to_response(self) -> Dict:
+        """
+        The cached lookup as a response from the dictionary API.
+        """
+        return {'def': json.loads(self.definitions) if self.definitions else []}
@@ -0,0 +1,288 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+from typing import AnyStr, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('django.consumers')
+
+DEFAULT_RATE_LIMIT = {
+    'BACKEND': 'text.yandex.ratelimit.FileLockTokenBucket',
+    'OPTIONS': {
+        # tokens per second, i.e. one request every ~7.5 seconds
+        'rate': 0.133,
+        'burst': 1,
+    },
+}
+
+
+def take_tokens(state: Optional[Dict], now: float, rate: float, burst: int,
+                tokens: int = 1) -> Tuple[Dict, float]:
+    """
+    Refills a bucket for the time since it was last used and takes tokens from it if there are enough.
+
+    :return: the bucket's new state and the seconds to wait before trying again (0 if the tokens were taken)
+    :raises ValueError: if more tokens are asked for than the bucket holds, which would never be taken
+    """
+    if tokens > burst:
+        raise ValueError(f'can\'t take {tokens} tokens from a bucket of {burst}')
+
+    if state is None:
+        state = {'tokens': burst, 'ts': now}
+
+    available = min(burst, state['tokens'] + max(0.0, now - state['ts']) * rate)
+
+    wait = 0.0
+
+    if available >= tokens:
+        available -= tokens
+    else:
+        wait = (tokens - available) / rate
+
+    return {'tokens': available, 'ts': now}, wait
+
+
+class TokenBucket(object):
+    """
+    A token bucket rate limiter.  Callers sleep (rather than spin) until a token is available.  Subclasses decide where
+    the bucket lives, which is what lets worker processes share a limit.
+    """
+    def __init__(self, key: AnyStr, rate: float, burst: int = 1, **kwargs):
+        self.key = key
+
+        self.rate = rate
+        self.burst = burst
+
+        self.stats_lock = threading.Lock()
+        self.stats = {'acquired': 0, 'waited': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+    def take(self, tokens: int = 1) -> float:
+        raise NotImplementedError
+
+    async def take_async(self, tokens: int = 1) -> float:
+        return self.take(tokens)
+
+    def record_wait(self, waited: float):
+        with self.stats_lock:
+            self.stats['acquired'] += 1
+
+            if waited > 0:
+                self.stats['waited'] += 1
+                self.stats['wait_seconds'] += waited
+                self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+
+        if waited > 0:
+            logger.debug(f'Waited {waited:.2f}s for rate limit {self.key}')
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Blocks until the tokens are taken.
+
+        :return: the seconds spent waiting
+        """
+        waited = 0.0
+
+        while True:
+            wait = self.take(tokens)
+
+            if wait <= 0:
+                break
+
+            time.sleep(wait)
+
+            waited += wait
+
+        self.record_wait(waited)
+
+        return waited
+
+    async def acquire_async(self, tokens: int = 1) -> float:
+        waited = 0.0
+
+        while True:
+            wait = await self.take_async(tokens)
+
+            if wait <= 0:
+                break
+
+            await asyncio.sleep(wait)
+
+            waited += wait
+
+        self.record_wait(waited)
+
+        return waited
+
+
+class LocalTokenBucket(TokenBucket):
+    """
+    A bucket in this process's memory.
+    """
+    def __init__(self, *args, **kwargs):
+        super(LocalTokenBucket, self).__init__(*args, **kwargs)
+
+        self.lock = threading.Lock()
+        self.state = None
+
+    def take(self, tokens: int = 1) -> float:
+        with self.lock:
+            self.state, wait = take_tokens(self.state, time.time(), self.rate, self.burst, tokens)
+
+        return wait
+
+
+class FileLockTokenBucket(TokenBucket):
+    """
+    A bucket in a file, locked while it's updated so every process on this host shares it.
+    """
+    def __init__(self, *args, path: Optional[AnyStr] = None, **kwargs):
+        super(FileLockTokenBucket, self).__init__(*args, **kwargs)
+
+        self.path = os.path.join(path or tempfile.gettempdir(), f'ereadingtool_rate_limit_{self.key}.json')
+
+    def take(self, tokens: int = 1) -> float:
+        with open(self.path, 'a+') as bucket_file:
+            fcntl.flock(bucket_file, fcntl.LOCK_EX)
+
+            try:
+                bucket_file.seek(0)
+
+                try:
+                    state = json.loads(bucket_file.read())
+                except ValueError:
+                    state = None
+
+                state, wait = take_tokens(state, time.time(), self.rate, self.burst, tokens)
+
+                bucket_file.seek(0)
+                bucket_file.truncate()
+                bucket_file.write(json.dumps(state))
+                bucket_file.flush()
+            finally:
+                fcntl.flock(bucket_file, fcntl.LOCK_UN)
+
+        return wait
+
+    async def take_async(self, tokens: int = 1) -> float:
+        # flock() blocks while another process holds the bucket, so it's waited on off the event loop
+        return await asyncio.get_event_loop().run_in_executor(None, self.take, tokens)
+
+
+class RedisTokenBucket(TokenBucket):
+    """
+    A bucket in Redis (by default the channel layer's), shared by every worker using that Redis.
+    """
+    take_script = """
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local requested = tonumber(ARGV[4])
+
+    local available = tonumber(state[1])
+    local ts = tonumber(state[2])
+
+    if available == nil then
+        available = burst
+        ts = now
+    end
+
+    available = math.min(burst, available + math.max(0, now - ts) * rate)
+
+    local wait = 0
+
+    if available >= requested then
+        available = available - requested
+    else
+        wait = (requested - available) / rate
+    end
+
+    redis.call('HMSET', KEYS[1], 'tokens', tostring(available), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+
+    return tostring(wait)
+    """
+
+    def __init__(self, *args, hosts: Optional[List] = None, **kwargs):
+        super(RedisTokenBucket, self).__init__(*args, **kwargs)
+
+        if hosts is None:
+            hosts = settings.CHANNEL_LAYERS['default']['CONFIG']['hosts']
+
+        self.address = hosts[0]
+
+        # a connection is bound to the event loop it was opened on, so one is kept per loop
+        self.clients = weakref.WeakKeyDictionary()
+
+        # synchronous callers share one loop (and so one connection) of their own
+        self.sync_loop = None
+        self.sync_lock = threading.Lock()
+
+    async def get_client(self):
+        import aioredis
+
+        loop = asyncio.get_event_loop()
+
+        client = self.clients.get(loop)
+
+        if client is None or client.closed:
+            client = await aioredis.create_redis(self.address)
+
+            if self.clients.get(loop) is not None and not self.clients[loop].closed:
+                # another coroutine on this loop connected first
+                client.close()
+
+                return self.clients[loop]
+
+            self.clients[loop] = client
+
+        return client
+
+    def take(self, tokens: int = 1) -> float:
+        with self.sync_lock:
+            if self.sync_loop is None:
+                self.sync_loop = asyncio.new_event_loop()
+
+            return self.sync_loop.run_until_complete(self.take_async(tokens))
+
+    async def take_async(self, tokens: int = 1) -> float:
+        # checked here since the script doesn't go through take_tokens()
+        if tokens > self.burst:
+            raise ValueError(f'can\'t take {tokens} tokens from a bucket of {self.burst}')
+
+        # a connection that was closed (e.g. Redis restarted) is replaced on the next take
+        client = await self.get_client()
+
+        wait = await client.eval(self.take_script, keys=[f'rate_limit:{self.key}'],
+                                 args=[self.rate, self.burst, time.time(), tokens])
+
+        return float(wait)
+
+
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(key: AnyStr) -> TokenBucket:
+    """
+    The rate limiter for key (e.g. one per API key), configured by settings.YANDEX_RATE_LIMIT.
+    """
+    with rate_limiters_lock:
+        if key not in rate_limiters:
+            config = getattr(settings, 'YANDEX_RATE_LIMIT', DEFAULT_RATE_LIMIT)
+
+            rate_limiter_cls = import_string(config['BACKEND'])
+
+            rate_limiters[key] = rate_limiter_cls(key=key, **config.get('OPTIONS', {}))
+
+        return rate_limiters[key]
@@ -0,0 +1,29 @@
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+class TextReadingAnswerState(object):
+    """
+    The answers a reader has given for one text section, resolved up front so a section's questions can be annotated
+    without querying once per answer option.
+    """
+    def __init__(self, answers: Iterable[Tuple[int, int]]):
+        """
+        :param answers: (question_id, answer_id) pairs, oldest first
+        """
+        self.first_answers: Dict[int, int] = dict()
+        self.answered: Set[int] = set()
+
+        for question_id, answer_id in answers:
+            self.first_answers.setdefault(question_id, answer_id)
+            self.answered.add(answer_id)
+
+    @classmethod
+    def for_section(cls, text_reading, text_section_id: int) -> 'TextReadingAnswerState':
+        return cls(text_reading.text_reading_answers.filter(
+            text_section_id=text_section_id).order_by('created_dt', 'pk').values_list('question_id', 'answer_id'))
+
+    def is_answered(self, answer_id: int) -> bool:
+        return answer_id in self.answered
+
+    def first_answer(self, question_id: int) -> Optional[int]:
+        return self.first_answers.get(question_id)
@@ -2,14 +2,15 @@ import json
 
 from typing import TypeVar, Optional, Dict, Union
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.functional import cached_property
-from django.db.models import Count, Sum
+from django.db.models import Count, F, Sum
 
 from mixins.model import Timestamped
 from question.models import Question, Answer
 from text.models import Text, TextSection
+from text_reading.answers import TextReadingAnswerState
 from text_reading.state.models import TextReadingStateMachine
 from text_reading.exceptions import (TextReadingInvalidState, TextReadingNotAllQuestionsAnswered,
                                      TextReadingQuestionNotInSection)
@@ -37,6 +38,20 @@ class TextReading(models.Model):
 
     random_seed = models.CharField(max_length=256, null=False)
 
+    # denormalized score, maintained by answer(), next() and prev() (see calculate_score())
+    complete_sections = models.PositiveIntegerField(default=0)
+    first_answers_correct = models.PositiveIntegerField(default=0)
+    questions_answered = models.PositiveIntegerField(default=0)
+    max_score = models.PositiveIntegerField(default=0)
+
+    score_fields = ('complete_sections', 'first_answers_correct', 'questions_answered', 'max_score')
+
+    # bumped by every change to the reading (see TextReadings.text_readings_version)
+    version = models.PositiveIntegerField(default=0)
+
+    # the fields a move between sections changes
+    transition_fields = ('state', 'current_section', 'complete_sections', 'max_score')
+
     def __init__(self, *args, **kwargs):
         """
         Deserialize the state from the db.
@@ -45,13 +60,29 @@ class TextReading(models.Model):
 
         self.state_machine = self.state_machine_cls()
 
-        self.state_machine.next.validators = [self.next_validator]
-        self.state_machine.completing.validators = [self.next_validator]
+        self.state_machine.section_validators = [self.next_validator]
 
         self.state_machine.on_enter_complete = self.on_enter_complete
 
         self.state_machine.current_state = getattr(self.state_machine_cls, self.state)
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.max_score = self.calculate_max_score()
+        else:
+            # bumped in the same write as the change it counts
+            self.version = F('version') + 1
+
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = list(kwargs['update_fields']) + ['version']
+
+        super(TextReading, self).save(*args, **kwargs)
+
+        if isinstance(self.__dict__.get('version'), models.Expression):
+            # rather than leave the expression behind, the new version is read back if it's asked for (as a deferred
+            # field), which keeps a save to one query
+            del self.__dict__['version']
+
     def to_dict(self) -> Dict:
         return {
             'id': self.pk,
@@ -80,6 +111,17 @@ class TextReading(models.Model):
 
     @property
     def score(self) -> Dict:
+        return {
+            'num_of_sections': self.number_of_sections,
+            'complete_sections': self.complete_sections,
+            'section_scores': self.first_answers_correct,
+            'possible_section_scores': self.questions_answered
+        }
+
+    def calculate_score(self) -> Dict:
+        """
+        Recalculates the denormalized score fields from the reading's answers.
+        """
         answered_correctly = self.text_reading_answers.order_by('created_dt').filter(
             question=models.OuterRef('question'))
 
@@ -91,6 +133,14 @@ class TextReading(models.Model):
 
         question_scores = sum([1 if answer['answered_correctly'] else 0 for answer in scores])
 
+        return {
+            'complete_sections': self.calculate_complete_sections(),
+            'first_answers_correct': question_scores,
+            'questions_answered': len(scores),
+            'max_score': self.calculate_max_score()
+        }
+
+    def calculate_complete_sections(self) -> int:
         complete_sections = 0
 
         if self.in_progress:
@@ -98,12 +148,11 @@ class TextReading(models.Model):
         elif self.complete:
             complete_sections = self.number_of_sections
 
-        return {
-            'num_of_sections': self.number_of_sections,
-            'complete_sections': complete_sections,
-            'section_scores': question_scores,
-            'possible_section_scores': len(scores)
-        }
+        return complete_sections
+
+    def calculate_max_score(self) -> int:
+        return self.sections.prefetch_related('questions').annotate(num_of_questions=Count('questions')).aggregate(
+            max_score=Sum('num_of_questions'))['max_score'] or 0
 
     def to_text_reading_dict(self, **kwargs) -> Dict:
         if self.state_machine.is_in_progress:
@@ -116,15 +165,13 @@ class TextReading(models.Model):
         elif self.state_machine.is_complete:
             return self.score
 
-    @property
+    def answer_state(self, text_section_id: int) -> TextReadingAnswerState:
+        return TextReadingAnswerState.for_section(self, text_section_id)
+
+    @cached_property
     def number_of_sections(self):
         return self.sections.count()
 
-    @property
-    def max_score(self):
-        return self.sections.prefetch_related('questions').annotate(num_of_questions=Count('questions')).aggregate(
-            max_score=Sum('num_of_questions'))['max_score']
-
     @cached_property
     def sections(self):
         return self.text.sections.all()
@@ -142,11 +189,11 @@ class TextReading(models.Model):
 
     def set_last_read_dt(self):
         self.last_read_dt = timezone.now()
-        self.save()
+        self.save(update_fields=['last_read_dt'])
 
     def set_end_dt(self):
         self.end_dt = timezone.now()
-        self.save()
+        self.save(update_fields=['end_dt'])
 
     def on_enter_complete(self, *args, **kwargs):
         self.set_end_dt()
@@ -163,24 +210,37 @@ class TextReading(models.Model):
             )
 
     def answer(self, answer: Answer) -> Optional['TextReadingAnswers']:
-        if answer.question.text_section != self.current_section:
+        if answer.question.text_section_id != self.current_section_id:
             raise TextReadingQuestionNotInSection(code='question_not_in_section',
                                                   error_msg='This question is not in this section.')
 
-        if not self.text_reading_answer_cls.objects.filter(text_reading=self,
-                                                           text_section=self.current_section,
-                                                           question=answer.question, answer=answer).count():
+        with transaction.atomic():
+            text_reading_answers = self.text_reading_answer_cls.objects.filter(text_reading=self,
+                                                                               text_section=self.current_section,
+                                                                               question=answer.question)
+
+            if text_reading_answers.filter(answer=answer).count():
+                return None
+
+            first_answer = not text_reading_answers.exists()
 
-            text_reading_answers = self.text_reading_answer_cls(text_reading=self,
-                                                                text_section=self.current_section,
-                                                                question=answer.question,
-                                                                answer=answer)
+            text_reading_answer = self.text_reading_answer_cls(text_reading=self,
+                                                               text_section=self.current_section,
+                                                               question=answer.question,
+                                                               answer=answer)
 
-            text_reading_answers.save()
+            text_reading_answer.save()
 
-            return text_reading_answers
+            if first_answer:
+                # only the first answer to a question counts towards the score
+                type(self).objects.filter(pk=self.pk).update(
+                    questions_answered=F('questions_answered') + 1,
+                    first_answers_correct=F('first_answers_correct') + int(answer.correct),
+                    version=F('version') + 1)
 
-        return None
+                self.refresh_from_db(fields=['questions_answered', 'first_answers_correct'])
+
+        return text_reading_answer
 
     def prev(self, *args, **kwargs):
         """
@@ -208,7 +268,9 @@ class TextReading(models.Model):
 
         self.state = self.current_state.name
 
-        self.save()
+        self.complete_sections = self.calculate_complete_sections()
+
+        self.save(update_fields=self.transition_fields)
 
     def next(self, *args, **kwargs):
         """
@@ -217,7 +279,7 @@ class TextReading(models.Model):
         :param kwargs:
         :return:
         """
-        self.refresh_from_db(fields=['state', 'current_section'])
+        self.refresh_from_db(fields=['state', 'current_section', *self.score_fields])
 
         next_section = None
 
@@ -236,7 +298,12 @@ class TextReading(models.Model):
 
         self.state = self.current_state.name
 
-        self.save()
+        self.complete_sections = self.calculate_complete_sections()
+
+        # the text may have been edited mid-reading
+        self.max_score = self.calculate_max_score()
+
+        self.save(update_fields=self.transition_fields)
 
     @classmethod
     def start(cls, profile: Union['Student', 'Instructor'], text: Text) -> 'TextReading':
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from text_reading.models import StudentTextReading, InstructorTextReading
+
+
+class Command(BaseCommand):
+    help = 'Backfills (or verifies) the denormalized score fields on text readings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', dest='verify',
+                            help='Only report readings whose stored score differs from their answers.')
+
+    def handle(self, *args, **options):
+        table_str = '{:<25} {:<15} {:<25} {:<15} {:<15}'
+
+        num_of_mismatches = 0
+        num_of_readings = 0
+
+        for queryset in [StudentTextReading.objects.all(), InstructorTextReading.objects.all()]:
+            for text_reading in queryset.select_related('text', 'current_section').iterator():
+                num_of_readings += 1
+
+                score = text_reading.calculate_score()
+
+                stored_score = {field: getattr(text_reading, field) for field in text_reading.score_fields}
+
+                if score == stored_score:
+                    continue
+
+                num_of_mismatches += 1
+
+                for field in text_reading.score_fields:
+                    if score[field] != stored_score[field]:
+                        self.stdout.write(table_str.format(text_reading.__class__.__name__, text_reading.pk, field,
+                                                           stored_score[field], score[field]))
+
+                if not options['verify']:
+                    queryset.model.objects.filter(pk=text_reading.pk).update(**score)
+
+        if options['verify']:
+            msg = f'{num_of_mismatches} of {num_of_readings} text readings have a stale score.'
+
+            if num_of_mismatches:
+                raise CommandError(msg)
+        else:
+            msg = f'Backfilled {num_of_mismatches} of {num_of_readings} text readings.'
+
+        self.stdout.write(self.style.SUCCESS(msg))
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text_reading', '0002_auto_20190306_0140'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructortextreading',
+            name='complete_sections',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='instructortextreading',
+            name='first_answers_correct',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='instructortextreading',
+            name='max_score',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='instructortextreading',
+            name='questions_answered',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studenttextreading',
+            name='complete_sections',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studenttextreading',
+            name='first_answers_correct',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studenttextreading',
+            name='max_score',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studenttextreading',
+            name='questions_answered',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.20 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('text_reading', '0003_text_reading_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='instructortextreading',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='studenttextreading',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,127 @@
+from typing import Dict, List, Optional
+
+from django.db.models import Count
+from django.utils import timezone
+
+from question.models import Answer
+from text.models import TextSection
+from text_reading.exceptions import TextReadingNotAllQuestionsAnswered
+
+
+class TextReadingSession(object):
+    """
+    A text reading owned by a single connection.  The ordered sections, their question counts and the reader's
+    answer counts are loaded once, so moving between sections runs the state machine in memory and only writes the
+    fields that changed.
+    """
+    def __init__(self, text_reading):
+        self.text_reading = text_reading
+
+        self.sections: List[TextSection] = list(text_reading.text.sections.annotate(
+            num_of_questions=Count('questions')).order_by('order'))
+
+        self.section_index: Dict[int, int] = {section.pk: i for i, section in enumerate(self.sections)}
+
+        self.num_of_answers: Dict[int, int] = {
+            answers['text_section']: answers['num_of_answers'] for answers in
+            text_reading.text_reading_answers.values('text_section').annotate(num_of_answers=Count('pk'))
+        }
+
+        self.dirty_fields = set()
+
+        text_reading.number_of_sections = len(self.sections)
+
+        if text_reading.current_section_id:
+            text_reading.current_section = self.sections[self.section_index[text_reading.current_section_id]]
+
+        text_reading.state_machine.section_validators = [self.next_validator]
+        text_reading.state_machine.on_enter_complete = self.on_enter_complete
+
+    @property
+    def max_score(self) -> int:
+        return sum(section.num_of_questions for section in self.sections)
+
+    def next_validator(self, *args, **kwargs):
+        current_section = self.text_reading.get_current_section()
+
+        if self.num_of_answers.get(current_section.pk, 0) < current_section.num_of_questions:
+            raise TextReadingNotAllQuestionsAnswered(
+                code='questions_unanswered',
+                error_msg='Please answer all questions before continuing to the next section.'
+            )
+
+    def on_enter_complete(self, *args, **kwargs):
+        self.text_reading.end_dt = timezone.now()
+
+        self.dirty_fields.add('end_dt')
+
+    def answer(self, answer: Answer):
+        text_reading_answer = self.text_reading.answer(answer)
+
+        if text_reading_answer:
+            self.num_of_answers[answer.question.text_section_id] = \
+                self.num_of_answers.get(answer.question.text_section_id, 0) + 1
+
+        return text_reading_answer
+
+    def next_section(self) -> Optional[TextSection]:
+        text_reading = self.text_reading
+
+        next_section = None
+
+        if text_reading.current_section:
+            try:
+                next_section = self.sections[self.section_index[text_reading.current_section.pk] + 1]
+            except IndexError:
+                pass
+
+        elif text_reading.state_machine.is_intro and self.sections:
+            next_section = self.sections[0]
+
+        return next_section
+
+    def next(self, **kwargs):
+        text_reading = self.text_reading
+
+        next_section = self.next_section()
+
+        text_reading.state_machine.next_state(next_section=next_section, **kwargs)
+
+        self.move_to(next_section)
+
+    def prev(self, **kwargs):
+        text_reading = self.text_reading
+
+        prev_section = None
+
+        if text_reading.state_machine.is_in_progress and text_reading.current_section:
+            i = self.section_index[text_reading.current_section.pk] - 1
+
+            if i > -1:
+                prev_section = self.sections[i]
+
+        elif text_reading.state_machine.is_complete:
+            prev_section = self.sections[len(self.sections)-1]
+
+        text_reading.state_machine.prev_state(prev_section=prev_section, **kwargs)
+
+        self.move_to(prev_section)
+
+    def move_to(self, section: Optional[TextSection]):
+        text_reading = self.text_reading
+
+        text_reading.current_section = section
+
+        text_reading.state = text_reading.current_state.name
+
+        text_reading.complete_sections = text_reading.calculate_complete_sections()
+        text_reading.max_score = self.max_score
+
+        self.save(*text_reading.transition_fields)
+
+    def save(self, *fields):
+        self.dirty_fields.update(fields)
+
+        self.text_reading.save(update_fields=sorted(self.dirty_fields))
+
+        self.dirty_fields.clear()
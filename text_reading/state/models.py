@@ -21,14 +21,27 @@ class TextReadingStateMachine(StateMachine):
 
     back_to_reading = complete.to(in_progress)
 
+    def __init__(self, *args, **kwargs):
+        super(TextReadingStateMachine, self).__init__(*args, **kwargs)
+
+        # run before leaving a section.  transition validators are shared by every machine (they live on the
+        # class), so these are kept per machine instead.
+        self.section_validators = []
+
+    def validate_section(self, *args, **kwargs):
+        for validator in self.section_validators:
+            validator(*args, **kwargs)
+
     def next_state(self, next_section: Optional[TextSection] = None, reading=True, *args, **kwargs):
         if self.is_intro and next_section:
             self.reading()
 
         elif self.is_in_progress and next_section:
+            self.validate_section()
             self.next()
 
         elif self.is_in_progress and not next_section:
+            self.validate_section()
             self.completing()
 
     def prev_state(self, prev_section: Optional[TextSection] = None, reading=True, *args, **kwargs):
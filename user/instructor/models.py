@@ -71,5 +71,19 @@ class Instructor(Profile, TextReadings, models.Model):
 
         return text_instructor_summary
 
+    def to_text_summary_dicts(self, texts: models.QuerySet) -> List[Dict]:
+        """
+        to_text_summary_dict() for each of the texts, with a fixed number of queries however many texts there are.
+        """
+        text_summaries = Text.to_summary_dicts(texts)
+
+        reading_summaries = self.text_reading_summaries(text_summaries)
+
+        for text_summary in text_summaries:
+            text_summary['vote'] = "none"
+            text_summary.update(reading_summaries[text_summary['id']])
+
+        return text_summaries
+
     def __str__(self):
         return self.user.username
@@ -1,5 +1,5 @@
 from logging import raiseExceptions
-from typing import AnyStr, Union, Tuple
+from typing import AnyStr, Dict, Iterable, List, Union, Tuple
 from typing import Optional
 
 from django.db import models
@@ -44,6 +44,16 @@ class TextReadings(models.Model):
 
     text_readings = None
 
+    @property
+    def text_readings_version(self) -> AnyStr:
+        """
+        Changes whenever one of the profile's readings is started, moved, answered or deleted (see
+        TextReading.version), from one aggregate query.
+        """
+        version = self.text_readings.aggregate(num_of_readings=models.Count('pk'), version=models.Sum('version'))
+
+        return f'{version["num_of_readings"]}:{version["version"] or 0}'
+
     def last_read_dt(self, text: Text) -> Optional[timezone.datetime]:
         last_read_dt = None
 
@@ -114,6 +124,59 @@ class TextReadings(models.Model):
 
         return sections_complete
 
+    def text_reading_summaries(self, text_summaries: List[Dict]) -> Dict[int, Dict]:
+        """
+        The text_sections_complete, last_read_dt and questions_correct of to_text_summary_dict() for each of the texts
+        of Text.to_summary_dicts(), from one query of the readings.  They're picked as sections_complete_for() and
+        last_read() pick them.
+        """
+        summaries = dict()
+
+        readings = dict()
+
+        for reading in self.text_readings.filter(text__in=[text_summary['id'] for text_summary in text_summaries],
+                                                 state__in=[TextReadingStateMachine.in_progress.name,
+                                                            TextReadingStateMachine.complete.name]).order_by(
+                'start_dt', 'pk').values('text', 'state', 'last_read_dt', 'first_answers_correct', 'max_score',
+                                         'current_section__order'):
+            # the latest reading in each state
+            readings[(reading['text'], reading['state'])] = reading
+
+        for text_summary in text_summaries:
+            in_progress = readings.get((text_summary['id'], TextReadingStateMachine.in_progress.name))
+            complete = readings.get((text_summary['id'], TextReadingStateMachine.complete.name))
+
+            if in_progress:
+                sections_complete = in_progress['current_section__order']
+            elif complete:
+                sections_complete = text_summary['text_section_count']
+            else:
+                sections_complete = 0
+
+            last_read = in_progress or complete
+
+            summaries[text_summary['id']] = {
+                'text_sections_complete': sections_complete,
+                'last_read_dt': last_read['last_read_dt'].isoformat() if last_read and last_read['last_read_dt']
+                else None,
+                'questions_correct': (last_read['first_answers_correct'], last_read['max_score']) if last_read
+                else None,
+            }
+
+        return summaries
+
+    def vote_histories(self, texts: Iterable[int]) -> Dict[int, str]:
+        """
+        vote_history() for many texts (by pk), in one query.
+        """
+        votes = dict()
+
+        for text_id, vote in TextRating.objects.filter(student_id=self.id, text_id__in=texts).order_by(
+                'pk').values_list('text_id', 'vote'):
+            votes.setdefault(text_id, {1: 'up', -1: 'down'}.get(vote, 'none'))
+
+        return votes
+
     def vote_history(self, text: Text) -> str:
         try:
             v = TextRating.objects \
@@ -53,8 +53,12 @@ class Student(Profile, TextReadings, models.Model):
 
     @property
     def serialized_flashcards(self) -> List[Tuple]:
+        flashcards = list(self.flashcards.select_related('phrase__text_section'))
+
+        TextPhrase.prefetch_sentences(flashcard.phrase for flashcard in flashcards)
+
         serialized_flashcards = [
-            (flashcard.phrase.phrase, flashcard.to_dict()) for flashcard in self.flashcards.all()
+            (flashcard.phrase.phrase, flashcard.to_dict()) for flashcard in flashcards
         ]
 
         return serialized_flashcards
@@ -88,6 +92,21 @@ class Student(Profile, TextReadings, models.Model):
 
         return text_student_summary
 
+    def to_text_summary_dicts(self, texts: models.QuerySet) -> List[Dict]:
+        """
+        to_text_summary_dict() for each of the texts, with a fixed number of queries however many texts there are.
+        """
+        text_summaries = Text.to_summary_dicts(texts)
+
+        votes = self.vote_histories(text_summary['id'] for text_summary in text_summaries)
+        reading_summaries = self.text_reading_summaries(text_summaries)
+
+        for text_summary in text_summaries:
+            text_summary['vote'] = votes.get(text_summary['id'], 'none')
+            text_summary.update(reading_summaries[text_summary['id']])
+
+        return text_summaries
+
     def __str__(self) -> AnyStr:
         return self.user.username or self.user.email
 